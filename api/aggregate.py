@@ -0,0 +1,135 @@
+import asyncio
+import heapq
+from typing import Any, Dict, List, Optional, Tuple
+
+from api.cache import ResponseCache
+from api.errors import UpstreamError, UpstreamUnavailable
+from api.scrape import Vlr
+from api.stats_table import stat_value
+from utils.constants import stat_columns, stats_regions
+
+
+def merge_players(pages: List[Tuple[str, List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """
+    Merge per-region stats, listing each player once.
+
+    A player (same name and org) found in several regions keeps the row of
+    the first region it appears in, with every region recorded in `regions`.
+
+    Args:
+        pages: (region, players) pairs in region order
+
+    Returns:
+        Player rows with a `regions` list
+    """
+    players: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for region, rows in pages:
+        for row in rows:
+            key = (row["player"].lower(), row["org"].lower())
+            player = players.get(key)
+            if player is None:
+                players[key] = {**row, "regions": [region]}
+            elif region not in player["regions"]:
+                player["regions"].append(region)
+    return list(players.values())
+
+
+def top_players(
+    players: List[Dict[str, Any]], sort: str, descending: bool = True, limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Sort players on a stat column, keeping the top `limit`.
+
+    Players without a value for the column always come last.
+
+    Args:
+        players: Player rows
+        sort: Stat column name
+        descending: Highest values first
+        limit: Number of players to keep (all when None)
+
+    Returns:
+        The sorted (and truncated) rows
+    """
+    sign = -1 if descending else 1
+    valued, missing = [], []
+    for position, player in enumerate(players):
+        value = stat_value(player.get(sort))
+        if value is None:
+            missing.append(player)
+        else:
+            # The position keeps ties in region order
+            valued.append((sign * value, position, player))
+
+    if limit is not None and limit < len(valued):
+        ranked = heapq.nsmallest(limit, valued)
+    else:
+        ranked = sorted(valued)
+    result = [player for _, _, player in ranked] + missing
+    return result[:limit] if limit is not None else result
+
+
+class StatsAggregator:
+    """
+    Cross-region player stats leaderboard.
+
+    Every region is fetched concurrently through the response cache with the
+    same keys as `/stats/{region}/{timespan}`, so each region page is cached
+    on its own and the leaderboard is rebuilt from cached pages.
+    """
+
+    def __init__(self, vlr: Vlr, cache: ResponseCache, regions: Optional[List[str]] = None):
+        """
+        Args:
+            vlr: Facade performing the scrapes
+            cache: Response cache shared with the stats route
+            regions: Regions to cover (defaults to every region)
+        """
+        self.vlr = vlr
+        self.cache = cache
+        self.regions = regions or stats_regions
+
+    async def _region(self, region: str, timespan: int) -> Tuple[str, int, List[Dict[str, Any]]]:
+        """Fetch one region's players, reporting a failure as its status."""
+        try:
+            data = await self.cache.get_or_fetch(
+                "vlrapi-stats", f"/stats/{region}/{timespan}", lambda: self.vlr.vlr_stats(region, timespan)
+            )
+        except UpstreamError as e:
+            return region, e.status or e.response_status, []
+        return region, data["data"]["status"], data["data"]["segments"]
+
+    async def leaderboard(
+        self, timespan: int, sort: str = "average_combat_score", descending: bool = True, limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the merged leaderboard.
+
+        Args:
+            timespan: Time period in days
+            sort: Stat column to sort on (one of `stat_columns`)
+            descending: Highest values first
+            limit: Number of players to return
+
+        Returns:
+            Dictionary with the per-region statuses and the sorted players
+
+        Raises:
+            ValueError: If `sort` is not a stat column
+            UpstreamUnavailable: If no region could be fetched
+        """
+        if sort not in stat_columns:
+            raise ValueError(f"Sort must be one of: {', '.join(stat_columns)}")
+
+        fetched = await asyncio.gather(*(self._region(region, timespan) for region in self.regions))
+        if all(status != 200 for _, status, _ in fetched):
+            raise UpstreamUnavailable("No region could be fetched")
+
+        players = merge_players([(region, rows) for region, status, rows in fetched if status == 200])
+        return {
+            "data": {
+                "status": 200,
+                "regions": [{"region": region, "status": status} for region, status, _ in fetched],
+                "segments": top_players(players, sort, descending, limit),
+            }
+        }
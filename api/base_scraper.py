@@ -1,44 +1,118 @@
-import httpx
+import functools
+
 from selectolax.parser import HTMLParser
-from typing import Tuple, Dict, Any, Optional
+from typing import Tuple, Dict, Any, Optional, Callable, TypeVar
+
+from api.errors import error_for_status
+from api.metrics import EXTRACT_SECONDS, PARSE_MEMO_HITS, PARSE_SECONDS
+from api.parse_executor import ParseExecutor
+from api.timing import record
+from api.upstream import UpstreamClient
+from utils import config
+from utils.lru import LRUCache
+from utils.singleflight import SingleFlight
+
+T = TypeVar("T")
+
+
+def extractor_name(extract: Callable[..., Any]) -> str:
+    """Stable name of an extraction function, used in memo keys."""
+    return f"{extract.__module__}.{extract.__qualname__}"
+
+
+def method_label(extract: Callable[..., Any]) -> str:
+    """Metrics label of an extraction function (e.g. "MatchScraper.extract_results")."""
+    while isinstance(extract, functools.partial):
+        extract = extract.func
+    return getattr(extract, "__qualname__", type(extract).__name__)
+
 
 class BaseScraper:
     """Base class for all scrapers with common functionality."""
-    
-    def __init__(self):
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36 Edg/121.0.0.0",
-        }
-    
-    async def get_parse(self, url: str, client: httpx.AsyncClient = None) -> Tuple[HTMLParser, int]:
+
+    def __init__(
+        self,
+        upstream: Optional[UpstreamClient] = None,
+        flight: Optional[SingleFlight] = None,
+        memo: Optional[LRUCache] = None,
+        executor: Optional[ParseExecutor] = None,
+    ):
+        """
+        Args:
+            upstream: Shared upstream client (creates a private one if not provided)
+            flight: Shared single-flight group used to coalesce identical scrapes (URL and extractor)
+            memo: Shared memo of extraction results keyed by URL and extractor
+            executor: Pool running parsing and extraction off the event loop
         """
-        Make an async request to a URL and return the HTML parser and status code.
-        
+        self.upstream = upstream if upstream is not None else UpstreamClient()
+        self.flight = flight if flight is not None else SingleFlight("scrape")
+        self.memo = memo if memo is not None else LRUCache(config.PARSE_MEMO_SIZE)
+        self.memo_hits = 0
+        self.executor = executor if executor is not None else ParseExecutor("inline")
+
+    async def scrape(
+        self,
+        url: str,
+        extract: Callable[[HTMLParser], T],
+        endpoint: str = "default",
+        memo_key: Optional[str] = None,
+    ) -> Tuple[T, int]:
+        """
+        Fetch a URL and run an extraction function over the parsed page.
+
+        Parsing and extraction run in the scraper's parse executor, so
+        `extract` must be a pure (and, for process pools, picklable) function.
+
+        If the body is byte-for-byte identical to the one last extracted for
+        this URL, parsing is skipped and the previous result is returned.
+        Results are shared between callers and must not be mutated.
+
         Args:
             url: The URL to request
-            client: Optional async HTTP client (creates one if not provided)
-            
+            extract: Pure function turning the parsed page into a result
+            endpoint: Endpoint name used to pick the upstream timeout
+            memo_key: Name identifying `extract` (defaults to its qualified name)
+
         Returns:
-            A tuple of (HTMLParser, status_code)
+            A tuple of (extracted result, status_code)
         """
-        if client is None:
-            async with httpx.AsyncClient(timeout=8.0) as async_client:
-                resp = await async_client.get(url, headers=self.headers)
-                html, status_code = resp.text, resp.status_code
-        else:
-            resp = await client.get(url, headers=self.headers)
-            html, status_code = resp.text, resp.status_code
-        return HTMLParser(html), status_code
-    
+        memo_key = memo_key or extractor_name(extract)
+        return await self.flight.do(
+            (url, memo_key), lambda: self._scrape(url, extract, endpoint, memo_key)
+        )
+
+    async def _scrape(
+        self, url: str, extract: Callable[[HTMLParser], T], endpoint: str, memo_key: str
+    ) -> Tuple[T, int]:
+        """Fetch a page, reusing the memoized extraction when the body is unchanged."""
+        page = await self.upstream.fetch(url, endpoint=endpoint)
+        key = (url, memo_key)
+        memoized = self.memo.get(key)
+        method = method_label(extract)
+        if memoized is not None and memoized[0] == page.digest:
+            self.memo_hits += 1
+            PARSE_MEMO_HITS.labels(method=method).inc()
+            return memoized[1], page.status
+
+        result, parse_seconds, extract_seconds = await self.executor.run_timed(extract, page.text)
+        PARSE_SECONDS.labels(method=method).observe(parse_seconds)
+        EXTRACT_SECONDS.labels(method=method).observe(extract_seconds)
+        record("parse", parse_seconds)
+        record("extract", extract_seconds)
+        if page.status == 200:
+            self.memo.set(key, (page.digest, result))
+        return result, page.status
+
     def check_status(self, status: int) -> None:
         """
         Check if the API response is successful.
-        
+
         Args:
             status: HTTP status code
-            
+
         Raises:
-            Exception: If status is not 200
+            UpstreamError: The typed error matching the status, if it is not 200
         """
-        if status != 200:
-            raise Exception(f"API response: {status}")
\ No newline at end of file
+        error = error_for_status(status)
+        if error is not None:
+            raise error
@@ -0,0 +1,144 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Collection, Dict, List, NamedTuple, Optional, Tuple
+
+from api.cache import ResponseCache
+from api.errors import UpstreamError
+from api.scrape import Vlr
+from utils import config
+from utils.constants import region_map, stats_regions
+
+
+class BatchEndpoint(NamedTuple):
+    """A facade call reachable from the batch endpoint."""
+    namespace: str
+    # Route path template; with the parameters filled in it is also the cache key
+    path: str
+    params: Tuple[str, ...]
+    call: Callable[..., Awaitable[Any]]
+    # Accepted values of the "region" parameter, the same as the GET route's
+    regions: Collection[str] = ()
+
+
+ENDPOINTS: Dict[str, BatchEndpoint] = {
+    "news": BatchEndpoint("vlrapi-news", "/news", (), lambda vlr: vlr.vlr_recent()),
+    "results": BatchEndpoint("vlrapi-results", "/match/results", (), lambda vlr: vlr.vlr_results()),
+    "upcoming": BatchEndpoint("vlrapi-upcoming", "/match/upcoming", (), lambda vlr: vlr.vlr_upcoming()),
+    "live_score": BatchEndpoint("vlrapi-live-score", "/match/live_score", (), lambda vlr: vlr.vlr_live_score()),
+    "stats": BatchEndpoint(
+        "vlrapi-stats", "/stats/{region}/{timespan}", ("region", "timespan"),
+        lambda vlr, region, timespan: vlr.vlr_stats(region, timespan), stats_regions,
+    ),
+    "rankings": BatchEndpoint(
+        "vlrapi-rankings", "/rankings/{region}", ("region",), lambda vlr, region: vlr.vlr_rankings(region), region_map
+    ),
+    "streams": BatchEndpoint(
+        "vlrapi-streams", "/match/streams/{match}", ("match",), lambda vlr, match: vlr.vlr_streams(match)
+    ),
+}
+
+
+def query_key(endpoint: str, params: Dict[str, Any]) -> str:
+    """
+    Canonical name of a sub-query, used to dedupe and to key the results.
+
+    Args:
+        endpoint: Endpoint name
+        params: Endpoint parameters
+
+    Returns:
+        e.g. "rankings?region=na"
+    """
+    if not params:
+        return endpoint
+    return endpoint + "?" + "&".join(f"{name}={params[name]}" for name in sorted(params))
+
+
+def validate(endpoint: str, params: Dict[str, Any]) -> Tuple[BatchEndpoint, Dict[str, Any]]:
+    """
+    Check a sub-query and normalize its parameters.
+
+    Args:
+        endpoint: Endpoint name
+        params: Endpoint parameters
+
+    Returns:
+        The endpoint and its normalized parameters
+
+    Raises:
+        ValueError: If the endpoint or a parameter is not valid
+    """
+    target = ENDPOINTS.get(endpoint)
+    if target is None:
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+    missing = [name for name in target.params if name not in params]
+    unexpected = [name for name in params if name not in target.params]
+    if missing or unexpected:
+        raise ValueError(f"{endpoint} takes parameters: {', '.join(target.params) or 'none'}")
+
+    params = {name: str(params[name]) for name in target.params}
+    if "region" in params and params["region"] not in target.regions:
+        raise ValueError(f"Unknown region: {params['region']}")
+    if "timespan" in params:
+        if params["timespan"] not in ("30", "60", "90"):
+            raise ValueError("Timespan must be 30, 60, or 90 days")
+        params["timespan"] = int(params["timespan"])
+    return target, params
+
+
+class BatchRunner:
+    """
+    Runs many facade calls for one client request.
+
+    Identical sub-queries run once, the rest run concurrently (bounded by
+    `concurrency`) through the response cache, sharing entries with the
+    regular GET routes. A failing sub-query only affects its own result.
+    """
+
+    def __init__(self, vlr: Vlr, cache: ResponseCache, concurrency: Optional[int] = None):
+        """
+        Args:
+            vlr: Facade performing the scrapes
+            cache: Response cache shared with the GET routes
+            concurrency: Maximum sub-queries running at the same time
+        """
+        self.vlr = vlr
+        self.cache = cache
+        self.concurrency = concurrency or config.BATCH_CONCURRENCY
+
+    async def _run_one(self, endpoint: str, params: Dict[str, Any], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """Run one sub-query, turning its failure into a per-item error."""
+        try:
+            target, params = validate(endpoint, params)
+            path = target.path.format(**params)
+            async with semaphore:
+                data = await self.cache.get_or_fetch(
+                    target.namespace, path, lambda: target.call(self.vlr, **params)
+                )
+        except ValueError as e:
+            return {"status": 400, "error": str(e)}
+        except UpstreamError as e:
+            return {"status": e.response_status, "error": str(e)}
+        except Exception as e:
+            return {"status": 500, "error": str(e) or type(e).__name__}
+        return {"status": 200, "data": data}
+
+    async def run(self, queries: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Run a batch.
+
+        Args:
+            queries: (endpoint, params) pairs
+
+        Returns:
+            One `{"status", "data"}` or `{"status", "error"}` item per distinct
+            query, keyed by `query_key` in request order
+        """
+        unique: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        for endpoint, params in queries:
+            unique.setdefault(query_key(endpoint, params), (endpoint, params))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(
+            *(self._run_one(endpoint, params, semaphore) for endpoint, params in unique.values())
+        )
+        return dict(zip(unique, results))
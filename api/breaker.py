@@ -0,0 +1,84 @@
+import time
+from typing import Any, Dict, Optional
+
+from api.errors import CircuitOpen
+from utils import config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_stale_fallback(value: Any) -> bool:
+    """Whether a facade result is a last-known-good fallback rather than fresh data."""
+    return isinstance(value, dict) and "stale" in value
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker guarding one upstream route.
+
+    Closed: calls go through and consecutive failures are counted. Open: after
+    `failure_threshold` failures calls are rejected without touching upstream
+    for `reset_timeout` seconds. Half open: one probe is let through; its
+    success closes the circuit and its failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None):
+        """
+        Args:
+            name: Route name used in errors and statistics
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds to stay open before probing
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold or config.BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = config.BREAKER_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.trips = 0
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe is allowed."""
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self) -> None:
+        """
+        Check whether a call may go to upstream.
+
+        Raises:
+            CircuitOpen: While the circuit is open, or a probe is already running
+        """
+        if self.state == OPEN and self.retry_after() == 0:
+            # Let exactly this call through as the probe
+            self.state = HALF_OPEN
+            return
+        if self.state != CLOSED:
+            self.rejected += 1
+            raise CircuitOpen(f"Circuit for {self.name} is open", retry_after=self.retry_after() or None)
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        self.state = CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit when the threshold is reached."""
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.trips += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        """Report the circuit state and counters."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after(), 3) if self.state == OPEN else 0,
+        }
@@ -0,0 +1,313 @@
+import asyncio
+import functools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple, Union
+
+from starlette.requests import Request
+
+from api.breaker import is_stale_fallback
+from api.encoding import EncodedBody
+from api.governor import mark_background
+from api.metrics import CACHE_REQUESTS
+from api.timing import phase
+from utils import config
+from utils.lru import LRUCache
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class CachePolicy(NamedTuple):
+    """How long an entry is fresh, and how long after that it may be served stale."""
+    fresh: float
+    stale: float
+
+
+# A policy, or a function choosing the policy of each fetched value
+PolicyChoice = Union[CachePolicy, Callable[[Any], CachePolicy]]
+
+
+class CacheEntry(NamedTuple):
+    """A cached value with its absolute (epoch) freshness deadlines."""
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+    def is_fresh(self, now: float) -> bool:
+        """Whether the entry can be served without a refresh."""
+        return now < self.fresh_until
+
+    def is_usable(self, now: float) -> bool:
+        """Whether the entry can still be served, possibly stale."""
+        return now < self.stale_until
+
+
+class InMemoryCacheBackend:
+    """Process-local cache storage, evicting the least recently used entries when full."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """
+        Args:
+            max_entries: Maximum number of entries kept (defaults to CACHE_MAX_ENTRIES)
+        """
+        self._store: LRUCache[CacheEntry] = LRUCache(max_entries or config.CACHE_MAX_ENTRIES)
+        # Snapshot left by a previous process (api.snapshot), restored key by key
+        self.snapshot: Any = None
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for a key, dropping it once it is past its stale deadline."""
+        entry = self._store.get(key)
+        if entry is None and self.snapshot is not None:
+            entry = self.snapshot.take(key)
+            if entry is not None:
+                self._store.set(key, entry)
+        if entry is not None and not entry.is_usable(time.time()):
+            self._store.pop(key)
+            return None
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        """Store an entry."""
+        self._store.set(key, entry)
+
+    async def delete(self, key: str) -> None:
+        """Remove an entry."""
+        self._store.pop(key)
+        if self.snapshot is not None:
+            self.snapshot.discard(key)
+
+    async def clear(self) -> None:
+        """Remove every entry."""
+        self._store.clear()
+        self.snapshot = None
+
+    def items(self) -> List[Tuple[str, CacheEntry]]:
+        """Every entry still usable, with its key."""
+        now = time.time()
+        return [(key, entry) for key, entry in self._store.items() if entry.is_usable(now)]
+
+
+def get_policy(namespace: str) -> CachePolicy:
+    """
+    Look up the cache policy configured for a namespace.
+
+    Args:
+        namespace: Cache namespace (e.g. "vlrapi-news")
+
+    Returns:
+        The namespace policy, or the default policy
+    """
+    fresh, stale = config.CACHE_POLICIES.get(namespace, config.CACHE_POLICIES["default"])
+    return CachePolicy(fresh, stale)
+
+
+class ResponseCache:
+    """
+    Stale-while-revalidate cache.
+
+    Fresh entries are returned directly. Stale entries are returned
+    immediately while a single background task refreshes them. Misses are
+    fetched in the foreground, with concurrent misses for one key coalesced.
+    """
+
+    def __init__(self, backend: Any = None, prefix: str = "vlrggapi"):
+        """
+        Args:
+            backend: Storage backend (in-memory if not provided)
+            prefix: Prefix added to every key
+        """
+        self.backend = backend if backend is not None else InMemoryCacheBackend()
+        self.prefix = prefix
+        self.flight = SingleFlight("cache")
+        self._refreshing: Set[str] = set()
+        self._tasks: Set["asyncio.Task[Any]"] = set()
+        self.counters: Dict[str, Dict[str, int]] = {}
+        # Called with (namespace, key) on every lookup, e.g. to track popular keys
+        self.on_access: Optional[Callable[[str, str], None]] = None
+
+    def make_key(self, namespace: str, key: str) -> str:
+        """Build the full storage key for a namespace-local key."""
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def _count(self, namespace: str, outcome: str) -> None:
+        """Increment the hit/stale/miss counter of a namespace."""
+        counters = self.counters.setdefault(namespace, {"hit": 0, "stale": 0, "miss": 0})
+        counters[outcome] += 1
+        CACHE_REQUESTS.labels(cache=self.prefix, namespace=namespace, outcome=outcome).inc()
+
+    async def _store(self, full_key: str, value: Any, policy: PolicyChoice) -> None:
+        """Store a value with deadlines computed from the policy (chosen by the value if callable)."""
+        if callable(policy):
+            policy = policy(value.data() if isinstance(value, EncodedBody) else value)
+        now = time.time()
+        entry = CacheEntry(value, now + policy.fresh, now + policy.fresh + policy.stale)
+        await self.backend.set(full_key, entry)
+
+    async def _fetch_and_store(
+        self, full_key: str, fetch: Callable[[], Awaitable[Any]], policy: PolicyChoice
+    ) -> Any:
+        """Fetch a fresh value and store it (fallbacks served while upstream is down are not stored)."""
+        value = await fetch()
+        stale = value.stale if isinstance(value, EncodedBody) else is_stale_fallback(value)
+        if not stale:
+            await self._store(full_key, value, policy)
+        return value
+
+    async def _refresh(self, full_key: str, fetch: Callable[[], Awaitable[Any]], policy: PolicyChoice) -> None:
+        """Background refresh of a stale entry; failures keep the stale value."""
+        mark_background()
+        try:
+            await self.flight.do(full_key, lambda: self._fetch_and_store(full_key, fetch, policy))
+        except Exception:
+            logger.exception("Background refresh of %s failed", full_key)
+        finally:
+            self._refreshing.discard(full_key)
+
+    def _schedule_refresh(self, full_key: str, fetch: Callable[[], Awaitable[Any]], policy: PolicyChoice) -> None:
+        """Start a background refresh unless one is already running for the key."""
+        if full_key in self._refreshing:
+            return
+        self._refreshing.add(full_key)
+        task = asyncio.ensure_future(self._refresh(full_key, fetch, policy))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _lookup(
+        self,
+        namespace: str,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        policy: Optional[PolicyChoice] = None,
+    ) -> Any:
+        """Return the stored value as is (see `get_or_fetch`)."""
+        policy = policy or get_policy(namespace)
+        full_key = self.make_key(namespace, key)
+        now = time.time()
+        if self.on_access is not None:
+            self.on_access(namespace, key)
+
+        with phase("cache"):
+            entry = await self.backend.get(full_key)
+        if entry is not None and entry.is_fresh(now):
+            self._count(namespace, "hit")
+            return entry.value
+        if entry is not None and entry.is_usable(now):
+            self._count(namespace, "stale")
+            self._schedule_refresh(full_key, fetch, policy)
+            return entry.value
+
+        self._count(namespace, "miss")
+        return await self.flight.do(full_key, lambda: self._fetch_and_store(full_key, fetch, policy))
+
+    async def get_or_fetch(
+        self,
+        namespace: str,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        policy: Optional[PolicyChoice] = None,
+    ) -> Any:
+        """
+        Return a cached value, serving stale data while refreshing it.
+
+        Bodies stored by `cached` routes are decoded, so callers sharing a
+        route's keys (e.g. batch queries) get the route result back.
+
+        Args:
+            namespace: Cache namespace, also used to pick the policy
+            key: Key inside the namespace
+            fetch: Zero-argument coroutine factory producing a fresh value
+            policy: Overrides the namespace policy; a function is called
+                with each fetched value to choose its policy
+
+        Returns:
+            The cached or freshly fetched value
+        """
+        value = await self._lookup(namespace, key, fetch, policy)
+        return value.data() if isinstance(value, EncodedBody) else value
+
+    def cached(
+        self,
+        namespace: str,
+        policy: Optional[PolicyChoice] = None,
+        bypass: Optional[Callable[[Request], bool]] = None,
+    ) -> Callable:
+        """
+        Decorator caching a route's encoded response body per request path and query.
+
+        The route result is JSON-encoded and compressed once per refresh and
+        the bytes are stored, so cache hits skip response model validation and
+        serialization, and a matching If-None-Match is answered with a 304.
+        The decorated endpoint must accept a `request` argument and return
+        JSON-compatible data. Stale entries are refreshed by calling it again
+        with the original request after the response was sent, so per-client
+        rate limits belong outside this decorator.
+
+        Args:
+            namespace: Cache namespace (e.g. "vlrapi-news")
+            policy: Overrides the namespace policy; a function is called
+                with each route result to choose its policy (e.g. by match state)
+            bypass: Requests for which it returns True skip the cache (e.g. streamed responses)
+        """
+        def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                request: Request = kwargs["request"]
+                if bypass is not None and bypass(request):
+                    return await func(*args, **kwargs)
+                key = request.url.path
+                if request.query_params:
+                    key += "?" + "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+
+                async def fetch() -> EncodedBody:
+                    value = await func(*args, **kwargs)
+                    with phase("serialize"):
+                        return await asyncio.to_thread(EncodedBody.encode, value)
+
+                body = await self._lookup(namespace, key, fetch, policy)
+                with phase("serialize"):
+                    if not isinstance(body, EncodedBody):
+                        # Stored by a plain `get_or_fetch` caller sharing the key
+                        body = EncodedBody.encode(body)
+                    return body.response(request)
+
+            return wrapper
+
+        return decorator
+
+    async def refresh(
+        self,
+        namespace: str,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        policy: Optional[PolicyChoice] = None,
+    ) -> None:
+        """
+        Fetch a route result now and store its encoded body, whatever the state of the entry.
+
+        Used to warm keys ahead of requests: the stored body is the one a
+        `cached` route would store, so the next request is a plain hit.
+        Concurrent lookups of a missing key share the fetch.
+
+        Args:
+            namespace: Cache namespace of the route
+            key: Route cache key (path and sorted query)
+            fetch: Zero-argument coroutine factory producing the route result
+            policy: Overrides the namespace policy
+        """
+        policy = policy or get_policy(namespace)
+        full_key = self.make_key(namespace, key)
+
+        async def fetch_body() -> EncodedBody:
+            return await asyncio.to_thread(EncodedBody.encode, await fetch())
+
+        await self.flight.do(full_key, lambda: self._fetch_and_store(full_key, fetch_body, policy))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Report hit/stale/miss counts per namespace."""
+        return {namespace: dict(counters) for namespace, counters in self.counters.items()}
+
+    async def aclose(self) -> None:
+        """Cancel outstanding background refreshes."""
+        for task in list(self._tasks):
+            task.cancel()
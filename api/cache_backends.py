@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+import zlib
+from typing import Any, Optional
+
+from api.cache import CacheEntry, InMemoryCacheBackend
+from api.encoding import EncodedBody
+from utils import config
+
+logger = logging.getLogger(__name__)
+
+# Memcached keys are limited to 250 bytes without spaces or control characters
+MAX_KEY_LENGTH = 250
+
+# Longest expiration memcached accepts in seconds (0 never expires)
+MAX_RELATIVE_EXPIRE = 30 * 24 * 3600
+
+# First byte of every stored value tells how the rest is encoded
+_RAW = b"j"
+_COMPRESSED = b"z"
+# Encoded route body: a JSON header line, then the body and its variants
+_BODY = b"b"
+
+
+def encode_entry(entry: CacheEntry, compress_min_bytes: int) -> bytes:
+    """
+    Serialize a cache entry to JSON, zlib-compressing large payloads.
+
+    Args:
+        entry: The entry to serialize
+        compress_min_bytes: Payloads at least this large are compressed
+
+    Returns:
+        The encoded bytes
+    """
+    if isinstance(entry.value, EncodedBody):
+        # Already JSON, and large bodies carry their own compressed variants
+        body = entry.value
+        parts = [body.body, body.gzip or b"", body.br or b""]
+        header = json.dumps(
+            {"d": body.digest, "n": [len(part) for part in parts], "f": entry.fresh_until, "s": entry.stale_until},
+            separators=(",", ":"),
+        ).encode("utf-8")
+        return b"".join([_BODY, header, b"\n", *parts])
+    payload = json.dumps(
+        {"v": entry.value, "f": entry.fresh_until, "s": entry.stale_until},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    if len(payload) >= compress_min_bytes:
+        return _COMPRESSED + zlib.compress(payload)
+    return _RAW + payload
+
+
+def decode_entry(data: bytes) -> CacheEntry:
+    """
+    Deserialize bytes produced by `encode_entry`.
+
+    Args:
+        data: The stored bytes
+
+    Returns:
+        The cache entry
+    """
+    marker, payload = data[:1], data[1:]
+    if marker == _BODY:
+        header, _, payload = payload.partition(b"\n")
+        meta = json.loads(header)
+        parts = []
+        for length in meta["n"]:
+            parts.append(payload[:length] or None)
+            payload = payload[length:]
+        return CacheEntry(EncodedBody(parts[0] or b"", meta["d"], parts[1], parts[2]), meta["f"], meta["s"])
+    if marker == _COMPRESSED:
+        payload = zlib.decompress(payload)
+    raw = json.loads(payload)
+    return CacheEntry(raw["v"], raw["f"], raw["s"])
+
+
+def memcached_key(key: str) -> str:
+    """
+    Make a cache key safe for memcached.
+
+    Keys keep their readable `prefix:namespace:` part; the remainder is
+    hashed when it is too long or contains characters memcached rejects.
+
+    Args:
+        key: Full cache key (e.g. "vlrggapi:vlrapi-news:/news")
+
+    Returns:
+        A valid memcached key
+    """
+    if len(key) <= MAX_KEY_LENGTH and key.isascii() and not any(c.isspace() or ord(c) < 33 for c in key):
+        return key
+    head, _, tail = key.rpartition(":")
+    digest = hashlib.sha1(tail.encode("utf-8")).hexdigest()
+    return f"{head[:MAX_KEY_LENGTH - 42]}:{digest}"
+
+
+class MemcachedCacheBackend:
+    """
+    Cache storage shared by every worker through memcached.
+
+    pymemcache is blocking, so calls run in the default thread pool.
+    """
+
+    def __init__(self, client: Any = None, compress_min_bytes: Optional[int] = None):
+        """
+        Args:
+            client: A pymemcache client (a pooled client for MEMCACHED_SERVER if not provided)
+            compress_min_bytes: Payloads at least this large are compressed
+        """
+        if client is None:
+            from pymemcache.client.base import PooledClient
+
+            client = PooledClient(
+                config.MEMCACHED_SERVER,
+                connect_timeout=config.MEMCACHED_TIMEOUT,
+                timeout=config.MEMCACHED_TIMEOUT,
+                no_delay=True,
+                max_pool_size=config.MEMCACHED_POOL_SIZE,
+            )
+        self.client = client
+        self.compress_min_bytes = (
+            config.CACHE_COMPRESS_MIN_BYTES if compress_min_bytes is None else compress_min_bytes
+        )
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for a key, if memcached still has it."""
+        data = await asyncio.to_thread(self.client.get, memcached_key(key))
+        if data is None:
+            return None
+        return decode_entry(data)
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        """Store an entry; memcached expires it at its stale deadline."""
+        if math.isinf(entry.stale_until):
+            expire = 0
+        else:
+            expire = max(1, math.ceil(entry.stale_until - time.time()))
+            if expire > MAX_RELATIVE_EXPIRE:
+                # Memcached reads longer expirations as a Unix timestamp
+                expire = math.ceil(entry.stale_until)
+        data = encode_entry(entry, self.compress_min_bytes)
+        await asyncio.to_thread(self.client.set, memcached_key(key), data, expire, False)
+
+    async def delete(self, key: str) -> None:
+        """Remove an entry."""
+        await asyncio.to_thread(self.client.delete, memcached_key(key), False)
+
+    async def clear(self) -> None:
+        """Remove every entry (flushes the whole memcached server)."""
+        await asyncio.to_thread(self.client.flush_all, 0, False)
+
+
+class FailoverCacheBackend:
+    """
+    Use a primary backend, falling back to in-process memory while it is down.
+
+    After a failure the primary is skipped for `retry_after` seconds, so an
+    unreachable memcached does not add a connect timeout to every request.
+    """
+
+    def __init__(self, primary: Any, fallback: Any = None, retry_after: Optional[float] = None):
+        """
+        Args:
+            primary: Preferred backend (e.g. memcached)
+            fallback: Backend used while the primary is unavailable
+            retry_after: Seconds to wait before trying the primary again
+        """
+        self.primary = primary
+        self.fallback = fallback if fallback is not None else InMemoryCacheBackend()
+        self.retry_after = config.CACHE_FAILOVER_RETRY if retry_after is None else retry_after
+        self._down_until = 0.0
+
+    @property
+    def primary_available(self) -> bool:
+        """Whether the primary backend is currently used."""
+        return time.time() >= self._down_until
+
+    def _mark_down(self, error: Exception) -> None:
+        """Switch to the fallback backend for a while."""
+        logger.warning("Cache backend unavailable, using in-process memory: %s", error)
+        self._down_until = time.time() + self.retry_after
+
+    async def _call(self, method: str, *args: Any) -> Any:
+        """Call a backend method on the primary, or on the fallback if it fails."""
+        if self.primary_available:
+            try:
+                return await getattr(self.primary, method)(*args)
+            except Exception as error:
+                self._mark_down(error)
+        return await getattr(self.fallback, method)(*args)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for a key."""
+        return await self._call("get", key)
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        """Store an entry."""
+        await self._call("set", key, entry)
+
+    async def delete(self, key: str) -> None:
+        """Remove an entry."""
+        await self._call("delete", key)
+
+    async def clear(self) -> None:
+        """Remove every entry."""
+        await self._call("clear")
+
+
+def create_backend(name: Optional[str] = None) -> Any:
+    """
+    Build the cache backend selected by configuration.
+
+    Args:
+        name: "memory" or "memcached" (defaults to CACHE_BACKEND)
+
+    Returns:
+        A cache backend instance
+    """
+    name = (name or config.CACHE_BACKEND).lower()
+    if name == "memory":
+        return InMemoryCacheBackend()
+    if name == "memcached":
+        return FailoverCacheBackend(MemcachedCacheBackend())
+    raise ValueError(f"Unknown cache backend: {name}")
@@ -0,0 +1,180 @@
+import gzip
+import json
+from typing import Any, Dict, NamedTuple, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from api.breaker import is_stale_fallback
+from api.upstream import content_digest
+from utils import config
+
+try:
+    import orjson
+except ImportError:  # Optional: the stdlib encoder is used instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Optional: only gzip variants are built
+    brotli = None
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Encode a value to compact UTF-8 JSON, with orjson when installed.
+
+    Args:
+        value: JSON-compatible value
+
+    Returns:
+        The encoded bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """Decode bytes produced by `dumps`."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def accepted_encodings(header: Optional[str]) -> Dict[str, float]:
+    """
+    Parse an Accept-Encoding header.
+
+    Args:
+        header: Header value, e.g. "gzip, br;q=0.9, *;q=0"
+
+    Returns:
+        Lower-cased coding to quality
+    """
+    accepted = {}
+    for item in (header or "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def etag_matches(header: Optional[str], digest: str) -> bool:
+    """
+    Check an If-None-Match header against a body digest.
+
+    Uses the weak comparison If-None-Match calls for, so a tag sent for any
+    encoding of the body (see `EncodedBody.etag`) matches.
+
+    Args:
+        header: Header value, e.g. '"abc", W/"def"' or "*"
+        digest: Digest of the identity body
+
+    Returns:
+        True if the client already has the body
+    """
+    if not header:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"').split("-", 1)[0] == digest:
+            return True
+    return False
+
+
+class EncodedBody(NamedTuple):
+    """
+    A JSON response body encoded once, with its compressed variants.
+
+    Variants are only built for bodies of at least RESPONSE_COMPRESS_MIN_BYTES.
+    """
+    body: bytes
+    digest: str
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+    # Set when the body is a last-known-good fallback, which is never cached
+    stale: bool = False
+
+    @classmethod
+    def encode(cls, value: Any) -> "EncodedBody":
+        """
+        Encode a route result and build its compressed variants.
+
+        Args:
+            value: JSON-compatible route result
+
+        Returns:
+            The encoded body
+        """
+        body = dumps(value)
+        gzipped = compressed = None
+        if len(body) >= config.RESPONSE_COMPRESS_MIN_BYTES:
+            gzipped = gzip.compress(body, compresslevel=config.RESPONSE_GZIP_LEVEL, mtime=0)
+            if brotli is not None:
+                compressed = brotli.compress(body, quality=config.RESPONSE_BROTLI_QUALITY)
+        return cls(body, content_digest(body), gzipped, compressed, is_stale_fallback(value))
+
+    def data(self) -> Any:
+        """Decode the body back to the route result."""
+        return loads(self.body)
+
+    def etag(self, encoding: Optional[str] = None) -> str:
+        """Strong ETag of the identity body or of one of its encodings."""
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """
+        Pick the stored encoding a client prefers.
+
+        Args:
+            accept_encoding: Accept-Encoding header value
+
+        Returns:
+            "br", "gzip", or None for the identity body
+        """
+        accepted = accepted_encodings(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        best, best_quality = None, 0.0
+        for encoding in ("br", "gzip"):
+            quality = accepted.get(encoding, wildcard)
+            if getattr(self, encoding) is not None and quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def response(self, request: Request) -> Response:
+        """
+        Answer a request with this body.
+
+        Clients whose If-None-Match matches get an empty 304; others get the
+        variant matching their Accept-Encoding.
+
+        Args:
+            request: The incoming request
+
+        Returns:
+            The response, ready to send
+        """
+        encoding = self.negotiate(request.headers.get("accept-encoding"))
+        headers = {"ETag": self.etag(encoding), "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), self.digest):
+            return Response(status_code=304, headers=headers)
+        if encoding is None:
+            return Response(self.body, media_type=JSON_MEDIA_TYPE, headers=headers)
+        headers["Content-Encoding"] = encoding
+        return Response(getattr(self, encoding), media_type=JSON_MEDIA_TYPE, headers=headers)
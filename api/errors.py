@@ -0,0 +1,87 @@
+from typing import Optional
+
+
+class UpstreamError(Exception):
+    """
+    Base class for failures talking to vlr.gg.
+
+    `retryable` tells the outbound governor whether trying again may succeed.
+    """
+
+    retryable = False
+    # Status code our API answers with when this error reaches a route
+    response_status = 502
+
+    def __init__(
+        self,
+        message: str,
+        status: Optional[int] = None,
+        url: Optional[str] = None,
+        retry_after: Optional[float] = None,
+    ):
+        """
+        Args:
+            message: Human readable description
+            status: Upstream HTTP status code, if a response was received
+            url: Requested URL
+            retry_after: Seconds upstream asked us to wait, if any
+        """
+        super().__init__(message)
+        self.status = status
+        self.url = url
+        self.retry_after = retry_after
+
+
+class UpstreamTimeout(UpstreamError):
+    """vlr.gg did not answer in time."""
+    retryable = True
+    response_status = 504
+
+
+class UpstreamUnavailable(UpstreamError):
+    """vlr.gg could not be reached or answered with a 5xx."""
+    retryable = True
+
+
+class RateLimited(UpstreamError):
+    """vlr.gg answered 429, or we are backing off after one."""
+    retryable = True
+    response_status = 503
+
+
+class CircuitOpen(UpstreamError):
+    """Recent requests to this route kept failing, so vlr.gg is not being asked."""
+    response_status = 503
+
+
+class NotFound(UpstreamError):
+    """The requested page does not exist on vlr.gg."""
+    response_status = 404
+
+
+class UpstreamClientError(UpstreamError):
+    """Any other non-200 answer; retrying will not help."""
+
+
+def error_for_status(status: int, url: Optional[str] = None, retry_after: Optional[float] = None) -> Optional[UpstreamError]:
+    """
+    Map an upstream status code to the matching error.
+
+    Args:
+        status: Upstream HTTP status code
+        url: Requested URL
+        retry_after: Parsed Retry-After header, if any
+
+    Returns:
+        The error to raise, or None for a 200
+    """
+    if status == 200:
+        return None
+    message = f"API response: {status}"
+    if status == 429:
+        return RateLimited(message, status, url, retry_after)
+    if status == 404:
+        return NotFound(message, status, url)
+    if status >= 500:
+        return UpstreamUnavailable(message, status, url, retry_after)
+    return UpstreamClientError(message, status, url)
@@ -0,0 +1,141 @@
+from typing import Any, Callable, Dict, List, Optional
+
+from selectolax.parser import HTMLParser, Node
+
+
+class Field:
+    """
+    One value read from every item of a listing.
+
+    The value is the text of the first node matching `selector` inside the
+    item (or every matching node when `many` is set). With `attr` the named
+    attribute is read instead of the text, and with `raw` the node itself is
+    returned for custom handling. Without a selector the item node is used.
+    """
+
+    def __init__(
+        self,
+        selector: Optional[str] = None,
+        attr: Optional[str] = None,
+        many: bool = False,
+        raw: bool = False,
+        transform: Optional[Callable[[Any], Any]] = None,
+        default: Any = None,
+    ):
+        """
+        Args:
+            selector: CSS selector relative to the item (may start with ">")
+            attr: Attribute to read instead of the text
+            many: Collect every match as a list
+            raw: Return the matched node(s) instead of text
+            transform: Applied to each value that was found
+            default: Value used when nothing matches (for single fields)
+        """
+        self.selector = selector
+        self.attr = attr
+        self.many = many
+        self.raw = raw
+        self.transform = transform
+        self.default = default
+
+    def read(self, node: Node) -> Any:
+        """Read this field's value from a matched node."""
+        if self.raw:
+            value = node
+        elif self.attr is not None:
+            value = node.attributes.get(self.attr)
+        else:
+            value = node.text()
+        return self.transform(value) if self.transform is not None else value
+
+
+class Schema:
+    """
+    Declarative description of the items of a page and their fields.
+
+    Instead of running one `css_first` per field per item, every field
+    selector is compiled once into a document-level query. Each query walks
+    the tree a single time for all items, and matches are assigned to their
+    owning item by climbing to the nearest item ancestor.
+    """
+
+    def __init__(self, item: str, fields: Dict[str, Field]):
+        """
+        Args:
+            item: CSS selector matching every item
+            fields: Field name to field definition
+        """
+        self.item = item
+        self.fields = fields
+        # Compiled document-level queries, one per field with a selector
+        self._queries = [
+            (name, field, f"{item} {field.selector}")
+            for name, field in fields.items()
+            if field.selector is not None
+        ]
+
+    def extract(self, html: HTMLParser, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Extract every item of a page.
+
+        Args:
+            html: Parsed page
+            limit: Only return the first `limit` items
+
+        Returns:
+            One dictionary of field values per item, in document order
+        """
+        items = html.css(self.item)
+        if limit is not None:
+            items = items[:limit]
+        if not items:
+            return []
+
+        if limit is not None:
+            # A handful of items on a large page: scoped queries are cheaper
+            # than walking the whole document once per field
+            matches = [self._match_within(item) for item in items]
+        else:
+            matches = self._match_document(html, items)
+
+        records = []
+        for item, found in zip(items, matches):
+            record = {}
+            for name, field in self.fields.items():
+                if field.selector is None:
+                    record[name] = field.read(item)
+                elif field.many:
+                    record[name] = [field.read(node) for node in found.get(name, [])]
+                elif name in found:
+                    record[name] = field.read(found[name][0])
+                else:
+                    record[name] = field.default
+            records.append(record)
+        return records
+
+    def _match_within(self, item: Node) -> Dict[str, List[Node]]:
+        """Match every field by querying inside a single item."""
+        found = {}
+        for name, field, _ in self._queries:
+            nodes = item.css(field.selector)
+            if nodes:
+                found[name] = nodes if field.many else nodes[:1]
+        return found
+
+    def _match_document(self, html: HTMLParser, items: List[Node]) -> List[Dict[str, List[Node]]]:
+        """Match every field with one document-level query per field."""
+        index = {item.mem_id: position for position, item in enumerate(items)}
+        matches: List[Dict[str, List[Node]]] = [{} for _ in items]
+
+        for name, field, query in self._queries:
+            for node in html.css(query):
+                owner = node.parent
+                while owner is not None and owner.mem_id not in index:
+                    owner = owner.parent
+                if owner is None:
+                    continue
+                found = matches[index[owner.mem_id]].setdefault(name, [])
+                if field.many or not found:
+                    found.append(node)
+
+        return matches
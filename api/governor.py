@@ -0,0 +1,275 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from api.errors import RateLimited, UpstreamTimeout, UpstreamUnavailable, error_for_status
+from utils import config
+
+# Lower values are served first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Priority of the upstream requests made from the current task. Tasks copy the
+# context they are created from, so fetches started by a background job (and
+# the single-flight tasks it spawns) inherit its priority.
+fetch_priority: ContextVar[int] = ContextVar("fetch_priority", default=INTERACTIVE)
+
+
+def mark_background() -> None:
+    """Run the upstream requests of the current task at background priority."""
+    fetch_priority.set(BACKGROUND)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header.
+
+    Args:
+        value: Header value, either seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if absent or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` tokens per second."""
+
+    def __init__(self, rate: float, burst: int):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens earned since the last update."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> bool:
+        """Consume a token if one is available."""
+        if self.delay(now) > 0:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class _Host:
+    """Governor state of one upstream host."""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        # Heap of (priority, sequence, future) waiting for a token
+        self.waiters: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        # Monotonic time before which nothing is sent (Retry-After / 429 backoff)
+        self.blocked_until = 0.0
+        self.dispatcher: Optional["asyncio.Task[None]"] = None
+
+
+class OutboundGovernor:
+    """
+    Schedules every request sent to vlr.gg.
+
+    Each host has a token bucket. Requests that cannot get a token right away
+    queue by priority, so interactive cache misses overtake background
+    refreshes. A 429 blocks the host for its Retry-After (or a backoff delay),
+    and 429/5xx answers, timeouts and connection errors are retried with
+    jittered exponential backoff. Non-retryable answers are returned as is.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        max_wait: Optional[float] = None,
+    ):
+        """
+        Args:
+            rate: Requests per second per host
+            burst: Requests that may be sent at once after a quiet period
+            retries: Retries of a retryable failure
+            backoff_base: First backoff delay in seconds (doubled per attempt)
+            backoff_max: Upper bound of a backoff delay
+            max_wait: Fail fast instead of waiting longer than this for a blocked host
+        """
+        self.rate = rate or config.UPSTREAM_RATE
+        self.burst = burst or config.UPSTREAM_BURST
+        self.retries = config.UPSTREAM_RETRIES if retries is None else retries
+        self.backoff_base = config.UPSTREAM_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = config.UPSTREAM_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.max_wait = config.UPSTREAM_MAX_WAIT if max_wait is None else max_wait
+        self._hosts: Dict[str, _Host] = {}
+        self._sequence = itertools.count()
+        self.requests = 0
+        self.retried = 0
+        self.throttled = 0
+        self.failed_fast = 0
+        self.wait_seconds = 0.0
+
+    def _host(self, host: str) -> _Host:
+        """Get or create the state of a host."""
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _Host(TokenBucket(self.rate, self.burst))
+        return state
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a 0-based attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def acquire(self, host: str, priority: int = INTERACTIVE) -> None:
+        """
+        Wait for permission to send one request to a host.
+
+        Args:
+            host: Upstream host name
+            priority: INTERACTIVE or BACKGROUND
+
+        Raises:
+            RateLimited: If the host is blocked for longer than `max_wait`
+        """
+        state = self._host(host)
+        now = time.monotonic()
+        blocked_for = state.blocked_until - now
+        if blocked_for > self.max_wait:
+            self.failed_fast += 1
+            raise RateLimited(f"Backing off from {host}", retry_after=blocked_for)
+        if not state.waiters and blocked_for <= 0 and state.bucket.take(now):
+            return
+
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[None]" = loop.create_future()
+        heapq.heappush(state.waiters, (priority, next(self._sequence), future))
+        if state.dispatcher is None or state.dispatcher.done() or state.dispatcher.get_loop() is not loop:
+            state.dispatcher = asyncio.ensure_future(self._dispatch(state))
+        started = time.monotonic()
+        try:
+            await future
+        finally:
+            self.wait_seconds += time.monotonic() - started
+
+    async def _dispatch(self, state: _Host) -> None:
+        """Hand out tokens to the waiters of a host in priority order."""
+        while state.waiters:
+            now = time.monotonic()
+            delay = max(state.blocked_until - now, state.bucket.delay(now))
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, _, future = heapq.heappop(state.waiters)
+            if future.done():
+                # The waiting request was cancelled
+                continue
+            state.bucket.take(now)
+            future.set_result(None)
+
+    def block(self, host: str, seconds: float) -> None:
+        """Stop sending to a host for `seconds` (never shortens an existing block)."""
+        state = self._host(host)
+        state.blocked_until = max(state.blocked_until, time.monotonic() + seconds)
+
+    async def send(self, host: str, request: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """
+        Send a request through the governor, retrying retryable failures.
+
+        Args:
+            host: Upstream host name
+            request: Zero-argument coroutine factory sending the request
+
+        Returns:
+            The response (possibly a non-200 one once retries are exhausted
+            or when retrying cannot help)
+
+        Raises:
+            UpstreamError: On timeouts, connection failures or a blocked host
+        """
+        priority = fetch_priority.get()
+        attempt = 0
+        while True:
+            await self.acquire(host, priority)
+            self.requests += 1
+            response: Optional[httpx.Response] = None
+            try:
+                response = await request()
+                error = error_for_status(
+                    response.status_code, str(response.url), parse_retry_after(response.headers.get("Retry-After"))
+                )
+            except httpx.TimeoutException as e:
+                error = UpstreamTimeout(f"Timed out: {e}")
+            except httpx.TransportError as e:
+                error = UpstreamUnavailable(f"Connection failed: {e}")
+
+            if error is None or not error.retryable:
+                return response
+
+            delay = error.retry_after if error.retry_after is not None else self.backoff(attempt)
+            if isinstance(error, RateLimited):
+                # Everyone backs off from a host that throttles us
+                self.throttled += 1
+                self.block(host, delay)
+
+            if attempt >= self.retries or delay > self.max_wait:
+                if response is not None:
+                    return response
+                raise error
+            attempt += 1
+            self.retried += 1
+            if not isinstance(error, RateLimited):
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report governor activity.
+
+        Returns:
+            Dictionary with request, retry and throttle counts, time spent
+            waiting for tokens and per-host queue state
+        """
+        now = time.monotonic()
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "throttled": self.throttled,
+            "failed_fast": self.failed_fast,
+            "wait_seconds": round(self.wait_seconds, 6),
+            "hosts": {
+                host: {
+                    "tokens": round(state.bucket.tokens, 3),
+                    "waiting": len(state.waiters),
+                    "blocked_for": round(max(0.0, state.blocked_until - now), 3),
+                }
+                for host, state in self._hosts.items()
+            },
+        }
@@ -0,0 +1,404 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from api.errors import NotFound, UpstreamClientError, UpstreamError, error_for_status
+from api.governor import mark_background
+from api.upstream import UpstreamClient, content_digest
+from utils import config
+from utils.constants import BASE_URL
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Response fields holding image links
+IMAGE_FIELDS = ("tournament_icon", "logo", "last_played_team_logo")
+
+
+def proxy_image_url(src: Optional[str]) -> str:
+    """
+    Turn an image `src` from a vlr.gg page into a link to the image proxy.
+
+    Absolute, protocol-relative (//...) and site-relative (/...) sources are
+    accepted. Images on hosts outside IMAGE_HOSTS are linked directly.
+
+    Args:
+        src: The image `src` attribute value
+
+    Returns:
+        e.g. "/img/owcdn.net/img/61491.png", or "" without a source
+    """
+    if not src:
+        return ""
+    src = src.strip()
+    if src.startswith("//"):
+        url = f"https:{src}"
+    elif src.startswith("/"):
+        url = f"{BASE_URL}{src}"
+    elif src.startswith("http://") or src.startswith("https://"):
+        url = src
+    else:
+        url = f"{BASE_URL}/{src}"
+    parsed = urlparse(url)
+    if parsed.hostname not in config.IMAGE_HOSTS:
+        return url
+    return f"{config.IMAGE_URL_PREFIX}/img/{parsed.hostname}{parsed.path}"
+
+
+def image_source(path: str) -> str:
+    """
+    Map a proxy path back to the upstream image URL.
+
+    Args:
+        path: Path after "/img/", e.g. "owcdn.net/img/61491.png"
+
+    Returns:
+        The upstream URL
+
+    Raises:
+        ValueError: If the host is not allowed or the path is empty
+    """
+    host, _, rest = path.partition("/")
+    if host not in config.IMAGE_HOSTS or not rest or ".." in rest.split("/"):
+        raise ValueError(f"Not a proxied image: {path}")
+    return f"https://{host}/{rest}"
+
+
+def image_paths(value: Any) -> Iterator[str]:
+    """
+    Find the proxy paths linked from a facade result.
+
+    Args:
+        value: Result to walk (nested dicts and lists)
+
+    Yields:
+        Paths after "/img/" of every proxied image field
+    """
+    prefix = f"{config.IMAGE_URL_PREFIX}/img/"
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in IMAGE_FIELDS and isinstance(item, str) and item.startswith(prefix):
+                yield item[len(prefix):]
+            elif isinstance(item, (dict, list)):
+                yield from image_paths(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from image_paths(item)
+
+
+class ImageMeta(NamedTuple):
+    """What is stored on disk next to an image."""
+    url: str
+    content_type: str
+    digest: str
+    size: int
+    etag: Optional[str]
+    last_modified: Optional[str]
+    # Epoch time of the last download or successful revalidation
+    validated_at: float
+
+
+class DiskImageCache:
+    """
+    Bounded on-disk image store, evicting the least recently used image.
+
+    Each image is a `<key>.bin` file with a `<key>.json` metadata file. The
+    recency order is kept in memory and rebuilt from file times when the
+    directory is first used. If the directory cannot be created or written
+    (e.g. a read-only filesystem), the store disables itself and stores
+    nothing, so images are passed through. Methods block, so call them from
+    a thread.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            directory: Storage directory (created on first use)
+            max_bytes: Total image bytes kept
+        """
+        self.directory = directory or config.IMAGE_CACHE_DIR
+        self.max_bytes = config.IMAGE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._index: Optional["OrderedDict[str, ImageMeta]"] = None
+        self._lock = threading.Lock()
+        self.size = 0
+        self.evicted = 0
+        self.disabled = False
+
+    def _disable(self, error: OSError) -> None:
+        """Stop using the directory after a filesystem error, logging it once."""
+        if not self.disabled:
+            logger.warning("Image cache %s disabled, serving images without storing them: %s", self.directory, error)
+        self.disabled = True
+        self._index = OrderedDict()
+        self.size = 0
+
+    def _path(self, key: str, suffix: str) -> str:
+        """Path of one of an image's files."""
+        return os.path.join(self.directory, key + suffix)
+
+    def _open(self) -> "OrderedDict[str, ImageMeta]":
+        """Load the index from disk on first use, oldest used first."""
+        if self._index is not None:
+            return self._index
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            names = os.listdir(self.directory)
+        except OSError as e:
+            self._disable(e)
+            return self._index
+        found: List[Tuple[float, str, ImageMeta]] = []
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            key = name[:-len(".json")]
+            try:
+                with open(self._path(key, ".json"), encoding="utf-8") as f:
+                    meta = ImageMeta(**json.load(f))
+                used = os.path.getmtime(self._path(key, ".bin"))
+            except (OSError, ValueError, TypeError):
+                continue
+            found.append((used, key, meta))
+        self._index = OrderedDict((key, meta) for _, key, meta in sorted(found))
+        self.size = sum(meta.size for meta in self._index.values())
+        return self._index
+
+    def get(self, url: str) -> Optional[Tuple[ImageMeta, bytes]]:
+        """Return a stored image and mark it as recently used."""
+        key = content_digest(url.encode("utf-8"))
+        with self._lock:
+            index = self._open()
+            meta = index.get(key)
+            if meta is None:
+                return None
+            index.move_to_end(key)
+        try:
+            with open(self._path(key, ".bin"), "rb") as f:
+                content = f.read()
+            os.utime(self._path(key, ".bin"))
+        except OSError:
+            self.delete(url)
+            return None
+        return meta, content
+
+    def peek(self, url: str) -> Optional[ImageMeta]:
+        """Return the metadata of a stored image without reading it."""
+        with self._lock:
+            return self._open().get(content_digest(url.encode("utf-8")))
+
+    def put(self, meta: ImageMeta, content: Optional[bytes] = None) -> None:
+        """
+        Store an image, evicting old ones beyond `max_bytes`.
+
+        Args:
+            meta: Image metadata
+            content: Image bytes (None to only update the metadata)
+        """
+        key = content_digest(meta.url.encode("utf-8"))
+        with self._lock:
+            index = self._open()
+            if self.disabled:
+                return
+            try:
+                if content is not None:
+                    self._write(key, ".bin", content)
+                self._write(key, ".json", json.dumps(meta._asdict()).encode("utf-8"))
+            except OSError as e:
+                self._disable(e)
+                return
+            previous = index.pop(key, None)
+            self.size += meta.size - (previous.size if previous is not None else 0)
+            index[key] = meta
+            while self.size > self.max_bytes and len(index) > 1:
+                old_key, old = index.popitem(last=False)
+                self._remove(old_key)
+                self.size -= old.size
+                self.evicted += 1
+
+    def delete(self, url: str) -> None:
+        """Remove a stored image."""
+        key = content_digest(url.encode("utf-8"))
+        with self._lock:
+            meta = self._open().pop(key, None)
+            if meta is not None:
+                self.size -= meta.size
+            self._remove(key)
+
+    def _write(self, key: str, suffix: str, data: bytes) -> None:
+        """Write a file atomically."""
+        path = self._path(key, suffix)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    def _remove(self, key: str) -> None:
+        """Delete an image's files."""
+        for suffix in (".bin", ".json"):
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Report stored images and bytes."""
+        return {
+            "images": len(self._index) if self._index is not None else None,
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "evicted": self.evicted,
+            "disabled": self.disabled,
+        }
+
+
+class ImageProxy:
+    """
+    Serves vlr.gg images from the disk cache, fetching them through the upstream client.
+
+    Images older than `revalidate_after` are revalidated with a conditional
+    request; while upstream fails the stored copy keeps being served.
+    """
+
+    def __init__(
+        self,
+        upstream: UpstreamClient,
+        cache: Optional[DiskImageCache] = None,
+        revalidate_after: Optional[float] = None,
+        prefetch_concurrency: Optional[int] = None,
+    ):
+        """
+        Args:
+            upstream: Upstream client (requests go through its governor)
+            cache: Disk store (the configured one if not provided)
+            revalidate_after: Seconds before a stored image is revalidated
+            prefetch_concurrency: Images prefetched at the same time
+        """
+        self.upstream = upstream
+        self.cache = cache if cache is not None else DiskImageCache()
+        self.revalidate_after = config.IMAGE_REVALIDATE_AFTER if revalidate_after is None else revalidate_after
+        self.prefetch_concurrency = prefetch_concurrency or config.IMAGE_PREFETCH_CONCURRENCY
+        self.flight = SingleFlight("images")
+        self._tasks: Set["asyncio.Task[Any]"] = set()
+        self.hits = 0
+        self.downloads = 0
+        self.revalidated = 0
+        self.served_stale = 0
+        self.prefetched = 0
+
+    async def get(self, path: str) -> Tuple[ImageMeta, bytes]:
+        """
+        Get an image by proxy path.
+
+        Args:
+            path: Path after "/img/", e.g. "owcdn.net/img/61491.png"
+
+        Returns:
+            The image metadata and bytes
+
+        Raises:
+            ValueError: If the path is not a proxied image
+            UpstreamError: If the image cannot be fetched and is not stored
+        """
+        url = image_source(path)
+        return await self.flight.do(url, lambda: self._get(url))
+
+    async def _get(self, url: str) -> Tuple[ImageMeta, bytes]:
+        """Serve a stored image, revalidating or downloading it when needed."""
+        stored = await asyncio.to_thread(self.cache.get, url)
+        if stored is not None and time.time() - stored[0].validated_at < self.revalidate_after:
+            self.hits += 1
+            return stored
+
+        headers = {"Accept": "image/*"}
+        if stored is not None:
+            if stored[0].etag:
+                headers["If-None-Match"] = stored[0].etag
+            if stored[0].last_modified:
+                headers["If-Modified-Since"] = stored[0].last_modified
+        try:
+            resp = await self.upstream.get(url, endpoint="images", headers=headers)
+            if resp.status_code == 304 and stored is not None:
+                meta = stored[0]._replace(validated_at=time.time())
+                await asyncio.to_thread(self.cache.put, meta)
+                self.revalidated += 1
+                return meta, stored[1]
+            error = error_for_status(resp.status_code, url)
+            if error is None and resp.status_code != 200:
+                error = UpstreamClientError(f"Unexpected status {resp.status_code}", status=resp.status_code, url=url)
+            if error is not None:
+                raise error
+        except UpstreamError:
+            if stored is None:
+                raise
+            self.served_stale += 1
+            return stored
+
+        content_type = resp.headers.get("Content-Type", "")
+        if not content_type.startswith("image/"):
+            raise NotFound(f"Not an image: {url}", status=resp.status_code, url=url)
+        content = resp.content
+        meta = ImageMeta(
+            url=url,
+            content_type=content_type,
+            digest=content_digest(content),
+            size=len(content),
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+            validated_at=time.time(),
+        )
+        await asyncio.to_thread(self.cache.put, meta, content)
+        self.downloads += 1
+        return meta, content
+
+    def prefetch(self, paths: Iterable[str]) -> None:
+        """
+        Fetch images in the background at background priority.
+
+        Args:
+            paths: Proxy paths (duplicates are fetched once)
+        """
+        paths = list(dict.fromkeys(paths))
+        if not paths:
+            return
+        task = asyncio.ensure_future(self._prefetch(paths))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _prefetch(self, paths: List[str]) -> None:
+        """Fetch images with bounded concurrency, logging failures."""
+        mark_background()
+        semaphore = asyncio.Semaphore(self.prefetch_concurrency)
+
+        async def fetch(path: str) -> None:
+            async with semaphore:
+                try:
+                    meta = await asyncio.to_thread(self.cache.peek, image_source(path))
+                    if meta is not None and time.time() - meta.validated_at < self.revalidate_after:
+                        return
+                    await self.get(path)
+                    self.prefetched += 1
+                except (UpstreamError, ValueError, OSError) as e:
+                    logger.debug("Prefetch of image %s failed: %s", path, e)
+
+        await asyncio.gather(*(fetch(path) for path in paths))
+
+    def stats(self) -> Dict[str, Any]:
+        """Report cache hits, downloads, revalidations and disk usage."""
+        return {
+            "hits": self.hits,
+            "downloads": self.downloads,
+            "revalidated": self.revalidated,
+            "served_stale": self.served_stale,
+            "prefetched": self.prefetched,
+            "prefetching": len(self._tasks),
+            "disk": self.cache.stats(),
+        }
+
+    async def aclose(self) -> None:
+        """Cancel outstanding prefetches."""
+        for task in list(self._tasks):
+            task.cancel()
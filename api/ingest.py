@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from selectolax.parser import HTMLParser
+
+from api.governor import mark_background
+from api.pagination import Paginator
+from api.scrape import MatchScraper, RankingScraper, Vlr
+from api.store import MatchStore
+from api.upstream import UpstreamClient
+from utils import config
+from utils.constants import MATCHES_URL, RANKINGS_URL, RESULTS_URL, region_map
+
+logger = logging.getLogger(__name__)
+
+
+def parse_date_label(text: str) -> Optional[str]:
+    """
+    Parse a vlr.gg day label such as "Fri, May 9, 2025".
+
+    Args:
+        text: Label text (a trailing "Today"/"Yesterday" tag is ignored)
+
+    Returns:
+        The date as YYYY-MM-DD, or None if it cannot be parsed
+    """
+    text = text.strip().split("\n")[0].strip()
+    for date_format in ("%a, %B %d, %Y", "%a, %b %d, %Y"):
+        try:
+            return datetime.strptime(text, date_format).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def extract_match_dates(html: HTMLParser) -> Dict[str, Optional[str]]:
+    """
+    Map every match page of a listing to the day label above its card.
+
+    Args:
+        html: Parsed matches or results page
+
+    Returns:
+        Match page path to YYYY-MM-DD date
+    """
+    dates = {}
+    for label in html.css("div.wf-label.mod-large"):
+        date = parse_date_label(label.text())
+        card = label.next
+        while card is not None and card.tag != "div":
+            card = card.next
+        if card is None or "wf-card" not in (card.attributes.get("class") or ""):
+            continue
+        for item in card.css("a.wf-module-item"):
+            dates[item.attributes.get("href")] = date
+    return dates
+
+
+def extract_results_page(html: HTMLParser) -> Tuple[List[Dict[str, Any]], Dict[str, Optional[str]]]:
+    """Extract the completed matches of a results page together with their dates."""
+    return MatchScraper.extract_results(html), extract_match_dates(html)
+
+
+def extract_upcoming_page(html: HTMLParser) -> Tuple[List[Dict[str, Any]], Dict[str, Optional[str]]]:
+    """Extract the matches of an upcoming matches page together with their dates."""
+    return MatchScraper._get_match_info(html), extract_match_dates(html)
+
+
+def match_record(match: Dict[str, Any], state: str, dates: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """
+    Build the stored form of a scraped match.
+
+    Args:
+        match: Match as returned by the results or upcoming extractors
+        state: "completed" or "upcoming"
+        dates: Match page path to date, from `extract_match_dates`
+
+    Returns:
+        Record with the store's match columns
+    """
+    return {
+        "match_page": match["match_page"],
+        "state": state,
+        "match_date": dates.get(match["match_page"]),
+        "team1": match["team1"],
+        "team2": match["team2"],
+        "score1": match["score1"],
+        "score2": match["score2"],
+        "flag1": match["flag1"],
+        "flag2": match["flag2"],
+        "tournament_name": match["tournament_name"],
+        "round_info": match["round_info"],
+    }
+
+
+class Ingestor:
+    """
+    Incremental ingestion of scraped matches and rankings into a MatchStore.
+
+    Results are listed newest first, so each run walks the results pages only
+    until it reaches a match that is already stored.
+    """
+
+    def __init__(
+        self, vlr: Vlr, store: MatchStore, max_pages: Optional[int] = None, interval: Optional[float] = None
+    ):
+        """
+        Args:
+            vlr: VLR client whose scrapers (and upstream client) are used
+            store: Destination store
+            max_pages: Maximum number of results pages walked per run
+            interval: Seconds between periodic runs from the app (0 disables them)
+        """
+        self.vlr = vlr
+        self.store = store
+        self.max_pages = max_pages or config.INGEST_MAX_PAGES
+        self.interval = config.INGEST_INTERVAL if interval is None else interval
+        self.runs = 0
+        self.last_run: Optional[float] = None
+        self.last_counts: Dict[str, int] = {}
+
+    async def ingest_results(self) -> int:
+        """
+        Store completed matches newer than the newest stored one.
+
+        Returns:
+            The number of new matches stored
+        """
+        scraper = self.vlr.match_scraper
+        stored = 0
+        for number in range(1, self.max_pages + 1):
+            url = RESULTS_URL if number == 1 else f"{RESULTS_URL}/?page={number}"
+            (matches, dates), status = await scraper.scrape(url, extract_results_page, endpoint="results")
+            scraper.check_status(status)
+
+            pages = [match["match_page"] for match in matches]
+            known = await asyncio.to_thread(self.store.known_matches, pages)
+            fresh = [match_record(match, "completed", dates) for match in matches if match["match_page"] not in known]
+            stored += await asyncio.to_thread(self.store.upsert_matches, fresh)
+
+            # Everything past an already stored match was stored by an earlier run
+            if known or not matches:
+                break
+        return stored
+
+    async def ingest_upcoming(self) -> int:
+        """
+        Store every upcoming match.
+
+        Returns:
+            The number of upcoming matches stored or refreshed
+        """
+        scraper = self.vlr.match_scraper
+        paginator = Paginator(
+            scraper,
+            lambda page: MATCHES_URL if page == 1 else f"{MATCHES_URL}?page={page}",
+            extract_upcoming_page,
+            endpoint="upcoming",
+        )
+        records = []
+        for page in await paginator.fetch_all():
+            if page.status != 200:
+                logger.warning("Skipping upcoming matches page %s (status %s)", page.number, page.status)
+                continue
+            matches, dates = page.items
+            records += [match_record(match, "upcoming", dates) for match in matches]
+
+        # Never turn a completed match back into an upcoming one
+        completed = await asyncio.to_thread(self.store.known_matches, [record["match_page"] for record in records])
+        records = [record for record in records if record["match_page"] not in completed]
+        return await asyncio.to_thread(self.store.upsert_matches, records)
+
+    async def ingest_rankings(self, regions: Optional[List[str]] = None) -> int:
+        """
+        Store a rankings snapshot per region.
+
+        Args:
+            regions: Region codes (defaults to every known region)
+
+        Returns:
+            The number of regions snapshotted
+        """
+        scraper = self.vlr.ranking_scraper
+        captured_at = time.time()
+        snapshots = 0
+        for region in regions or list(region_map):
+            url = f"{RANKINGS_URL}/{region_map[region]}"
+            rankings, status = await scraper.scrape(url, RankingScraper.extract_rankings, endpoint="rankings")
+            if status != 200:
+                logger.warning("Skipping %s rankings (status %s)", region, status)
+                continue
+            await asyncio.to_thread(self.store.add_rankings, region, rankings, captured_at)
+            snapshots += 1
+        return snapshots
+
+    async def run(self) -> Dict[str, int]:
+        """
+        Run one ingestion pass; a failing step does not stop the others.
+
+        Returns:
+            Counts per step
+        """
+        # Never compete with interactive requests for the upstream budget
+        mark_background()
+        counts = {}
+        for name, step in (
+            ("results", self.ingest_results),
+            ("upcoming", self.ingest_upcoming),
+            ("rankings", self.ingest_rankings),
+        ):
+            try:
+                counts[name] = await step()
+            except Exception as e:
+                logger.warning("Ingesting %s failed: %s", name, e)
+                counts[name] = 0
+        self.runs += 1
+        self.last_run = time.time()
+        self.last_counts = counts
+        return counts
+
+    async def run_forever(self, interval: float) -> None:
+        """
+        Run an ingestion pass every `interval` seconds until cancelled.
+
+        Args:
+            interval: Seconds between the start of two passes
+        """
+        while True:
+            started = time.monotonic()
+            await self.run()
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report ingestion runs and the store's size.
+
+        The store is only opened when periodic ingestion is enabled, and its
+        errors are reported rather than raised, so health checks never fail
+        on it (e.g. on a read-only filesystem).
+        """
+        stats: Dict[str, Any] = {
+            "enabled": self.interval > 0,
+            "runs": self.runs,
+            "last_run": self.last_run,
+            "last_counts": self.last_counts,
+        }
+        if self.interval <= 0:
+            return {**stats, "store": "disabled"}
+        try:
+            return {**stats, **self.store.stats()}
+        except sqlite3.Error as e:
+            logger.warning("Cannot read match store stats: %s", e)
+            return {**stats, "store": f"error: {e}"}
+
+
+async def main() -> None:
+    """Run one ingestion pass into STORE_PATH (e.g. from cron)."""
+    upstream = UpstreamClient()
+    store = MatchStore(config.STORE_PATH)
+    try:
+        print(await Ingestor(Vlr(upstream), store).run())
+    finally:
+        await upstream.aclose()
+        store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from api.breaker import is_stale_fallback
+from api.governor import mark_background
+from api.streaming import sse_event
+from utils import config
+
+logger = logging.getLogger(__name__)
+
+SSE_KEEPALIVE = b": keepalive\n\n"
+
+
+class LiveScorePoller:
+    """
+    One shared upstream poller feeding any number of live score subscribers.
+
+    The poller only runs while someone is subscribed. It polls every
+    `min_interval` seconds while scores are changing and backs off towards
+    `max_interval` when nothing changes, nothing is live or upstream fails.
+    Each change is encoded once and handed to every subscriber queue, so a
+    subscriber costs the same whatever the poll rate. Stale fallbacks served
+    while upstream is down are not published, and the live matches are
+    forgotten when polling stops so a later subscriber never starts from an
+    old snapshot.
+
+    Events:
+        - "snapshot": every live match, sent on subscribe and to resync slow clients
+        - "update": matches that started or whose score or rounds changed
+        - "remove": match pages that are no longer live
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[Dict[str, Any]]],
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        backoff: Optional[float] = None,
+        queue_size: Optional[int] = None,
+    ):
+        """
+        Args:
+            fetch: Returns the live matches in the usual `{"data": {"segments"}}` shape
+            min_interval: Seconds between polls while scores change
+            max_interval: Upper bound for the backed-off interval
+            backoff: Factor applied to the interval after an unchanged poll
+            queue_size: Events buffered per subscriber
+        """
+        self.fetch = fetch
+        self.min_interval = config.LIVE_POLL_MIN_INTERVAL if min_interval is None else min_interval
+        self.max_interval = config.LIVE_POLL_MAX_INTERVAL if max_interval is None else max_interval
+        self.backoff = backoff or config.LIVE_POLL_BACKOFF
+        self.queue_size = queue_size or config.LIVE_SUBSCRIBER_QUEUE
+        self.interval = self.min_interval
+        self.matches: Dict[str, Dict[str, Any]] = {}
+        self._subscribers: Set["asyncio.Queue[bytes]"] = set()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.polls = 0
+        self.errors = 0
+        self.stale = 0
+        self.published = 0
+        self.resyncs = 0
+
+    def snapshot(self) -> bytes:
+        """Encode every live match as a snapshot event."""
+        return sse_event("snapshot", list(self.matches.values()))
+
+    def subscribe(self) -> "asyncio.Queue[bytes]":
+        """
+        Register a subscriber and start polling if it is the first one.
+
+        Returns:
+            Queue receiving encoded events, starting with a snapshot
+        """
+        queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=self.queue_size)
+        queue.put_nowait(self.snapshot())
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self.interval = self.min_interval
+            self._task = asyncio.ensure_future(self._run())
+        return queue
+
+    def unsubscribe(self, queue: "asyncio.Queue[bytes]") -> None:
+        """Remove a subscriber; polling stops once nobody is left."""
+        self._subscribers.discard(queue)
+
+    async def events(self, keepalive: Optional[float] = None) -> AsyncIterator[bytes]:
+        """
+        Stream encoded server-sent events for one client.
+
+        Args:
+            keepalive: Seconds of silence before a keep-alive comment is sent
+
+        Yields:
+            Encoded events
+        """
+        keepalive = keepalive or config.LIVE_KEEPALIVE
+        queue = self.subscribe()
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield SSE_KEEPALIVE
+        finally:
+            self.unsubscribe(queue)
+
+    def _publish(self, event: bytes) -> None:
+        """Hand one encoded event to every subscriber."""
+        self.published += 1
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog and resync it with the current state
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot())
+                self.resyncs += 1
+
+    async def poll(self) -> bool:
+        """
+        Poll upstream once and publish what changed.
+
+        Returns:
+            True if any match started, changed or ended
+        """
+        self.polls += 1
+        result = await self.fetch()
+        if is_stale_fallback(result):
+            # Last known good data from the circuit breaker, not a new score
+            self.stale += 1
+            return False
+        current = {match["match_page"]: match for match in result["data"]["segments"]}
+
+        updated = [match for key, match in current.items() if self.matches.get(key) != match]
+        removed = [key for key in self.matches if key not in current]
+        self.matches = current
+
+        if updated:
+            self._publish(sse_event("update", updated))
+        if removed:
+            self._publish(sse_event("remove", removed))
+        return bool(updated or removed)
+
+    async def _run(self) -> None:
+        """Poll while there are subscribers, adapting the interval to activity."""
+        mark_background()
+        try:
+            while self._subscribers:
+                try:
+                    changed = await self.poll()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.errors += 1
+                    logger.warning("Live score poll failed: %s", e)
+                    changed = False
+
+                if changed:
+                    self.interval = self.min_interval
+                elif not self.matches:
+                    self.interval = self.max_interval
+                else:
+                    self.interval = min(self.max_interval, self.interval * self.backoff)
+                await asyncio.sleep(self.interval)
+        finally:
+            # Nobody is watching any more, the next subscriber waits for a fresh poll
+            self.matches = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report poller activity.
+
+        Returns:
+            Dictionary with subscriber count, current interval, live match
+            count and poll/stale/publish counters
+        """
+        return {
+            "subscribers": len(self._subscribers),
+            "running": self._task is not None and not self._task.done(),
+            "interval": round(self.interval, 3),
+            "live_matches": len(self.matches),
+            "polls": self.polls,
+            "errors": self.errors,
+            "stale": self.stale,
+            "published": self.published,
+            "resyncs": self.resyncs,
+        }
+
+    async def aclose(self) -> None:
+        """Stop polling and forget every subscriber."""
+        self._subscribers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
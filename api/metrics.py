@@ -0,0 +1,326 @@
+import bisect
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Default latency buckets in seconds (those of the Prometheus client libraries)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+# Finer buckets for in-process work such as parsing
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value (integers without a fraction)."""
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric(ABC):
+    """
+    A metric family with a fixed set of label names.
+
+    Children are created per label values with `labels()`; a metric without
+    label names is used directly.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Names of the labels every child is keyed by
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, **values: Any) -> Any:
+        """Get the child for a set of label values, creating it on first use."""
+        key = tuple(str(values[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self) -> Any:
+        """Create the value holder of one set of label values."""
+
+    def _default(self) -> Any:
+        """The child of a metric without labels."""
+        return self.labels()
+
+    def samples(self) -> Iterator[Sample]:
+        """Yield (name, labels, value) for every child."""
+        for key, child in sorted(self._children.items()):
+            labels = dict(zip(self.labelnames, key))
+            for suffix, extra, value in child.samples():
+                yield self.name + suffix, {**labels, **extra}, value
+
+
+class _Value:
+    """A single counter or gauge value."""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def samples(self) -> Iterator[Sample]:
+        yield "", {}, self.value
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment a counter without labels."""
+        self._default().inc(amount)
+
+
+class Gauge(Metric):
+    """Value that goes up and down."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment a gauge without labels."""
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrement a gauge without labels."""
+        self._default().dec(amount)
+
+    def set(self, value: float) -> None:
+        """Set a gauge without labels."""
+        self._default().set(value)
+
+
+class _HistogramValue:
+    """Bucket counts, sum and count of one histogram child."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self) -> Iterator[Sample]:
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield "_bucket", {"le": _format_value(bound)}, cumulative
+        yield "_bucket", {"le": "+Inf"}, self.count
+        yield "_sum", {}, self.sum
+        yield "_count", {}, self.count
+
+
+class Histogram(Metric):
+    """Distribution of observed values over cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        """
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Names of the labels every child is keyed by
+            buckets: Upper bounds of the buckets, ascending
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Observe a value on a histogram without labels."""
+        self._default().observe(value)
+
+
+class Registry:
+    """The metrics exposed on /metrics."""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric (names must be unique)."""
+        if any(existing.name == metric.name for existing in self.metrics):
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Create and register a counter."""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Create and register a gauge."""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Create and register a histogram."""
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            The exposition text
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    rendered = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+                    lines.append(f"{name}{{{rendered}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry and the series recorded by the API
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "vlrggapi_request_duration_seconds",
+    "Time until the response headers are sent, per route template",
+    ["method", "route", "status"],
+)
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "vlrggapi_upstream_request_duration_seconds",
+    "Duration of single requests to vlr.gg per URL pattern (scraper endpoint)",
+    ["endpoint"],
+)
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    "vlrggapi_upstream_responses_total",
+    "Responses from vlr.gg per URL pattern and status code (\"error\" when none was received)",
+    ["endpoint", "status"],
+)
+UPSTREAM_IN_FLIGHT = REGISTRY.gauge(
+    "vlrggapi_upstream_in_flight",
+    "Requests to vlr.gg currently waiting for a response",
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    "vlrggapi_parse_duration_seconds",
+    "HTML parsing time per scraper method",
+    ["method"],
+    FAST_BUCKETS,
+)
+EXTRACT_SECONDS = REGISTRY.histogram(
+    "vlrggapi_extract_duration_seconds",
+    "Extraction time per scraper method",
+    ["method"],
+    FAST_BUCKETS,
+)
+PARSE_MEMO_HITS = REGISTRY.counter(
+    "vlrggapi_parse_memo_hits_total",
+    "Extractions skipped because the page body was unchanged, per scraper method",
+    ["method"],
+)
+FACADE_SECONDS = REGISTRY.histogram(
+    "vlrggapi_facade_call_duration_seconds",
+    "Duration of Vlr facade calls (fetch, parse and extraction) per method",
+    ["method"],
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "vlrggapi_cache_requests_total",
+    "Response cache lookups per cache, namespace and outcome (hit, stale or miss)",
+    ["cache", "namespace", "outcome"],
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template.
+
+    Latency is measured until the response headers are sent, so long-lived
+    streams are measured by their time to first byte. Requests that match no
+    route are grouped under "unmatched" to keep the label set bounded.
+    """
+
+    def __init__(self, app: Any, histogram: Optional[Histogram] = None):
+        """
+        Args:
+            app: The wrapped ASGI application
+            histogram: Histogram labelled by method, route and status
+        """
+        self.app = app
+        self.histogram = histogram if histogram is not None else REQUEST_SECONDS
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        recorded = False
+
+        def record(status: int) -> None:
+            nonlocal recorded
+            recorded = True
+            route = scope.get("route")
+            self.histogram.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            ).observe(time.perf_counter() - started)
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start" and not recorded:
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not recorded:
+                record(500)
@@ -0,0 +1,144 @@
+import asyncio
+import functools
+from typing import Any, AsyncIterator, Callable, List, NamedTuple, Optional, Tuple
+
+from selectolax.parser import HTMLParser
+
+from api.base_scraper import BaseScraper, extractor_name
+from api.errors import UpstreamError
+from utils import config
+
+
+class Page(NamedTuple):
+    """A single fetched and extracted page of a paginated listing."""
+    number: int
+    items: Any
+    status: int
+
+
+def count_pages(html: HTMLParser) -> int:
+    """
+    Read the number of pages from the vlr.gg pagination bar.
+
+    Args:
+        html: Parsed first page
+
+    Returns:
+        The number of pages (at least 1)
+    """
+    return max(1, len(html.css(".action-container-pages a.mod-page")))
+
+
+def extract_first_page(
+    page_count: Callable[[HTMLParser], int], extract: Callable[[HTMLParser], Any], html: HTMLParser
+) -> Tuple[int, Any]:
+    """Extract the page count together with the first page's items."""
+    return page_count(html), extract(html)
+
+
+class Paginator:
+    """
+    Bounded-concurrency pagination engine.
+
+    The first page is fetched to discover the page count, then every remaining
+    page is requested at once (capped by `concurrency`). Pages are always
+    handed back in page order, each with its own status code.
+    """
+
+    def __init__(
+        self,
+        scraper: BaseScraper,
+        page_url: Callable[[int], str],
+        extract: Callable[[HTMLParser], Any],
+        endpoint: str = "default",
+        page_count: Callable[[HTMLParser], int] = count_pages,
+        concurrency: Optional[int] = None,
+        max_pages: Optional[int] = None,
+    ):
+        """
+        Args:
+            scraper: Scraper whose `scrape` is used to fetch pages
+            page_url: Builds the URL for a 1-based page number
+            extract: Pure function extracting the items of one page
+            endpoint: Endpoint name used to pick the upstream timeout
+            page_count: Reads the total page count from the first page
+            concurrency: Maximum number of pages fetched at the same time
+            max_pages: Optional hard cap on the number of pages fetched
+        """
+        self.scraper = scraper
+        self.page_url = page_url
+        self.extract = extract
+        self.endpoint = endpoint
+        self.page_count = page_count
+        self.concurrency = concurrency or config.PAGINATION_CONCURRENCY
+        self.max_pages = max_pages
+
+    async def _fetch(self, number: int, semaphore: asyncio.Semaphore, keep_going: bool = False) -> Page:
+        """Fetch one page while holding a concurrency slot."""
+        async with semaphore:
+            try:
+                items, status = await self.scraper.scrape(self.page_url(number), self.extract, endpoint=self.endpoint)
+            except UpstreamError as e:
+                if not keep_going:
+                    raise
+                return Page(number, [], e.status or e.response_status)
+        return Page(number, items, status)
+
+    async def iter_pages(self, keep_going: bool = False) -> AsyncIterator[Page]:
+        """
+        Yield every page in page order as soon as it is available.
+
+        All remaining pages are fetched concurrently after the first one, so
+        consumers can start processing page 1 while the others are in flight.
+
+        Args:
+            keep_going: Yield a page after the first that fails upstream as an
+                empty page with the error's status instead of raising
+        """
+        (total, items), status = await self.scraper.scrape(
+            self.page_url(1),
+            functools.partial(extract_first_page, self.page_count, self.extract),
+            endpoint=self.endpoint,
+            memo_key=f"{extractor_name(self.extract)}+{extractor_name(self.page_count)}",
+        )
+        if self.max_pages is not None:
+            total = min(total, self.max_pages)
+
+        yield Page(1, items, status)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [
+            asyncio.ensure_future(self._fetch(number, semaphore, keep_going)) for number in range(2, total + 1)
+        ]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            # Stop outstanding fetches if the consumer bails out early
+            for task in tasks:
+                task.cancel()
+
+    async def fetch_all(self) -> List[Page]:
+        """
+        Fetch every page.
+
+        Returns:
+            All pages, ordered by page number
+        """
+        return [page async for page in self.iter_pages()]
+
+
+def merge_status(pages: List[Page]) -> int:
+    """
+    Combine per-page status codes into one status for the whole listing.
+
+    Args:
+        pages: Fetched pages
+
+    Returns:
+        The first non-200 status, or 200 if every page succeeded
+    """
+    for page in pages:
+        if page.status != 200:
+            return page.status
+    return 200
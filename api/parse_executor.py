@@ -0,0 +1,138 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from selectolax.parser import HTMLParser
+
+from utils import config
+
+
+def parse_and_extract(extract: Callable[[HTMLParser], Any], text: str) -> Tuple[Any, float, float]:
+    """
+    Parse an HTML body and run an extraction function over it.
+
+    Runs inside the pool, so it must stay a picklable module-level function.
+
+    Args:
+        extract: Pure extraction function
+        text: HTML body
+
+    Returns:
+        A tuple of (extracted result, seconds spent parsing, seconds spent extracting)
+    """
+    started = time.perf_counter()
+    html = HTMLParser(text)
+    parsed = time.perf_counter()
+    result = extract(html)
+    return result, parsed - started, time.perf_counter() - parsed
+
+
+class ParseExecutor:
+    """
+    Runs selectolax parsing and extraction off the event loop.
+
+    Modes:
+        - "inline": run on the event loop (no pool)
+        - "thread": run in a thread pool
+        - "process": run in a process pool (extractors must be picklable)
+    """
+
+    MODES = ("inline", "thread", "process")
+
+    def __init__(self, mode: Optional[str] = None, workers: Optional[int] = None):
+        """
+        Args:
+            mode: "inline", "thread" or "process" (defaults to PARSE_EXECUTOR)
+            workers: Pool size (defaults to PARSE_WORKERS)
+        """
+        self.mode = (mode or config.PARSE_EXECUTOR).lower()
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unknown parse executor mode: {self.mode}")
+        self.workers = workers or config.PARSE_WORKERS
+        self._pool: Optional[Executor] = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.exec_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    @property
+    def pool(self) -> Optional[Executor]:
+        """The underlying pool, created on first use (None in inline mode)."""
+        if self._pool is None and self.mode != "inline":
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="vlr-parse")
+        return self._pool
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs submitted to the pool that have not finished yet."""
+        return self.submitted - self.completed - self.failed
+
+    async def run(self, extract: Callable[[HTMLParser], Any], text: str) -> Any:
+        """
+        Parse `text` and run `extract` over it in the pool.
+
+        Args:
+            extract: Pure extraction function
+            text: HTML body
+
+        Returns:
+            The extraction result
+        """
+        result, _, _ = await self.run_timed(extract, text)
+        return result
+
+    async def run_timed(self, extract: Callable[[HTMLParser], Any], text: str) -> Tuple[Any, float, float]:
+        """
+        Like `run`, also returning the time spent in each step.
+
+        Returns:
+            A tuple of (extraction result, parse seconds, extract seconds)
+        """
+        self.submitted += 1
+        started = time.perf_counter()
+        try:
+            if self.pool is None:
+                result, parse_seconds, extract_seconds = parse_and_extract(extract, text)
+            else:
+                loop = asyncio.get_running_loop()
+                result, parse_seconds, extract_seconds = await loop.run_in_executor(
+                    self.pool, parse_and_extract, extract, text
+                )
+        except BaseException:
+            self.failed += 1
+            raise
+        exec_seconds = parse_seconds + extract_seconds
+        self.completed += 1
+        self.exec_seconds += exec_seconds
+        self.wait_seconds += max(0.0, time.perf_counter() - started - exec_seconds)
+        return result, parse_seconds, extract_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report pool usage.
+
+        Returns:
+            Dictionary with mode, queue depth, job counts and time spent
+            queued and executing in the pool
+        """
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "exec_seconds": round(self.exec_seconds, 6),
+            "wait_seconds": round(self.wait_seconds, 6),
+        }
+
+    def shutdown(self) -> None:
+        """Stop the pool's workers."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
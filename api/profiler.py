@@ -0,0 +1,150 @@
+import cProfile
+import pstats
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from utils import config
+
+SORT_KEYS = ("cumulative", "tottime", "calls")
+
+
+class SampledProfiler:
+    """
+    Runs cProfile over a sample of requests and aggregates the captures.
+
+    Disabled until `enable` is called (from the admin endpoint). Only one
+    capture runs at a time, since a thread has a single active profiler. The
+    event loop is shared, so a capture also includes whatever other requests
+    ran on the loop while the sampled one was in progress.
+    """
+
+    def __init__(self):
+        self.rate = 0.0
+        self.enabled_at: Optional[float] = None
+        self._active: Optional[cProfile.Profile] = None
+        self._stats: Optional[pstats.Stats] = None
+        self.captures = 0
+        self.skipped = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether requests are being sampled."""
+        return self.rate > 0
+
+    def enable(self, rate: float) -> None:
+        """
+        Start sampling requests.
+
+        Args:
+            rate: Fraction of requests profiled, between 0 and 1
+        """
+        if not 0 < rate <= 1:
+            raise ValueError("Rate must be above 0 and at most 1")
+        self.rate = rate
+        self.enabled_at = time.time()
+
+    def disable(self) -> None:
+        """Stop sampling (the aggregated stats are kept until `reset`)."""
+        self.rate = 0.0
+
+    def reset(self) -> None:
+        """Drop the aggregated stats."""
+        self._stats = None
+        self.captures = 0
+        self.skipped = 0
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """
+        Decide whether to profile a request and start the capture.
+
+        Returns:
+            The running profile, or None if the request is not sampled
+        """
+        if not self.enabled or random.random() >= self.rate:
+            return None
+        if self._active is not None:
+            self.skipped += 1
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active on this thread
+            self.skipped += 1
+            return None
+        self._active = profile
+        return profile
+
+    def stop(self, profile: cProfile.Profile) -> None:
+        """Stop a capture and add it to the aggregated stats."""
+        profile.disable()
+        self._active = None
+        if self._stats is None:
+            self._stats = pstats.Stats(profile)
+        else:
+            self._stats.add(profile)
+        self.captures += 1
+
+    def report(self, sort: str = "cumulative", limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Report the hottest functions over every capture.
+
+        Args:
+            sort: "cumulative", "tottime" or "calls"
+            limit: Number of functions returned (defaults to PROFILE_TOP)
+
+        Returns:
+            Dictionary with sampling state and the top functions
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Sort must be one of: {', '.join(SORT_KEYS)}")
+        limit = config.PROFILE_TOP if limit is None else limit
+        functions: List[Dict[str, Any]] = []
+        if self._stats is not None:
+            for (filename, line, name), (_, calls, tottime, cumtime, _) in self._stats.stats.items():
+                functions.append(
+                    {
+                        "function": f"{filename}:{line}({name})",
+                        "calls": calls,
+                        "tottime": round(tottime, 6),
+                        "cumulative": round(cumtime, 6),
+                    }
+                )
+            functions.sort(key=lambda item: item[sort], reverse=True)
+        return {
+            "enabled": self.enabled,
+            "rate": self.rate,
+            "enabled_at": self.enabled_at,
+            "captures": self.captures,
+            "skipped": self.skipped,
+            "functions": functions[:limit],
+        }
+
+
+class ProfilerMiddleware:
+    """ASGI middleware profiling the requests picked by a `SampledProfiler`."""
+
+    def __init__(self, app: Any, profiler: SampledProfiler, skip_paths: Sequence[str] = ()):
+        """
+        Args:
+            app: The wrapped ASGI application
+            profiler: Decides which requests are profiled and aggregates them
+            skip_paths: Path prefixes never profiled (e.g. long-lived streams,
+                which would hold the single capture slot)
+        """
+        self.app = app
+        self.profiler = profiler
+        self.skip_paths = tuple(skip_paths)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        profile = None
+        if scope["type"] == "http" and not scope["path"].startswith(self.skip_paths):
+            profile = self.profiler.start()
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.stop(profile)
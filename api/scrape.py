@@ -1,52 +1,75 @@
-from typing import Dict, List, Any, Tuple
-import httpx
+import asyncio
+import copy
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from selectolax.parser import HTMLParser
 
 from api.base_scraper import BaseScraper
-from utils.constants import headers, region_map, BASE_URL, NEWS_URL, MATCHES_URL, RESULTS_URL, RANKINGS_URL
-from utils.helpers import get_hostname, clean_text, extract_flags, fetch_image_as_base64
+from api.breaker import CircuitBreaker
+from api.errors import CircuitOpen, NotFound, UpstreamError
+from api.extraction import Field, Schema
+from api.images import ImageProxy, image_paths, proxy_image_url
+from api.metrics import FACADE_SECONDS
+from api.pagination import Page, Paginator, merge_status
+from api.parse_executor import ParseExecutor
+from api.stats_table import StatsTable, stat_value
+from api.upstream import UpstreamClient
+from utils import config
+from utils.lru import LRUCache
+from utils.singleflight import SingleFlight
+from utils.constants import region_map, BASE_URL, NEWS_URL, MATCHES_URL, RESULTS_URL, RANKINGS_URL
+from utils.helpers import get_hostname, clean_text
 
 
 class NewsScraper(BaseScraper):
     """Scraper for VLR news articles."""
     
-    async def get_recent_news(self, client: httpx.AsyncClient) -> Dict[str, Any]:
-        """
-        Get recent news articles from VLR.
-        
-        Returns:
-            Dictionary containing news data
-        """
-        html, status = await self.get_parse(NEWS_URL, client)
+    SCHEMA = Schema(
+        "a.wf-module-item",
+        {
+            "url_path": Field(attr="href"),
+            "title": Field("> div:nth-child(1)"),
+            "description": Field("> div > div:nth-child(2)"),
+            "date_author": Field("div.ge-text-light"),
+        },
+    )
+    
+    @classmethod
+    def extract_news(cls, html: HTMLParser) -> List[Dict[str, Any]]:
+        """Extract news articles from the news page."""
         result = []
         
-        for item in html.css('a.wf-module-item'):
+        for item in cls.SCHEMA.extract(html):
             # Get date and author
-            date_author = item.css_first("div.ge-text-light").text()
-            date, author = date_author.split('by')
-            
-            # Get description
-            desc = item.css_first("div").css_first("div:nth-child(2)").text().strip()
+            date, author = item["date_author"].split('by')
             
             # Get title
-            title = item.css_first("div:nth-child(1)").text().strip().split('\n')[0]
+            title = item["title"].strip().split('\n')[0]
             title = title.replace('\t', '')
             
-            # Get URL
-            url = item.css_first("a.wf-module-item").attributes['href']
-            
             # Add to results
             result.append(
                 {
                     "title": title,
-                    "description": desc,
+                    "description": item["description"].strip(),
                     "date": date.split("\u2022")[1].strip(),
                     "author": author.strip(),
-                    "url_path": url,
+                    "url_path": item["url_path"],
                 }
             )
         
+        return result
+    
+    async def get_recent_news(self) -> Dict[str, Any]:
+        """
+        Get recent news articles from VLR.
+        
+        Returns:
+            Dictionary containing news data
+        """
+        result, status = await self.scrape(NEWS_URL, self.extract_news, endpoint="news")
+        
         data = {
             "data": {
                 "status": status,
@@ -61,54 +84,49 @@ class NewsScraper(BaseScraper):
 class MatchScraper(BaseScraper):
     """Scraper for VLR matches."""
     
-    def _get_teams(self, item: Any) -> List[str]:
-        """Extract team names from match item."""
-        teams = []
-        team_items = item.css(".match-item-vs-team-name")
-        for team in team_items:
-            teams.append(team.text().strip())
-        return teams
-    
-    def _get_scores(self, item: Any) -> List[str]:
-        """Extract scores from match item."""
-        scores = []
-        score_items = item.css(".match-item-vs-team-score")
-        for score in score_items:
-            scores.append(score.text().strip())
-        return scores
-    
-    def _get_eta(self, item: Any) -> str:
-        """Extract ETA from match item."""
-        eta = item.css_first(".match-item-eta").text().replace("\t", "").replace("\n", " ").strip()
+    SCHEMA = Schema(
+        "a.wf-module-item",
+        {
+            "match_page": Field(attr="href"),
+            "teams": Field(".match-item-vs-team-name", many=True, transform=str.strip),
+            "flags": Field(".flag", attr="class", many=True, transform=lambda cls: cls.replace(" mod-", "_")),
+            "scores": Field(".match-item-vs-team-score", many=True, transform=str.strip),
+            "eta": Field(".match-item-eta"),
+            "round_info": Field(".match-item-event-series", transform=str.strip),
+            "tournament": Field(".match-item-event"),
+            "icon": Field(".match-item-icon img", attr="src", transform=proxy_image_url, default=""),
+        },
+    )
+    
+    @staticmethod
+    def _get_eta(eta: str) -> str:
+        """Format the ETA text of a match item."""
+        eta = eta.replace("\t", "").replace("\n", " ").strip()
         if eta != "LIVE":
             eta = eta + " from now"
         return eta
     
-    def _get_tournament_icon(self, item: Any) -> str:
-        """Return an empty tournament icon."""
-        return ""
+    @staticmethod
+    def _get_tournament_name(tournament: Optional[str]) -> Any:
+        """Pick the tournament name out of the event text."""
+        if tournament is None:
+            return None
+        tournament = tournament.strip()
+        tournament = tournament.replace("\t", " ")
+        tournament = tournament.strip().split("\n")
+        if len(tournament) > 1:
+            tournament = tournament[1].strip()
+        return tournament
     
-    def _get_match_info(self, html: HTMLParser) -> List[Dict[str, Any]]:
+    @classmethod
+    def _get_match_info(cls, html: HTMLParser) -> List[Dict[str, Any]]:
         """Extract match information from HTML."""
         result = []
         
-        for item in html.css("a.wf-module-item"):
-            teams = self._get_teams(item)
-            flags = extract_flags(item.css('.flag'))
-            scores = self._get_scores(item)
-            tournament_icon = self._get_tournament_icon(item)
-            eta = self._get_eta(item)
-            match_url = item.attributes['href']
-            rounds = item.css_first(".match-item-event-series").text().strip()
-            
-            tournament = None
-            tournament_item = item.css_first(".match-item-event")
-            if tournament_item is not None:
-                tournament = tournament_item.text().strip()
-                tournament = tournament.replace("\t", " ")
-                tournament = tournament.strip().split("\n")
-                if len(tournament) > 1:
-                    tournament = tournament[1].strip()
+        for item in cls.SCHEMA.extract(html):
+            teams = item["teams"]
+            flags = item["flags"]
+            scores = item["scores"]
             
             # Note: Stream fetching is skipped here to avoid async/sync issues
             # Streams can be fetched separately via the get_streams endpoint
@@ -122,110 +140,408 @@ class MatchScraper(BaseScraper):
                     "flag2": flags[1],
                     "score1": scores[0],
                     "score2": scores[1],
-                    "time_until_match": eta,
-                    "round_info": rounds,
-                    "tournament_name": tournament,
-                    "match_page": match_url,
+                    "time_until_match": cls._get_eta(item["eta"]),
+                    "round_info": item["round_info"],
+                    "tournament_name": cls._get_tournament_name(item["tournament"]),
+                    "match_page": item["match_page"],
                     "match_stream": stream,
-                    "tournament_icon": tournament_icon,
+                    "tournament_icon": item["icon"],
                 }
             )
         
         return result
     
-    async def get_streams(self, match: str, client: httpx.AsyncClient) -> Dict[str, Any]:
-        """Get stream information for a match."""
-        url = f"{BASE_URL}/{match}"
-        resp = await client.get(url, headers=headers)
-        html = HTMLParser(resp.text)
-        status = resp.status_code
-        
+    STREAMS_SCHEMA = Schema(
+        "div.match-streams-container .match-streams-btn:not(.mod-expand)",
+        {
+            "title": Field("span", transform=str.strip, default=""),
+            "link": Field("a", attr="href", default=""),
+            "tag": Field(raw=True, transform=lambda node: node.tag),
+            "href": Field(attr="href"),
+        },
+    )
+    
+    @classmethod
+    def extract_streams(cls, html: HTMLParser) -> List[Dict[str, Any]]:
+        """Extract stream links from a match page."""
         result = []
         
-        for stream in html.css("div.match-streams-container .match-streams-btn:not(.mod-expand)"):
-            title = ""
-            span = stream.css_first("span")
-            if span is not None:
-                title = span.text().strip()
-            
-            href = ""
-            link = stream.css_first("a")
-            if link is not None:
-                href = link.attributes['href']
-            
-            if href == "":
-                href = stream.attributes.get('href', "")
-            
-            platform = get_hostname(href)
+        for stream in cls.STREAMS_SCHEMA.extract(html):
+            # A stream button can itself be the link
+            href = stream["href"] if stream["tag"] == "a" else stream["link"]
+            if not href:
+                href = stream["href"] or ""
             
             result.append(
                 {
-                    "title": title,
+                    "title": stream["title"],
                     "href": href,
-                    "platform": platform,
+                    "platform": get_hostname(href),
                 }
             )
         
+        return result
+    
+    async def get_streams(self, match: str) -> Dict[str, Any]:
+        """Get stream information for a match."""
+        url = f"{BASE_URL}/{match}"
+        result, status = await self.scrape(url, self.extract_streams, endpoint="streams")
+        
         data = {"status": status, "data": result}
         
         self.check_status(status)
         return data
     
-    async def get_upcoming_matches(self, client: httpx.AsyncClient) -> Dict[str, Any]:
-        """Get upcoming matches."""
-        url = MATCHES_URL
-        resp = await client.get(url, headers=headers)
-        html = HTMLParser(resp.text)
-        status = resp.status_code
+    MATCH_HEADER_SCHEMA = Schema(
+        "div.match-header",
+        {
+            "event": Field(".match-header-event div[style]", transform=clean_text, default=""),
+            "series": Field(".match-header-event-series", transform=clean_text, default=""),
+            "event_path": Field("a.match-header-event", attr="href", default=""),
+            "event_icon": Field(".match-header-event img", attr="src", transform=proxy_image_url, default=""),
+            "date": Field(".match-header-date .moment-tz-convert", attr="data-utc-ts"),
+            "teams": Field(".match-header-link-name", many=True, transform=clean_text),
+            "team_paths": Field("a.match-header-link", attr="href", many=True),
+            "logos": Field("a.match-header-link img", attr="src", many=True, transform=proxy_image_url),
+            "score": Field(".match-header-vs-score .js-spoiler span", many=True, transform=str.strip),
+            "notes": Field(".match-header-vs-note", many=True, transform=str.strip),
+        },
+    )
+    
+    MAP_HEADER_SCHEMA = Schema(
+        "div.vm-stats-game-header",
+        {
+            "map": Field(".map span", transform=lambda text: text.strip().split("\n")[0].strip()),
+            "picked": Field(".picked", attr="class", default=""),
+            "duration": Field(".map-duration", transform=str.strip, default=""),
+            "teams": Field(".team-name", many=True, transform=clean_text),
+            "scores": Field(".score", many=True),
+            "ct": Field(".mod-ct", many=True),
+            "t": Field(".mod-t", many=True),
+            "ot": Field(".mod-ot", many=True),
+        },
+    )
+    
+    SCOREBOARD_SCHEMA = Schema(
+        "tbody tr",
+        {
+            "player": Field("td.mod-player .text-of", transform=str.strip),
+            "team": Field("td.mod-player .ge-text-light", transform=str.strip, default=""),
+            "url_path": Field("td.mod-player a", attr="href", default=""),
+            "agents": Field("td.mod-agents img", attr="title", many=True),
+            "stats": Field("td.mod-stat .mod-both", many=True),
+        },
+    )
+    
+    PERFORMANCE_SCHEMA = Schema(
+        "tr",
+        {
+            "player": Field(".team > div", raw=True, transform=lambda node: node.text(deep=False).strip()),
+            "team": Field(".team-tag", transform=str.strip, default=""),
+            "stats": Field("td.mod-stat", many=True),
+        },
+    )
+    
+    # Scoreboard columns, in page order, with the type of their values
+    SCOREBOARD_COLUMNS = (
+        ("rating", float),
+        ("average_combat_score", int),
+        ("kills", int),
+        ("deaths", int),
+        ("assists", int),
+        ("kill_death_diff", int),
+        ("kast", float),
+        ("average_damage_per_round", int),
+        ("headshot_percentage", float),
+        ("first_kills", int),
+        ("first_deaths", int),
+        ("first_kill_diff", int),
+    )
+    
+    PERFORMANCE_COLUMNS = ("2k", "3k", "4k", "5k", "1v1", "1v2", "1v3", "1v4", "1v5", "econ", "plants", "defuses")
+    
+    @staticmethod
+    def _typed_stat(value: Optional[str], kind: type) -> Any:
+        """Read a scoreboard cell ("1.24", "+3", "−2", "74%") as `kind`, None when empty."""
+        number = stat_value(value.replace("−", "-") if value else value)
+        return None if number is None else kind(number)
+    
+    @staticmethod
+    def _match_state(notes: List[str]) -> str:
+        """Tell a completed, live or upcoming match apart from the header notes."""
+        notes = [note.lower() for note in notes]
+        if "final" in notes:
+            return "completed"
+        if "live" in notes:
+            return "live"
+        return "upcoming"
+    
+    @staticmethod
+    def _vetoes(note: Optional[str]) -> List[Dict[str, Any]]:
+        """Split the map veto note ("SEN ban Icebox; ...; Ascent remains") into steps."""
+        result = []
+        for step in (note or "").split(";"):
+            words = step.split()
+            if len(words) >= 3 and words[-2] in ("ban", "pick"):
+                result.append({"team": " ".join(words[:-2]), "action": words[-2], "map": words[-1]})
+            elif len(words) == 2 and words[1] == "remains":
+                result.append({"team": None, "action": "remains", "map": words[0]})
+        return result
+    
+    @classmethod
+    def _scoreboard(cls, game: Any) -> List[Dict[str, Any]]:
+        """Extract both teams' player rows of one map (or of the whole series)."""
+        result = []
+        for table in game.css("table.mod-overview"):
+            for row in cls.SCOREBOARD_SCHEMA.extract(table):
+                player = {
+                    "player": row["player"],
+                    "team": row["team"],
+                    "url_path": row["url_path"],
+                    "agents": row["agents"],
+                }
+                stats = row["stats"] + [None] * (len(cls.SCOREBOARD_COLUMNS) - len(row["stats"]))
+                for (name, kind), value in zip(cls.SCOREBOARD_COLUMNS, stats):
+                    player[name] = cls._typed_stat(value, kind)
+                result.append(player)
+        return result
+    
+    @classmethod
+    def _map_result(cls, game: Any) -> Optional[Dict[str, Any]]:
+        """Extract a played map's header: name, pick, duration and each team's rounds."""
+        headers = cls.MAP_HEADER_SCHEMA.extract(game, limit=1)
+        if not headers:
+            return None
+        header = headers[0]
+        teams = []
+        for index, name in enumerate(header["teams"]):
+            side = {}
+            for half in ("ct", "t", "ot"):
+                # Overtime rounds are only listed when there was overtime
+                side[half] = cls._typed_stat(header[half][index], int) if index < len(header[half]) else None
+            score = cls._typed_stat(header["scores"][index], int) if index < len(header["scores"]) else None
+            teams.append({"name": name, "score": score, **side})
+        
+        scores = [team["score"] for team in teams]
+        winner = None
+        if len(scores) == 2 and None not in scores and scores[0] != scores[1]:
+            winner = 1 if scores[0] > scores[1] else 2
+        picked_by = None
+        for index in (1, 2):
+            if f"mod-{index}" in header["picked"].split():
+                picked_by = index
+        
+        return {
+            "game_id": game.attributes.get("data-game-id"),
+            "map": header["map"],
+            "picked_by": picked_by,
+            "duration": header["duration"],
+            "winner": winner,
+            "teams": teams,
+        }
+    
+    @classmethod
+    def extract_match_detail(cls, html: HTMLParser) -> Dict[str, Any]:
+        """Extract a match page: header, map vetoes, and per-map and series scoreboards."""
+        headers = cls.MATCH_HEADER_SCHEMA.extract(html, limit=1)
+        if not headers:
+            return {}
+        header = headers[0]
         
-        amount_of_pages = len(html.css(".action-container-pages a.mod-page"))
+        teams = []
+        score = [value for value in header["score"] if value != ":"]
+        for index, name in enumerate(header["teams"]):
+            teams.append(
+                {
+                    "name": name,
+                    "url_path": header["team_paths"][index] if index < len(header["team_paths"]) else "",
+                    "logo": header["logos"][index] if index < len(header["logos"]) else "",
+                    "score": cls._typed_stat(score[index], int) if index < len(score) else None,
+                }
+            )
         
-        result = self._get_match_info(html)
+        veto_note = html.css_first(".match-header-note")
+        maps, players = [], []
+        for game in html.css("div.vm-stats-game"):
+            if game.attributes.get("data-game-id") == "all":
+                players = cls._scoreboard(game)
+                continue
+            result = cls._map_result(game)
+            if result is not None:
+                result["players"] = cls._scoreboard(game)
+                maps.append(result)
+        
+        formats = [note for note in header["notes"] if note.lower().startswith("bo")]
+        return {
+            "state": cls._match_state(header["notes"]),
+            "event": {
+                "name": header["event"],
+                "series": header["series"],
+                "url_path": header["event_path"],
+                "tournament_icon": header["event_icon"],
+            },
+            "date": header["date"],
+            "format": formats[0] if formats else None,
+            "teams": teams,
+            "vetoes": cls._vetoes(veto_note.text() if veto_note is not None else None),
+            "maps": maps,
+            "players": players,
+        }
+    
+    @classmethod
+    def extract_match_performance(cls, html: HTMLParser) -> List[Dict[str, Any]]:
+        """Extract the performance tab: multi-kills, clutches, economy, plants and defuses per map."""
+        result = []
+        for game in html.css("div.vm-stats-game"):
+            players = []
+            for row in cls.PERFORMANCE_SCHEMA.extract(game):
+                if not row["player"]:
+                    # The header row
+                    continue
+                stats = [cls._typed_stat(value, int) or 0 for value in row["stats"]]
+                players.append({"player": row["player"], "team": row["team"], **dict(zip(cls.PERFORMANCE_COLUMNS, stats))})
+            result.append({"game_id": game.attributes.get("data-game-id"), "players": players})
+        return result
+    
+    @classmethod
+    def _merge_performance(cls, detail: Dict[str, Any], performance: List[Dict[str, Any]]) -> None:
+        """Attach each player's performance tab stats to their scoreboard rows."""
+        by_game = {
+            game["game_id"]: {(player["team"], player["player"]): player for player in game["players"]}
+            for game in performance
+        }
+        boards = [("all", detail["players"])] + [(played["game_id"], played["players"]) for played in detail["maps"]]
+        for game_id, players in boards:
+            rows = by_game.get(game_id, {})
+            for player in players:
+                row = rows.get((player["team"], player["player"]))
+                player["performance"] = (
+                    {name: row[name] for name in cls.PERFORMANCE_COLUMNS} if row is not None else None
+                )
+    
+    async def get_match_detail(self, match: str) -> Dict[str, Any]:
+        """
+        Get the full detail of a match.
         
-        for page_index in range(2, amount_of_pages + 1):
-            next_url = f"{url}?page={page_index}"
-            resp = await client.get(next_url, headers=headers)
-            html = HTMLParser(resp.text)
-            status = resp.status_code
-            result += self._get_match_info(html)
+        The match page (header, vetoes and the scoreboard of every map) and
+        its performance tab are fetched concurrently.
         
-        segments = {"status": status, "segments": result}
+        Args:
+            match: Match ID
+            
+        Returns:
+            Dictionary containing the match detail with typed player stats
+        """
+        (detail, status), (performance, performance_status) = await asyncio.gather(
+            self.scrape(f"{BASE_URL}/{match}", self.extract_match_detail, endpoint="match"),
+            self.scrape(f"{BASE_URL}/{match}/?game=all&tab=performance", self.extract_match_performance, endpoint="match"),
+        )
+        self.check_status(status)
+        self.check_status(performance_status)
+        if not detail:
+            raise UpstreamError(f"Match {match} page could not be parsed", status=status)
+        
+        # Scrape results are shared with other callers, so merge into a copy
+        detail = copy.deepcopy(detail)
+        self._merge_performance(detail, performance)
+        return {"status": status, "data": {"match_id": match, **detail}}
+    
+    def upcoming_paginator(self) -> Paginator:
+        """Build the paginator over the upcoming matches listing."""
+        return Paginator(
+            self,
+            lambda page: MATCHES_URL if page == 1 else f"{MATCHES_URL}?page={page}",
+            self._get_match_info,
+            endpoint="upcoming",
+        )
+    
+    async def get_upcoming_matches(self) -> Dict[str, Any]:
+        """Get upcoming matches."""
+        pages = await self.upcoming_paginator().fetch_all()
+        
+        result = []
+        for page in pages:
+            result += page.items
+        
+        status = merge_status(pages)
+        segments = {
+            "status": status,
+            "pages": [{"page": page.number, "status": page.status} for page in pages],
+            "segments": result,
+        }
         
         data = {"data": segments}
         
         self.check_status(status)
         return data
     
-    async def get_match_results(self, client: httpx.AsyncClient) -> Dict[str, Any]:
-        """Get match results."""
-        url = RESULTS_URL
-        resp = await client.get(url, headers=headers)
-        html = HTMLParser(resp.text)
-        status = resp.status_code
-        
+    async def stream_upcoming_matches(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream upcoming matches page by page.
+
+        The first page is fetched before returning, so its failure is raised
+        while an error status can still be answered. The returned iterator
+        yields one `{"type": "match", "page", "data"}` record per match as soon
+        as its page is parsed, then a closing `{"type": "end", "status", "pages"}`
+        record with the per-page and merged status codes. Later pages failing
+        upstream are reported there with their error status.
+        
+        Raises:
+            UpstreamError: If the first page cannot be fetched
+        """
+        pages = self.upcoming_paginator().iter_pages(keep_going=True)
+        first = await pages.__anext__()
+        self.check_status(first.status)
+        return self._stream_pages(first, pages)
+    
+    async def _stream_pages(self, first: Page, rest: AsyncIterator[Page]) -> AsyncIterator[Dict[str, Any]]:
+        """Turn fetched pages into streamed records (see stream_upcoming_matches)."""
+        # Only page numbers and statuses are kept so memory stays bounded
+        pages = [Page(first.number, None, first.status)]
+        try:
+            for match in first.items:
+                yield {"type": "match", "page": first.number, "data": match}
+            async for page in rest:
+                pages.append(Page(page.number, None, page.status))
+                for match in page.items:
+                    yield {"type": "match", "page": page.number, "data": match}
+        finally:
+            await rest.aclose()
+        
+        yield {
+            "type": "end",
+            "status": merge_status(pages),
+            "pages": [{"page": page.number, "status": page.status} for page in pages],
+        }
+    
+    RESULTS_SCHEMA = Schema(
+        "a.wf-module-item",
+        {
+            "match_page": Field(attr="href"),
+            "eta": Field("div.ml-eta"),
+            "round_info": Field("div.match-item-event-series"),
+            "tournament": Field("div.match-item-event"),
+            "teams": Field("div.match-item-vs", default="TBD"),
+            "flags": Field(".flag", attr="class", many=True, transform=lambda cls: cls.replace(" mod-", "_")),
+            "icon": Field("div.match-item-icon img", attr="src", transform=proxy_image_url, default=""),
+        },
+    )
+    
+    @classmethod
+    def extract_results(cls, html: HTMLParser) -> List[Dict[str, Any]]:
+        """Extract completed matches from a results page."""
         result = []
-        for item in html.css("a.wf-module-item"):
-            url_path = item.attributes['href']
-            
-            eta = item.css_first("div.ml-eta").text() + " ago"
+        for item in cls.RESULTS_SCHEMA.extract(html):
+            eta = item["eta"] + " ago"
             
-            rounds = item.css_first("div.match-item-event-series").text()
-            rounds = rounds.replace("\u2013", "-")
+            rounds = item["round_info"].replace("\u2013", "-")
             rounds = clean_text(rounds)
             
-            tourney = item.css_first("div.match-item-event").text()
-            tourney = tourney.replace("\t", " ")
+            tourney = item["tournament"].replace("\t", " ")
             tourney = tourney.strip().split("\n")[1]
             tourney = tourney.strip()
             
-            tourney_icon_url = ""
-            
-            try:
-                team_array = item.css_first("div.match-item-vs").css_first("div:nth-child(2)").text()
-            except:
-                team_array = "TBD"
-            
-            team_array = clean_text(team_array)
+            team_array = clean_text(item["teams"])
             team_array = team_array.strip().split("                                  ")
             
             # Parse team data
@@ -234,10 +550,7 @@ class MatchScraper(BaseScraper):
             team2 = team_array[4].strip()
             score2 = team_array[-1].replace(" ", "").strip()
             
-            # Get flag classes
-            flag_list = extract_flags(item.css('.flag'))
-            flag1 = flag_list[0]
-            flag2 = flag_list[1]
+            flag_list = item["flags"]
             
             result.append(
                 {
@@ -245,74 +558,102 @@ class MatchScraper(BaseScraper):
                     "team2": team2,
                     "score1": score1,
                     "score2": score2,
-                    "flag1": flag1,
-                    "flag2": flag2,
+                    "flag1": flag_list[0],
+                    "flag2": flag_list[1],
                     "time_completed": eta,
                     "round_info": rounds,
                     "tournament_name": tourney,
-                    "match_page": url_path,
-                    "tournament_icon": tourney_icon_url,
+                    "match_page": item["match_page"],
+                    "tournament_icon": item["icon"],
                 }
             )
         
+        return result
+    
+    async def get_match_results(self) -> Dict[str, Any]:
+        """Get match results."""
+        result, status = await self.scrape(RESULTS_URL, self.extract_results, endpoint="results")
+        
         segments = {"status": status, "segments": result}
         data = {"data": segments}
         
         self.check_status(status)
         return data
     
-    async def get_live_score(self, client: httpx.AsyncClient) -> Dict[str, Any]:
-        """Get live match scores."""
-        url = BASE_URL
-        resp = await client.get(url, headers=headers)
-        html = HTMLParser(resp.text)
-        status = resp.status_code
-        
-        result = []
-        first_item = html.css(".js-home-matches-upcoming a.wf-module-item")[0]
+    LIVE_SCHEMA = Schema(
+        ".js-home-matches-upcoming a.wf-module-item",
+        {
+            "href": Field(attr="href"),
+            "teams": Field(".h-match-team-name", many=True, transform=str.strip),
+            "flags": Field(
+                ".h-match-team .flag",
+                attr="class",
+                many=True,
+                transform=lambda cls: cls.replace(" mod-", "").replace("16", "_"),
+            ),
+            "scores": Field(".h-match-team-score", many=True, transform=str.strip),
+            "rounds": Field(".h-match-team-rounds", many=True, raw=True),
+            "eta": Field(".h-match-eta", transform=str.strip),
+            "round_info": Field(".h-match-preview-event", transform=str.strip),
+            "tournament": Field(".h-match-preview-series", transform=str.strip),
+            "timestamp": Field(".moment-tz-convert", attr="data-utc-ts", transform=int),
+        },
+    )
+    
+    @staticmethod
+    def _get_round(rounds: Any) -> str:
+        """Read the rounds won on the current map from a team's rounds node."""
+        current = rounds.css_first("span.mod-t")
+        return current.text().strip() if current else "N/A"
+    
+    @classmethod
+    def _live_record(cls, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the live score record of one home page match."""
+        rounds = [cls._get_round(node) for node in item["rounds"]]
         
-        teams = []
-        flags = []
-        scores = []
-        rounds = []
-        for team in first_item.css(".h-match-team"):
-            teams.append(team.css_first(".h-match-team-name").text().strip())
-            flags.append(team.css_first(".flag").attributes["class"].replace(" mod-", "").replace("16", "_"))
-            scores.append(team.css_first(".h-match-team-score").text().strip())
-            
-            round_elem = team.css_first(".h-match-team-rounds")
-            if round_elem and round_elem.css_first('span.mod-t'):
-                # Using css_first instead of find to match the code style
-                rounds.append(round_elem.css_first('span.mod-t').text().strip())
-            else:
-                rounds.append("N/A")
-        
-        eta = first_item.css_first(".h-match-eta").text().strip()
+        eta = item["eta"]
         if eta != "LIVE":
             eta = eta + " from now"
         
-        rounds_info = first_item.css_first(".h-match-preview-event").text().strip()
-        tournament = first_item.css_first(".h-match-preview-series").text().strip()
-        timestamp = int(first_item.css_first(".moment-tz-convert").attributes["data-utc-ts"])
-        url_path = url + "/" + first_item.attributes["href"]
-        
-        result.append(
-            {
-                "team1": teams[0],
-                "team2": teams[1],
-                "flag1": flags[0],
-                "flag2": flags[1],
-                "score1": scores[0],
-                "score2": scores[1],
-                "round1": rounds[0],
-                "round2": rounds[1],
-                "time_until_match": eta,
-                "round_info": rounds_info,
-                "tournament_name": tournament,
-                "unix_timestamp": timestamp,
-                "match_page": url_path
-            }
-        )
+        return {
+            "team1": item["teams"][0],
+            "team2": item["teams"][1],
+            "flag1": item["flags"][0],
+            "flag2": item["flags"][1],
+            "score1": item["scores"][0],
+            "score2": item["scores"][1],
+            "round1": rounds[0],
+            "round2": rounds[1],
+            "time_until_match": eta,
+            "round_info": item["round_info"],
+            "tournament_name": item["tournament"],
+            "unix_timestamp": item["timestamp"],
+            "match_page": BASE_URL + "/" + item["href"]
+        }
+    
+    @classmethod
+    def extract_live_score(cls, html: HTMLParser) -> List[Dict[str, Any]]:
+        """Extract the first match shown on the home page."""
+        return [cls._live_record(item) for item in cls.LIVE_SCHEMA.extract(html, limit=1)]
+    
+    @classmethod
+    def extract_live_matches(cls, html: HTMLParser) -> List[Dict[str, Any]]:
+        """Extract every match currently live on the home page."""
+        return [cls._live_record(item) for item in cls.LIVE_SCHEMA.extract(html) if item["eta"] == "LIVE"]
+    
+    async def get_live_score(self) -> Dict[str, Any]:
+        """Get live match scores."""
+        result, status = await self.scrape(BASE_URL, self.extract_live_score, endpoint="live_score")
+        
+        segments = {"status": status, "segments": result}
+        data = {"data": segments}
+        
+        self.check_status(status)
+        return data
+    
+    async def get_live_matches(self) -> Dict[str, Any]:
+        """Get every live match."""
+        result, status = await self.scrape(BASE_URL, self.extract_live_matches, endpoint="live_score")
         
         segments = {"status": status, "segments": result}
         data = {"data": segments}
@@ -324,135 +665,160 @@ class MatchScraper(BaseScraper):
 class StatsScraper(BaseScraper):
     """Scraper for VLR player statistics."""
     
-    async def get_player_stats(self, region: str, timespan: int, client: httpx.AsyncClient) -> Dict[str, Any]:
+    SCHEMA = Schema(
+        "tbody tr",
+        {
+            "row": Field(),
+            "color_sq": Field("td.mod-color-sq", many=True),
+        },
+    )
+    
+    @staticmethod
+    def _player_row(item: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        """Build a player's legacy row, returned with the KAST cell the row leaves out."""
+        player = item["row"].replace("\t", "").replace("\n", " ").strip()
+        player = player.split()
+        player_name = player[0]
+        
+        # Get org name
+        org = player[1] if len(player) > 1 else "N/A"
+        
+        # Get stats
+        acs, kd, kast, adr, kpr, apr, fkpr, fdpr, hs, cl = item["color_sq"][:10]
+        
+        row = {
+            "player": player_name,
+            "org": org,
+            "average_combat_score": acs,
+            "kill_deaths": kd,
+            "average_damage_per_round": adr,
+            "kills_per_round": kpr,
+            "assists_per_round": apr,
+            "first_kills_per_round": fkpr,
+            "first_deaths_per_round": fdpr,
+            "headshot_percentage": hs,
+            "clutch_success_percentage": cl,
+        }
+        return row, kast
+    
+    @classmethod
+    def extract_player_stats(cls, html: HTMLParser) -> List[Dict[str, Any]]:
+        """Extract player rows from the stats table."""
+        return [cls._player_row(item)[0] for item in cls.SCHEMA.extract(html)]
+    
+    @classmethod
+    def extract_stats_table(cls, html: HTMLParser) -> StatsTable:
+        """Extract the stats table into typed columns."""
+        rows, kast = [], []
+        for item in cls.SCHEMA.extract(html):
+            row, kast_cell = cls._player_row(item)
+            rows.append(row)
+            kast.append(kast_cell)
+        return StatsTable.from_rows(rows, extra={"kast": kast})
+    
+    @staticmethod
+    def stats_url(region: str, timespan: int) -> str:
+        """Build the stats page URL of a region and timespan."""
+        return (f"{BASE_URL}/stats/?event_group_id=all&event_id=all&region={region}&country=all&min_rounds=200"
+                f"&min_rating=1550&agent=all&map_id=all&timespan={timespan}d")
+    
+    async def get_player_stats(self, region: str, timespan: int) -> Dict[str, Any]:
         """
         Get player statistics.
         
         Args:
             region: Region code
             timespan: Timespan in days
-            client: Async HTTP client
             
         Returns:
             Dictionary containing player stats
         """
-        url = (f"{BASE_URL}/stats/?event_group_id=all&event_id=all&region={region}&country=all&min_rounds=200"
-               f"&min_rating=1550&agent=all&map_id=all&timespan={timespan}d")
-        
-        resp = await client.get(url, headers=headers)
-        html = HTMLParser(resp.text)
-        status = resp.status_code
-        
-        result = []
-        for item in html.css("tbody tr"):
-            player = item.text().replace("\t", "").replace("\n", " ").strip()
-            player = player.split()
-            player_name = player[0]
-            
-            # Get org name
-            try:
-                org = player[1]
-            except:
-                org = "N/A"
-            
-            # Get stats
-            color_sq = [stats.text() for stats in item.css("td.mod-color-sq")]
-            acs = color_sq[0]
-            kd = color_sq[1]
-            kast = color_sq[2]
-            adr = color_sq[3]
-            kpr = color_sq[4]
-            apr = color_sq[5]
-            fkpr = color_sq[6]
-            fdpr = color_sq[7]
-            hs = color_sq[8]
-            cl = color_sq[9]
-            
-            result.append(
-                {
-                    "player": player_name,
-                    "org": org,
-                    "average_combat_score": acs,
-                    "kill_deaths": kd,
-                    "average_damage_per_round": adr,
-                    "kills_per_round": kpr,
-                    "assists_per_round": apr,
-                    "first_kills_per_round": fkpr,
-                    "first_deaths_per_round": fdpr,
-                    "headshot_percentage": hs,
-                    "clutch_success_percentage": cl,
-                }
-            )
+        result, status = await self.scrape(self.stats_url(region, timespan), self.extract_player_stats, endpoint="stats")
         
         segments = {"status": status, "segments": result}
         data = {"data": segments}
         
         self.check_status(status)
         return data
-
-
-class RankingScraper(BaseScraper):
-    """Scraper for VLR team rankings."""
     
-    async def get_rankings(self, region: str, client: httpx.AsyncClient) -> Dict[str, Any]:
+    async def get_stats_table(self, region: str, timespan: int) -> StatsTable:
         """
-        Get team rankings.
+        Get player statistics as a typed table.
         
         Args:
             region: Region code
-            client: Async HTTP client
+            timespan: Timespan in days
             
         Returns:
-            Dictionary containing team rankings
+            The stats table parsed into columns
         """
-        url = f"{RANKINGS_URL}/{region_map[region]}"
-        resp = await client.get(url, headers=headers)
-        html = HTMLParser(resp.text)
-        status = resp.status_code
-        
+        table, status = await self.scrape(self.stats_url(region, timespan), self.extract_stats_table, endpoint="stats")
+        self.check_status(status)
+        return table
+
+
+class RankingScraper(BaseScraper):
+    """Scraper for VLR team rankings."""
+    
+    SCHEMA = Schema(
+        "div.rank-item",
+        {
+            "rank": Field("div.rank-item-rank-num", transform=str.strip),
+            "team": Field("div.ge-text", transform=lambda team: team.split("#")[0].strip()),
+            "country": Field("div.rank-item-team-country"),
+            "last_played": Field("a.rank-item-last", transform=lambda last: last.replace('\n', '').replace('\t', '')),
+            "record": Field("div.rank-item-record", transform=clean_text),
+            "earnings": Field("div.rank-item-earnings", transform=clean_text),
+            "logo": Field("div.rank-item-team img", attr="src", transform=proxy_image_url, default=""),
+            "last_played_logo": Field("a.rank-item-last img", attr="src", transform=proxy_image_url, default=""),
+        },
+    )
+    
+    @classmethod
+    def extract_rankings(cls, html: HTMLParser) -> List[Dict[str, Any]]:
+        """Extract ranked teams from a rankings page."""
         result = []
-        for item in html.css("div.rank-item"):
-            # Get team ranking
-            rank = item.css_first("div.rank-item-rank-num").text().strip()
-            
-            # Get team name
-            team = item.css_first("div.ge-text").text()
-            team = team.split("#")[0]
-            
-            # Keep logo fields empty by request
-            logo = ""
-            
-            # Get team country
-            country = item.css_first("div.rank-item-team-country").text()
-            
-            # Process last played info
-            last_played = item.css_first("a.rank-item-last").text()
-            last_played = last_played.replace('\n', '').replace('\t', '').split('v')[0]
-            
-            last_played_team = item.css_first("a.rank-item-last").text()
-            last_played_team = last_played_team.replace('\t', '').replace('\n', '').split('o')[1]
+        for item in cls.SCHEMA.extract(html):
+            # Process last played info ("<when> vs. <team>")
+            last_played = item["last_played"].split('v')[0]
+            last_played_team = item["last_played"].split('o')[1]
             last_played_team = last_played_team.replace('.', '. ')
             
-            last_played_team_logo = ""
-            
-            # Get record and earnings
-            record = clean_text(item.css_first("div.rank-item-record").text())
-            earnings = clean_text(item.css_first("div.rank-item-earnings").text())
-            
             result.append(
                 {
-                    "rank": rank,
-                    "team": team.strip(),
-                    "country": country,
+                    "rank": item["rank"],
+                    "team": item["team"],
+                    "country": item["country"],
                     "last_played": last_played.strip(),
                     "last_played_team": last_played_team.strip(),
-                    "last_played_team_logo": last_played_team_logo,
-                    "record": record,
-                    "earnings": earnings,
-                    "logo": logo,
+                    "last_played_team_logo": item["last_played_logo"],
+                    "record": item["record"],
+                    "earnings": item["earnings"],
+                    "logo": item["logo"],
                 }
             )
         
+        return result
+    
+    async def get_rankings(self, region: str) -> Dict[str, Any]:
+        """
+        Get team rankings.
+        
+        Args:
+            region: Region code
+            
+        Returns:
+            Dictionary containing team rankings
+            
+        Raises:
+            NotFound: If the region is unknown
+        """
+        if region not in region_map:
+            # Bad input, not an upstream failure: must not count against the breaker
+            raise NotFound(f"Unknown region: {region}")
+        url = f"{RANKINGS_URL}/{region_map[region]}"
+        result, status = await self.scrape(url, self.extract_rankings, endpoint="rankings")
+        
         data = {"status": status, "data": result}
         
         self.check_status(status)
@@ -462,54 +828,161 @@ class RankingScraper(BaseScraper):
 class Vlr:
     """Main VLR API class that combines all scrapers."""
     
-    def __init__(self):
-        self.news_scraper = NewsScraper()
-        self.match_scraper = MatchScraper()
-        self.stats_scraper = StatsScraper()
-        self.ranking_scraper = RankingScraper()
-        # Simple caching with timestamp
-        self.results_cache = None
-        self.last_fetch_time = 0
-        self.cache_duration = 300  # 5 minutes cache
-    
-    async def vlr_recent(self, client: httpx.AsyncClient):
+    def __init__(
+        self,
+        upstream: Optional[UpstreamClient] = None,
+        executor: Optional[ParseExecutor] = None,
+        images: Optional[ImageProxy] = None,
+    ):
+        """
+        Args:
+            upstream: Upstream client shared by every scraper
+            executor: Parse executor shared by every scraper
+            images: Image proxy prefetching the images linked from fresh results
+        """
+        self.upstream = upstream if upstream is not None else UpstreamClient()
+        self.executor = executor if executor is not None else ParseExecutor("inline")
+        # Coalesce identical scrapes (URL and extractor) and identical facade calls
+        self.scrape_flight = SingleFlight("scrape")
+        self.flight = SingleFlight("vlr")
+        # Extraction results memoized by URL and body hash
+        self.memo = LRUCache(config.PARSE_MEMO_SIZE)
+        shared = (self.upstream, self.scrape_flight, self.memo, self.executor)
+        self.news_scraper = NewsScraper(*shared)
+        self.match_scraper = MatchScraper(*shared)
+        self.stats_scraper = StatsScraper(*shared)
+        self.ranking_scraper = RankingScraper(*shared)
+        # One circuit breaker per facade route, and the last successful result per call
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.last_good: LRUCache[Tuple[Any, float]] = LRUCache(config.LAST_GOOD_SIZE)
+        # Snapshot left by a previous process (api.snapshot), restored call by call
+        self.snapshot: Any = None
+        self.images = images
+    
+    @property
+    def scrapers(self) -> List[BaseScraper]:
+        """Every scraper owned by the facade."""
+        return [self.news_scraper, self.match_scraper, self.stats_scraper, self.ranking_scraper]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Report coalescing, conditional request, parse memo, parse pool and circuit breaker statistics."""
+        return {
+            "singleflight": [self.flight.stats(), self.scrape_flight.stats()],
+            "upstream": self.upstream.stats(),
+            "parse_executor": self.executor.stats(),
+            "parse_memo": {
+                "entries": len(self.memo),
+                "hits": sum(scraper.memo_hits for scraper in self.scrapers),
+            },
+            "breakers": {route: breaker.stats() for route, breaker in self.breakers.items()},
+        }
+    
+    async def _call(self, key: Tuple[Any, ...], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a facade call once among concurrent callers, behind its route's circuit breaker.
+
+        Args:
+            key: Call identity; its first element names the route
+            fetch: Zero-argument coroutine factory performing the scrape
+
+        Returns:
+            The fresh result or, while upstream is failing, the last good one marked stale
+        """
+        started = time.perf_counter()
+        try:
+            return await self.flight.do(key, lambda: self._guarded(key, fetch))
+        finally:
+            FACADE_SECONDS.labels(method=key[0]).observe(time.perf_counter() - started)
+    
+    async def _guarded(self, key: Tuple[Any, ...], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Call upstream unless the route's circuit is open, falling back to the last good result."""
+        route = key[0]
+        breaker = self.breakers.get(route)
+        if breaker is None:
+            breaker = self.breakers[route] = CircuitBreaker(route)
+        
+        try:
+            breaker.before_call()
+            result = await fetch()
+        except CircuitOpen as e:
+            return self._last_good_or_raise(key, e)
+        except UpstreamError as e:
+            if not e.retryable:
+                # The route works, the request was bad (e.g. a 404 for an unknown match)
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            return self._last_good_or_raise(key, e)
+        except Exception as e:
+            # A page that no longer parses counts as a failing route too
+            breaker.record_failure()
+            return self._last_good_or_raise(key, e)
+        
+        breaker.record_success()
+        self.last_good.set(key, (result, time.time()))
+        if self.images is not None:
+            self.images.prefetch(image_paths(result))
+        return result
+    
+    def _last_good_or_raise(self, key: Tuple[Any, ...], error: Exception) -> Any:
+        """Return the last good result for a call marked stale with its age, or re-raise the error."""
+        last_good = self.last_good.get(key)
+        if last_good is None and self.snapshot is not None:
+            last_good = self.snapshot.take_last_good(key)
+            if last_good is not None:
+                self.last_good.set(key, last_good)
+        # Only dictionary results can carry the stale marker
+        if last_good is None or not isinstance(last_good[0], dict):
+            raise error
+        result, fetched_at = last_good
+        return {**result, "stale": {"age": round(time.time() - fetched_at), "reason": str(error)}}
+    
+    async def vlr_recent(self):
         """Get recent news."""
-        return await self.news_scraper.get_recent_news(client)
+        return await self._call(("vlr_recent",), lambda: self.news_scraper.get_recent_news())
     
-    async def vlr_results(self, client: httpx.AsyncClient):
-        """Get match results with simple caching."""
-        import time
-        current_time = time.time()
-        
-        # Check if we need to refresh the cache
-        if self.results_cache is None or (current_time - self.last_fetch_time) >= self.cache_duration:
-            # Cache is empty or expired, get fresh data
-            self.results_cache = await self.match_scraper.get_match_results(client)
-            self.last_fetch_time = current_time
-        
-        return self.results_cache
+    async def vlr_results(self):
+        """Get match results."""
+        return await self._call(("vlr_results",), lambda: self.match_scraper.get_match_results())
     
-    async def vlr_stats(self, region: str, timespan: int, client: httpx.AsyncClient):
+    async def vlr_stats(self, region: str, timespan: int):
         """Get player stats."""
-        return await self.stats_scraper.get_player_stats(region, timespan, client)
+        return await self._call(("vlr_stats", region, timespan), lambda: self.stats_scraper.get_player_stats(region, timespan))
+    
+    async def vlr_stats_table(self, region: str, timespan: int):
+        """Get player stats as a typed table."""
+        return await self._call(("vlr_stats_table", region, timespan), lambda: self.stats_scraper.get_stats_table(region, timespan))
     
-    async def vlr_rankings(self, region: str, client: httpx.AsyncClient):
+    async def vlr_rankings(self, region: str):
         """Get team rankings."""
-        return await self.ranking_scraper.get_rankings(region, client)
+        return await self._call(("vlr_rankings", region), lambda: self.ranking_scraper.get_rankings(region))
     
-    async def vlr_upcoming(self, client: httpx.AsyncClient):
+    async def vlr_upcoming(self):
         """Get upcoming matches."""
-        return await self.match_scraper.get_upcoming_matches(client)
+        return await self._call(("vlr_upcoming",), lambda: self.match_scraper.get_upcoming_matches())
     
-    async def vlr_live_score(self, client: httpx.AsyncClient):
+    async def vlr_upcoming_stream(self) -> AsyncIterator[Dict[str, Any]]:
+        """Stream upcoming matches as each page is parsed (see MatchScraper.stream_upcoming_matches)."""
+        return await self.match_scraper.stream_upcoming_matches()
+    
+    async def vlr_live_score(self):
         """Get live scores."""
-        return await self.match_scraper.get_live_score(client)
+        return await self._call(("vlr_live_score",), lambda: self.match_scraper.get_live_score())
+    
+    async def vlr_live_matches(self):
+        """Get every live match."""
+        return await self._call(("vlr_live_matches",), lambda: self.match_scraper.get_live_matches())
     
-    async def vlr_streams(self, match: str, client: httpx.AsyncClient):
+    async def vlr_streams(self, match: str):
         """Get match streams."""
-        return await self.match_scraper.get_streams(match, client)
+        return await self._call(("vlr_streams", match), lambda: self.match_scraper.get_streams(match))
+    
+    async def vlr_match(self, match: str):
+        """Get a match's detail."""
+        return await self._call(("vlr_match", match), lambda: self.match_scraper.get_match_detail(match))
 
 
 if __name__ == '__main__':
+    import asyncio
     vlr = Vlr()
-    print(vlr.vlr_upcoming())
+    print(asyncio.run(vlr.vlr_upcoming()))
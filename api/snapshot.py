@@ -0,0 +1,332 @@
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from api.cache import CacheEntry, InMemoryCacheBackend
+from api.cache_backends import decode_entry, encode_entry
+from api.encoding import dumps, loads
+from utils import config
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"VLRSNAP1"
+# Length of the JSON index that follows the magic bytes
+_INDEX_LENGTH = struct.Struct(">I")
+
+# (key, deadline, encoded bytes): a cache entry's deadline is its stale
+# deadline, a last good result's is the time it was fetched
+Record = Tuple[Any, float, bytes]
+
+
+def write_snapshot(path: str, entries: List[Record], last_good: List[Record]) -> int:
+    """
+    Write a snapshot file, replacing the previous one atomically.
+
+    The file holds the magic bytes, the length of a JSON index, the index
+    (every key with its deadline, offset and size) and the encoded records,
+    so a reader can look one up without decoding the others.
+
+    Args:
+        path: Snapshot file path (parent directories are created)
+        entries: Response cache records, encoded with `encode_entry`
+        last_good: Facade last good results, zlib-compressed JSON
+
+    Returns:
+        Size of the file in bytes
+    """
+    index: Dict[str, Any] = {"written_at": time.time(), "entries": [], "last_good": []}
+    offset = 0
+    blobs = []
+    for name, records in (("entries", entries), ("last_good", last_good)):
+        for key, deadline, blob in records:
+            index[name].append([key, deadline, offset, len(blob)])
+            blobs.append(blob)
+            offset += len(blob)
+    header = json.dumps(index, separators=(",", ":")).encode("utf-8")
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(_INDEX_LENGTH.pack(len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(temporary, path)
+    return len(MAGIC) + _INDEX_LENGTH.size + len(header) + offset
+
+
+class Snapshot:
+    """
+    A snapshot file opened for lazy restore.
+
+    Only the index is read when opening. Each record is decoded the first
+    time its key is looked up (and then forgotten by the snapshot), so a
+    large snapshot does not delay startup. Records still pending are copied
+    as is into the next snapshot.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Snapshot file path
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If it is not a snapshot
+        """
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._data[:len(MAGIC)] != MAGIC:
+            self._data.close()
+            raise ValueError(f"{path} is not a cache snapshot")
+        (length,) = _INDEX_LENGTH.unpack_from(self._data, len(MAGIC))
+        start = len(MAGIC) + _INDEX_LENGTH.size
+        index = json.loads(self._data[start:start + length])
+        base = start + length
+
+        now = time.time()
+        self.written_at: float = index["written_at"]
+        # Expired entries are dropped right away
+        self.entries: Dict[str, Tuple[float, int, int]] = {
+            key: (stale_until, base + offset, size)
+            for key, stale_until, offset, size in index["entries"]
+            if stale_until > now
+        }
+        self.last_good: Dict[Hashable, Tuple[float, int, int]] = {
+            tuple(key): (fetched_at, base + offset, size) for key, fetched_at, offset, size in index["last_good"]
+        }
+        self.restored = 0
+
+    @classmethod
+    def open(cls, path: str) -> Optional["Snapshot"]:
+        """
+        Open a snapshot file if there is a readable one.
+
+        Args:
+            path: Snapshot file path
+
+        Returns:
+            The snapshot, or None if the file is missing or unreadable
+        """
+        try:
+            return cls(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring cache snapshot %s: %s", path, e)
+            return None
+
+    def _read(self, offset: int, size: int) -> bytes:
+        """Bytes of one record."""
+        return self._data[offset:offset + size]
+
+    def take(self, key: str) -> Optional[CacheEntry]:
+        """
+        Restore a response cache entry.
+
+        Args:
+            key: Full cache key
+
+        Returns:
+            The entry, or None if the snapshot has no usable entry for the key
+        """
+        record = self.entries.pop(key, None)
+        if record is None:
+            return None
+        stale_until, offset, size = record
+        if stale_until <= time.time():
+            return None
+        try:
+            entry = decode_entry(self._read(offset, size))
+        except Exception as e:
+            logger.warning("Cannot restore %s from the cache snapshot: %s", key, e)
+            return None
+        self.restored += 1
+        return entry
+
+    def take_last_good(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """
+        Restore a facade call's last good result.
+
+        Args:
+            key: Facade call key
+
+        Returns:
+            (result, fetched_at), or None if the snapshot has none for the key
+        """
+        record = self.last_good.pop(key, None)
+        if record is None:
+            return None
+        fetched_at, offset, size = record
+        try:
+            result = loads(zlib.decompress(self._read(offset, size)))
+        except Exception as e:
+            logger.warning("Cannot restore last good result %s from the cache snapshot: %s", key, e)
+            return None
+        self.restored += 1
+        return result, fetched_at
+
+    def discard(self, key: str) -> None:
+        """Forget a response cache entry (e.g. deleted before it was restored)."""
+        self.entries.pop(key, None)
+
+    def pending(self) -> Tuple[List[Record], List[Record]]:
+        """Records not restored yet (and not expired), as they are stored in the file."""
+        now = time.time()
+        entries = [
+            (key, stale_until, self._read(offset, size))
+            for key, (stale_until, offset, size) in self.entries.items()
+            if stale_until > now
+        ]
+        last_good = [
+            (list(key), fetched_at, self._read(offset, size))
+            for key, (fetched_at, offset, size) in self.last_good.items()
+        ]
+        return entries, last_good
+
+    def close(self) -> None:
+        """Release the mapped file."""
+        self.entries.clear()
+        self.last_good.clear()
+        self._data.close()
+
+
+class CacheSnapshotter:
+    """
+    Saves the in-memory response cache and the facade's last good results to
+    a snapshot file, and restores them lazily in a new process.
+
+    Only JSON-compatible values are saved: route bodies, batch results and
+    dictionary facade results. Restored entries keep their original deadlines.
+    """
+
+    def __init__(self, backend: Any, vlr: Any, path: Optional[str] = None, interval: Optional[float] = None):
+        """
+        Args:
+            backend: Response cache backend (only an in-memory one is saved)
+            vlr: Facade whose last good results are saved
+            path: Snapshot file path (empty disables snapshots)
+            interval: Seconds between periodic snapshots (0 only saves at shutdown)
+        """
+        self.backend = backend if isinstance(backend, InMemoryCacheBackend) else None
+        self.vlr = vlr
+        self.path = config.SNAPSHOT_PATH if path is None else path
+        self.interval = config.SNAPSHOT_INTERVAL if interval is None else interval
+        self.snapshot: Optional[Snapshot] = None
+        self.saves = 0
+        self.last_save: Optional[float] = None
+        self.last_size = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether snapshots are configured and there is an in-memory cache to save."""
+        return bool(self.path) and self.backend is not None
+
+    def restore(self) -> bool:
+        """
+        Open the snapshot left by a previous process, restoring its records on first lookup.
+
+        Returns:
+            Whether a snapshot was found
+        """
+        if not self.enabled:
+            return False
+        snapshot = Snapshot.open(self.path)
+        if snapshot is None:
+            return False
+        self.snapshot = snapshot
+        self.backend.snapshot = snapshot
+        self.vlr.snapshot = snapshot
+        logger.info(
+            "Restoring %d cache entries and %d last good results from %s",
+            len(snapshot.entries), len(snapshot.last_good), self.path,
+        )
+        return True
+
+    def _collect(self) -> Tuple[List[Tuple[str, CacheEntry]], List[Tuple[Any, Tuple[Any, float]]], List[Record], List[Record]]:
+        """Copy what is to be saved (on the event loop, so nothing changes meanwhile)."""
+        entries = self.backend.items()
+        last_good = [(key, value) for key, value in self.vlr.last_good.items() if isinstance(value[0], dict)]
+        pending_entries: List[Record] = []
+        pending_last_good: List[Record] = []
+        if self.backend.snapshot is not None:
+            pending_entries, _ = self.backend.snapshot.pending()
+        if self.vlr.snapshot is not None:
+            _, pending_last_good = self.vlr.snapshot.pending()
+        return entries, last_good, pending_entries, pending_last_good
+
+    def _write(
+        self,
+        entries: List[Tuple[str, CacheEntry]],
+        last_good: List[Tuple[Any, Tuple[Any, float]]],
+        pending_entries: List[Record],
+        pending_last_good: List[Record],
+    ) -> int:
+        """Encode the collected values and write the file."""
+        entry_records: List[Record] = []
+        for key, entry in entries:
+            try:
+                entry_records.append((key, entry.stale_until, encode_entry(entry, config.CACHE_COMPRESS_MIN_BYTES)))
+            except (TypeError, ValueError):
+                # Not JSON-compatible, it is fetched again after a restart
+                continue
+        saved = {key for key, _, _ in entry_records}
+        entry_records.extend(record for record in pending_entries if record[0] not in saved)
+
+        last_good_records: List[Record] = []
+        for key, (result, fetched_at) in last_good:
+            try:
+                last_good_records.append((list(key), fetched_at, zlib.compress(dumps(result))))
+            except (TypeError, ValueError):
+                continue
+        saved_calls = {tuple(key) for key, _, _ in last_good_records}
+        last_good_records.extend(record for record in pending_last_good if tuple(record[0]) not in saved_calls)
+
+        return write_snapshot(self.path, entry_records, last_good_records)
+
+    async def save(self) -> Optional[int]:
+        """
+        Write a snapshot now.
+
+        Returns:
+            Size of the file in bytes, or None if snapshots are disabled or writing failed
+        """
+        if not self.enabled:
+            return None
+        collected = self._collect()
+        try:
+            size = await asyncio.to_thread(self._write, *collected)
+        except OSError as e:
+            logger.warning("Cannot write cache snapshot %s: %s", self.path, e)
+            return None
+        self.saves += 1
+        self.last_save = time.time()
+        self.last_size = size
+        return size
+
+    async def run_forever(self) -> None:
+        """Save a snapshot every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save()
+
+    def stats(self) -> Dict[str, Any]:
+        """Report snapshot saves and restore progress."""
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "saves": self.saves,
+            "last_save": self.last_save,
+            "last_size": self.last_size,
+            "restored": self.snapshot.restored if self.snapshot is not None else 0,
+            "pending": len(self.snapshot.entries) + len(self.snapshot.last_good) if self.snapshot is not None else 0,
+        }
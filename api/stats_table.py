@@ -0,0 +1,329 @@
+import math
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from api.cache import InMemoryCacheBackend, ResponseCache
+from utils.constants import stat_columns
+
+try:
+    import numpy as np
+except ImportError:  # Optional: stdlib arrays and plain loops are used instead
+    np = None
+
+# Columns of a stats table: the legacy stat columns plus KAST, which the
+# legacy rows do not include
+TABLE_COLUMNS: List[str] = stat_columns + ["kast"]
+
+NAN = float("nan")
+
+
+def stat_value(value: Optional[str]) -> Optional[float]:
+    """
+    Read a numeric stat as scraped ("245.3", "1.25", "27%").
+
+    Args:
+        value: Stat text
+
+    Returns:
+        The number, or None when the cell is empty or not numeric
+    """
+    if not value:
+        return None
+    try:
+        return float(value.strip().rstrip("%"))
+    except ValueError:
+        return None
+
+
+def parse_range(spec: str) -> Tuple[str, Optional[float], Optional[float]]:
+    """
+    Parse a range filter written as "column:min:max" (either bound may be empty).
+
+    Args:
+        spec: Filter text, e.g. "average_combat_score:220:" or "kill_deaths::0.9"
+
+    Returns:
+        (column, minimum, maximum)
+
+    Raises:
+        ValueError: If the column or a bound is invalid
+    """
+    parts = spec.split(":")
+    if len(parts) != 3 or parts[0] not in TABLE_COLUMNS:
+        raise ValueError(f"Filter must be column:min:max with a column among: {', '.join(TABLE_COLUMNS)}")
+    name, low, high = parts
+    return name, float(low) if low else None, float(high) if high else None
+
+
+def _json_number(value: float) -> Optional[float]:
+    """Convert a column value for JSON output (NaN becomes None)."""
+    value = float(value)
+    return None if math.isnan(value) else round(value, 4)
+
+
+class StatsTable:
+    """
+    Player stats parsed once into typed, array-backed columns.
+
+    Every stat column is a float64 array (NumPy when installed, otherwise
+    `array("d")`) with percent signs stripped and missing cells stored as NaN.
+    Filtering, sorting, percentiles and z-scores run over these columns
+    instead of re-parsing strings. The legacy dict rows are kept alongside.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], columns: Dict[str, Sequence[float]]):
+        """
+        Args:
+            rows: Legacy player rows, in table order
+            columns: Column name to values (one per row)
+        """
+        self.rows = rows
+        self.players = [row["player"] for row in rows]
+        self.orgs = [row["org"] for row in rows]
+        if np is not None:
+            self.columns = {name: np.asarray(values, dtype=np.float64) for name, values in columns.items()}
+        else:
+            self.columns = {name: array("d", values) for name, values in columns.items()}
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]], extra: Optional[Dict[str, List[str]]] = None) -> "StatsTable":
+        """
+        Build a table from legacy rows.
+
+        Args:
+            rows: Legacy player rows with stat strings
+            extra: Additional raw string columns (e.g. "kast")
+
+        Returns:
+            The typed table
+        """
+        raw = {name: [row.get(name) for row in rows] for name in stat_columns}
+        raw.update(extra or {})
+        columns = {}
+        for name in TABLE_COLUMNS:
+            numbers = [stat_value(value) for value in raw.get(name, [None] * len(rows))]
+            columns[name] = [NAN if number is None else number for number in numbers]
+        return cls(rows, columns)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def select(self, filters: List[Tuple[str, Optional[float], Optional[float]]]) -> Sequence[int]:
+        """
+        Indices of the rows inside every range (rows missing a filtered value are dropped).
+
+        Args:
+            filters: (column, minimum, maximum) triples, bounds inclusive
+
+        Returns:
+            Matching row indices in table order
+        """
+        if np is not None:
+            mask = np.ones(len(self), dtype=bool)
+            for name, low, high in filters:
+                column = self.columns[name]
+                if low is not None:
+                    mask &= column >= low
+                if high is not None:
+                    mask &= column <= high
+            return np.flatnonzero(mask)
+
+        indices = range(len(self))
+        for name, low, high in filters:
+            column = self.columns[name]
+            indices = [
+                i for i in indices
+                if (low is None or column[i] >= low) and (high is None or column[i] <= high)
+            ]
+        return list(indices)
+
+    def order(self, indices: Sequence[int], name: str, descending: bool = True) -> Sequence[int]:
+        """
+        Sort row indices on a column; rows without a value always come last.
+
+        Args:
+            indices: Row indices to sort
+            name: Column name
+            descending: Highest values first
+
+        Returns:
+            The sorted indices (stable for equal values)
+        """
+        column = self.columns[name]
+        if np is not None:
+            indices = np.asarray(indices, dtype=np.intp)
+            values = column[indices]
+            keys = -values if descending else values
+            # NaN sorts last in NumPy whatever the sign
+            return indices[np.argsort(keys, kind="stable")]
+
+        valued = [i for i in indices if not math.isnan(column[i])]
+        missing = [i for i in indices if math.isnan(column[i])]
+        return sorted(valued, key=column.__getitem__, reverse=descending) + missing
+
+    def percentiles(self, name: str, quantiles: List[float]) -> Dict[str, Optional[float]]:
+        """
+        Percentiles of a column, ignoring missing values (linear interpolation).
+
+        Args:
+            name: Column name
+            quantiles: Percentiles between 0 and 100
+
+        Returns:
+            "p<q>" to value (None if the column has no values)
+
+        Raises:
+            ValueError: If a percentile is outside 0..100
+        """
+        for q in quantiles:
+            if not 0 <= q <= 100:
+                raise ValueError(f"Percentiles must be between 0 and 100, got {q:g}")
+        column = self.columns[name]
+        if np is not None:
+            values = column[~np.isnan(column)]
+            if values.size == 0:
+                return {f"p{q:g}": None for q in quantiles}
+            return {f"p{q:g}": _json_number(value) for q, value in zip(quantiles, np.percentile(values, quantiles))}
+
+        values = sorted(value for value in column if not math.isnan(value))
+        result = {}
+        for q in quantiles:
+            if not values:
+                result[f"p{q:g}"] = None
+                continue
+            position = q / 100 * (len(values) - 1)
+            low = math.floor(position)
+            high = min(low + 1, len(values) - 1)
+            result[f"p{q:g}"] = _json_number(values[low] + (values[high] - values[low]) * (position - low))
+        return result
+
+    def zscores(self, name: str) -> Sequence[float]:
+        """
+        Standard scores of a column (population standard deviation).
+
+        Args:
+            name: Column name
+
+        Returns:
+            One z-score per row (NaN where the value is missing, 0 when all values are equal)
+        """
+        column = self.columns[name]
+        if np is not None:
+            if np.isnan(column).all():
+                return column.copy()
+            std = np.nanstd(column)
+            if not std:
+                return np.where(np.isnan(column), NAN, 0.0)
+            return (column - np.nanmean(column)) / std
+
+        values = [value for value in column if not math.isnan(value)]
+        if not values:
+            return array("d", [NAN] * len(column))
+        mean = sum(values) / len(values)
+        std = math.sqrt(sum((value - mean) ** 2 for value in values) / len(values))
+        return array("d", [
+            NAN if math.isnan(value) else (0.0 if not std else (value - mean) / std) for value in column
+        ])
+
+    def query(
+        self,
+        filters: Optional[List[Tuple[str, Optional[float], Optional[float]]]] = None,
+        sort: Optional[str] = None,
+        descending: bool = True,
+        limit: Optional[int] = None,
+        percentiles: Optional[List[float]] = None,
+        zscores: Optional[List[str]] = None,
+        columnar: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Filter, sort and describe the table.
+
+        Args:
+            filters: Range filters (see `select`)
+            sort: Column to sort on (table order when None)
+            descending: Highest values first
+            limit: Number of rows to return
+            percentiles: Percentiles computed for every column over the whole table
+            zscores: Columns whose z-scores are added to each row under "z"
+            columnar: Return columns instead of legacy rows
+
+        Returns:
+            Dictionary with "segments" (legacy rows) or "columns", and
+            "percentiles" when requested
+        """
+        for name in [sort, *(zscores or [])]:
+            if name is not None and name not in self.columns:
+                raise ValueError(f"Unknown column: {name}")
+        if limit is not None and limit < 1:
+            raise ValueError("Limit must be positive")
+
+        indices = self.select(filters or [])
+        if sort is not None:
+            indices = self.order(indices, sort, descending)
+        indices = [int(i) for i in indices][:limit]
+
+        result: Dict[str, Any] = {}
+        scores = {name: self.zscores(name) for name in zscores or []}
+        if columnar:
+            result["columns"] = {
+                "player": [self.players[i] for i in indices],
+                "org": [self.orgs[i] for i in indices],
+                **{name: [_json_number(column[i]) for i in indices] for name, column in self.columns.items()},
+                **{f"{name}_z": [_json_number(values[i]) for i in indices] for name, values in scores.items()},
+            }
+        else:
+            segments = []
+            for i in indices:
+                row = dict(self.rows[i])
+                if scores:
+                    row["z"] = {name: _json_number(values[i]) for name, values in scores.items()}
+                segments.append(row)
+            result["segments"] = segments
+
+        if percentiles:
+            result["percentiles"] = {name: self.percentiles(name, percentiles) for name in self.columns}
+        return result
+
+
+class StatsAnalytics:
+    """
+    Serves stats queries from typed tables cached in process.
+
+    Tables follow the "vlrapi-stats" cache policy, so a region's page is
+    fetched and parsed into columns once per refresh, however many different
+    queries are run over it.
+    """
+
+    def __init__(self, vlr: Any):
+        """
+        Args:
+            vlr: Facade providing `vlr_stats_table`
+        """
+        self.vlr = vlr
+        # Tables hold arrays, so they stay in process whatever CACHE_BACKEND is
+        self.tables = ResponseCache(InMemoryCacheBackend(), prefix="tables")
+
+    async def table(self, region: str, timespan: int) -> StatsTable:
+        """Get the typed table of a region and timespan."""
+        return await self.tables.get_or_fetch(
+            "vlrapi-stats", f"{region}/{timespan}", lambda: self.vlr.vlr_stats_table(region, timespan)
+        )
+
+    async def query(self, region: str, timespan: int, **params: Any) -> Dict[str, Any]:
+        """
+        Run a query over a region's table.
+
+        Args:
+            region: Region code
+            timespan: Time period in days
+            **params: Arguments of `StatsTable.query`
+
+        Returns:
+            The query result in the usual `{"data": {"status", ...}}` shape
+        """
+        table = await self.table(region, timespan)
+        return {"data": {"status": 200, **table.query(**params)}}
+
+    def stats(self) -> Dict[str, Any]:
+        """Report the table cache counters and the array backend in use."""
+        return {"backend": "numpy" if np is not None else "array", "cache": self.tables.stats()}
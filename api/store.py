@@ -0,0 +1,223 @@
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    match_page TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    match_date TEXT,
+    team1 TEXT COLLATE NOCASE,
+    team2 TEXT COLLATE NOCASE,
+    score1 TEXT,
+    score2 TEXT,
+    flag1 TEXT,
+    flag2 TEXT,
+    tournament_name TEXT COLLATE NOCASE,
+    round_info TEXT,
+    first_seen REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS matches_team1 ON matches (team1);
+CREATE INDEX IF NOT EXISTS matches_team2 ON matches (team2);
+CREATE INDEX IF NOT EXISTS matches_tournament ON matches (tournament_name);
+CREATE INDEX IF NOT EXISTS matches_date ON matches (match_date);
+
+CREATE TABLE IF NOT EXISTS rankings (
+    region TEXT NOT NULL,
+    captured_at REAL NOT NULL,
+    rank TEXT,
+    team TEXT COLLATE NOCASE,
+    country TEXT,
+    record TEXT,
+    earnings TEXT
+);
+CREATE INDEX IF NOT EXISTS rankings_region ON rankings (region, captured_at);
+CREATE INDEX IF NOT EXISTS rankings_team ON rankings (team);
+"""
+
+MATCH_COLUMNS = (
+    "match_page", "state", "match_date", "team1", "team2", "score1", "score2",
+    "flag1", "flag2", "tournament_name", "round_info",
+)
+RANKING_COLUMNS = ("rank", "team", "country", "record", "earnings")
+
+
+class MatchStore:
+    """
+    Indexed SQLite archive of matches and rankings snapshots.
+
+    Matches are keyed by their vlr.gg match page path, so re-ingesting a
+    match (e.g. once an upcoming match completes) updates it in place.
+    Methods are blocking; call them through `asyncio.to_thread` from async code.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Args:
+            path: Database file (":memory:" for a throwaway store)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """The database connection, opened (and the schema created) on first use."""
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            if self.path != ":memory:":
+                connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def known_matches(self, match_pages: Iterable[str], state: str = "completed") -> Set[str]:
+        """
+        Find which of the given matches are already stored.
+
+        Args:
+            match_pages: Match page paths to look up
+            state: Only count matches stored in this state
+
+        Returns:
+            The subset of `match_pages` already stored
+        """
+        match_pages = list(match_pages)
+        if not match_pages:
+            return set()
+        placeholders = ",".join("?" * len(match_pages))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT match_page FROM matches WHERE state = ? AND match_page IN ({placeholders})",
+                [state, *match_pages],
+            ).fetchall()
+        return {row["match_page"] for row in rows}
+
+    def upsert_matches(self, matches: List[Dict[str, Any]]) -> int:
+        """
+        Insert or update matches.
+
+        Args:
+            matches: Records with the MATCH_COLUMNS keys
+
+        Returns:
+            The number of records written
+        """
+        now = time.time()
+        columns = ", ".join(MATCH_COLUMNS)
+        placeholders = ", ".join("?" * len(MATCH_COLUMNS))
+        updates = ", ".join(f"{column} = excluded.{column}" for column in MATCH_COLUMNS[1:])
+        with self._lock, self._db:
+            self._db.executemany(
+                f"INSERT INTO matches ({columns}, first_seen, updated_at) VALUES ({placeholders}, ?, ?) "
+                f"ON CONFLICT (match_page) DO UPDATE SET {updates}, updated_at = excluded.updated_at",
+                [[match.get(column) for column in MATCH_COLUMNS] + [now, now] for match in matches],
+            )
+        return len(matches)
+
+    def add_rankings(self, region: str, rankings: List[Dict[str, Any]], captured_at: Optional[float] = None) -> int:
+        """
+        Store one rankings snapshot.
+
+        Args:
+            region: Region code
+            rankings: Ranked teams as returned by the rankings scraper
+            captured_at: Snapshot time (defaults to now)
+
+        Returns:
+            The number of teams stored
+        """
+        captured_at = time.time() if captured_at is None else captured_at
+        columns = ", ".join(RANKING_COLUMNS)
+        with self._lock, self._db:
+            self._db.executemany(
+                f"INSERT INTO rankings (region, captured_at, {columns}) VALUES (?, ?, {', '.join('?' * len(RANKING_COLUMNS))})",
+                [[region, captured_at] + [team.get(column) for column in RANKING_COLUMNS] for team in rankings],
+            )
+        return len(rankings)
+
+    def find_matches(
+        self,
+        team: Optional[str] = None,
+        tournament: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        state: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Query stored matches.
+
+        Args:
+            team: Team name (either side, case-insensitive)
+            tournament: Substring of the tournament name
+            start: Earliest match date (YYYY-MM-DD, inclusive)
+            end: Latest match date (YYYY-MM-DD, inclusive)
+            state: "completed" or "upcoming"
+            limit: Maximum number of matches
+            offset: Matches to skip
+
+        Returns:
+            Matching records, newest first
+        """
+        clauses, params = [], []
+        if team:
+            clauses.append("(team1 = ? OR team2 = ?)")
+            params += [team, team]
+        if tournament:
+            clauses.append("tournament_name LIKE ?")
+            params.append(f"%{tournament}%")
+        if start:
+            clauses.append("match_date >= ?")
+            params.append(start)
+        if end:
+            clauses.append("match_date <= ?")
+            params.append(end)
+        if state:
+            clauses.append("state = ?")
+            params.append(state)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(MATCH_COLUMNS)} FROM matches {where} "
+                "ORDER BY match_date DESC, first_seen DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest_rankings(self, region: str) -> List[Dict[str, Any]]:
+        """
+        Read the most recent rankings snapshot of a region.
+
+        Args:
+            region: Region code
+
+        Returns:
+            Ranked teams of the latest snapshot (empty if none was stored)
+        """
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT captured_at, {', '.join(RANKING_COLUMNS)} FROM rankings "
+                "WHERE region = ? AND captured_at = (SELECT MAX(captured_at) FROM rankings WHERE region = ?) "
+                "ORDER BY rowid",
+                [region, region],
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Report how many matches and rankings snapshots are stored."""
+        with self._lock:
+            matches = self._db.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+            snapshots = self._db.execute("SELECT COUNT(DISTINCT region || captured_at) FROM rankings").fetchone()[0]
+        return {"matches": matches, "ranking_snapshots": snapshots}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
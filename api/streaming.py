@@ -0,0 +1,50 @@
+import json
+from typing import Any, AsyncIterator
+
+from starlette.requests import Request
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def wants_ndjson(request: Request) -> bool:
+    """
+    Check whether a client asked for a streamed NDJSON response.
+
+    Args:
+        request: Incoming request
+
+    Returns:
+        True for `?stream=1` (or true/yes) or an `Accept: application/x-ndjson` header
+    """
+    if request.query_params.get("stream", "").lower() in ("1", "true", "yes"):
+        return True
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def ndjson_lines(records: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    """
+    Encode records as newline-delimited JSON as they arrive.
+
+    Args:
+        records: Async iterator of JSON-serializable records
+
+    Yields:
+        One encoded line per record
+    """
+    async for record in records:
+        yield (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """
+    Encode one server-sent event.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+
+    Returns:
+        The encoded event, ready to be written to every subscriber
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
@@ -0,0 +1,94 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from utils import config
+
+# Phases reported in Server-Timing, in header order
+PHASES = ("cache", "fetch", "parse", "extract", "serialize")
+
+# Seconds spent per phase by the current request. The dict is shared by the
+# tasks the request spawns (tasks copy the context, not the dict), so work
+# run in single-flight tasks is attributed to the request that started it.
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("server_timings", default=None)
+
+
+def record(phase: str, seconds: float) -> None:
+    """
+    Add time to a phase of the current request (no-op outside a request).
+
+    Args:
+        phase: Phase name, e.g. "fetch"
+        seconds: Time spent
+    """
+    timings = _timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the enclosed block as a phase of the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def server_timing_header(timings: Dict[str, float], total: float) -> str:
+    """
+    Format phase timings as a Server-Timing header value.
+
+    Args:
+        timings: Seconds per phase
+        total: Seconds spent on the whole request
+
+    Returns:
+        e.g. "cache;dur=0.1, fetch;dur=153.2, total;dur=160.4" (milliseconds)
+    """
+    names = [name for name in PHASES if name in timings]
+    names += sorted(name for name in timings if name not in PHASES)
+    parts = [f"{name};dur={timings[name] * 1000:.1f}" for name in names]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware adding a Server-Timing header with the request's phases.
+
+    The phases are recorded with `record` / `phase` by the cache, the
+    upstream client and the scrapers. Time until the headers are sent is
+    reported as "total".
+    """
+
+    def __init__(self, app: Any, enabled: Optional[bool] = None):
+        """
+        Args:
+            app: The wrapped ASGI application
+            enabled: Add the header (defaults to SERVER_TIMING)
+        """
+        self.app = app
+        self.enabled = config.SERVER_TIMING if enabled is None else enabled
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        token = _timings.set(timings)
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                value = server_timing_header(timings, time.perf_counter() - started)
+                message["headers"] = [*message.get("headers", []), (b"server-timing", value.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _timings.reset(token)
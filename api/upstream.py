@@ -0,0 +1,198 @@
+import hashlib
+import importlib.util
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+import httpx
+
+from api.governor import OutboundGovernor
+from api.metrics import UPSTREAM_IN_FLIGHT, UPSTREAM_RESPONSES, UPSTREAM_SECONDS
+from api.timing import record
+from utils import config
+from utils.constants import headers
+from utils.lru import LRUCache
+
+
+def _http2_available() -> bool:
+    """Check whether the optional `h2` package needed for HTTP/2 is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class FetchResult(NamedTuple):
+    """An upstream body with a digest of its content."""
+    text: str
+    status: int
+    digest: str
+    not_modified: bool = False
+
+
+class StoredResponse(NamedTuple):
+    """Last successful body for a URL together with its cache validators."""
+    text: str
+    digest: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+def content_digest(content: bytes) -> str:
+    """
+    Hash a response body.
+
+    Args:
+        content: Raw response bytes
+
+    Returns:
+        Hex digest identifying the body
+    """
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+class UpstreamClient:
+    """
+    Long-lived, pooled HTTP client used for every request towards vlr.gg.
+
+    A single `httpx.AsyncClient` is created lazily and reused, so keep-alive
+    connections (and TLS sessions) are shared between scrapes instead of being
+    re-established on every cache miss. Every request goes through the
+    outbound governor, which rate limits, prioritizes and retries it.
+    """
+
+    def __init__(
+        self,
+        timeouts: Optional[Dict[str, float]] = None,
+        limits: Optional[httpx.Limits] = None,
+        http2: Optional[bool] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        governor: Optional[OutboundGovernor] = None,
+    ):
+        """
+        Args:
+            timeouts: Read timeout per endpoint name, must contain "default"
+            limits: Connection pool limits
+            http2: Enable HTTP/2 when the `h2` package is available
+            transport: Optional custom transport (used by tests and load tests)
+            governor: Outbound rate governor (one with the configured limits if not provided)
+        """
+        self.timeouts = dict(timeouts or config.UPSTREAM_TIMEOUTS)
+        self.limits = limits or httpx.Limits(
+            max_connections=config.UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=config.UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=config.UPSTREAM_KEEPALIVE_EXPIRY,
+        )
+        self.http2 = (config.UPSTREAM_HTTP2 if http2 is None else http2) and _http2_available()
+        self.transport = transport
+        self.governor = governor if governor is not None else OutboundGovernor()
+        self._client: Optional[httpx.AsyncClient] = None
+        # Raw responses keyed by URL, kept to send conditional requests
+        self.responses: LRUCache[StoredResponse] = LRUCache(config.UPSTREAM_RESPONSE_CACHE_SIZE)
+        self.not_modified = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared async client, created on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=headers,
+                limits=self.limits,
+                timeout=self.timeout_for("default"),
+                http2=self.http2,
+                transport=self.transport,
+            )
+        return self._client
+
+    def timeout_for(self, endpoint: str) -> httpx.Timeout:
+        """
+        Build the timeout to use for a scraper endpoint.
+
+        Args:
+            endpoint: Endpoint name (e.g. "news", "stats")
+
+        Returns:
+            An httpx.Timeout with the endpoint's read timeout
+        """
+        read = self.timeouts.get(endpoint, self.timeouts["default"])
+        return httpx.Timeout(read, connect=min(config.UPSTREAM_CONNECT_TIMEOUT, read))
+
+    async def get(self, url: str, endpoint: str = "default", **kwargs) -> httpx.Response:
+        """
+        Perform a GET request through the governor and the shared connection pool.
+
+        Args:
+            url: The URL to request
+            endpoint: Endpoint name used to pick the timeout
+
+        Returns:
+            The httpx response
+
+        Raises:
+            UpstreamError: On timeouts, connection failures or while backing off
+        """
+        timeout = self.timeout_for(endpoint)
+
+        async def request() -> httpx.Response:
+            # One attempt, timed on its own (governor waits and retries excluded)
+            UPSTREAM_IN_FLIGHT.inc()
+            started = time.perf_counter()
+            status = "error"
+            try:
+                response = await self.client.get(url, timeout=timeout, **kwargs)
+                status = str(response.status_code)
+                return response
+            finally:
+                elapsed = time.perf_counter() - started
+                UPSTREAM_IN_FLIGHT.dec()
+                UPSTREAM_SECONDS.labels(endpoint=endpoint).observe(elapsed)
+                record("fetch", elapsed)
+                UPSTREAM_RESPONSES.labels(endpoint=endpoint, status=status).inc()
+
+        return await self.governor.send(httpx.URL(url).host, request)
+
+    async def fetch(self, url: str, endpoint: str = "default") -> FetchResult:
+        """
+        GET a URL, revalidating the previously stored body when possible.
+
+        If an earlier response carried an ETag or Last-Modified header, the
+        request is made conditional and a 304 answer reuses the stored body
+        without downloading it again.
+
+        Args:
+            url: The URL to request
+            endpoint: Endpoint name used to pick the timeout
+
+        Returns:
+            The body, status code and content digest
+        """
+        stored = self.responses.get(url)
+        conditional_headers = {}
+        if stored is not None:
+            if stored.etag:
+                conditional_headers["If-None-Match"] = stored.etag
+            if stored.last_modified:
+                conditional_headers["If-Modified-Since"] = stored.last_modified
+
+        resp = await self.get(url, endpoint=endpoint, headers=conditional_headers)
+        if resp.status_code == 304 and stored is not None:
+            self.not_modified += 1
+            return FetchResult(stored.text, 200, stored.digest, not_modified=True)
+
+        text = resp.text
+        digest = content_digest(resp.content)
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if resp.status_code == 200 and (etag or last_modified):
+            self.responses.set(url, StoredResponse(text, digest, etag, last_modified))
+        return FetchResult(text, resp.status_code, digest)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report conditional request and outbound governor statistics."""
+        return {
+            "stored_responses": len(self.responses),
+            "not_modified": self.not_modified,
+            "governor": self.governor.stats(),
+        }
+
+    async def aclose(self) -> None:
+        """Close the shared client and its pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
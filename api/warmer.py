@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from api.batch import ENDPOINTS, BatchEndpoint, validate
+from api.cache import ResponseCache
+from api.governor import mark_background
+from api.scrape import Vlr
+from utils import config
+
+logger = logging.getLogger(__name__)
+
+TIMESPANS = (30, 60, 90)
+
+# Scores below this are forgotten
+MIN_SCORE = 0.01
+
+# (namespace, route cache key)
+CacheKey = Tuple[str, str]
+
+
+def expand_queries(endpoints: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Expand batch endpoint names into every query they take.
+
+    Args:
+        endpoints: Names from api.batch.ENDPOINTS, e.g. ["rankings", "stats"]
+
+    Returns:
+        (endpoint, params) pairs, one per region and timespan combination
+
+    Raises:
+        ValueError: If an endpoint is unknown or takes a match ID, which cannot be enumerated
+    """
+    queries = []
+    for endpoint in endpoints:
+        target = ENDPOINTS.get(endpoint)
+        if target is None or "match" in target.params:
+            raise ValueError(f"Cannot warm endpoint: {endpoint}")
+        combinations: List[Dict[str, Any]] = [{}]
+        if "region" in target.params:
+            combinations = [{"region": region} for region in target.regions]
+        if "timespan" in target.params:
+            combinations = [{**params, "timespan": timespan} for params in combinations for timespan in TIMESPANS]
+        queries.extend((endpoint, params) for params in combinations)
+    return queries
+
+
+class CacheWarmer:
+    """
+    Warms the response cache at startup and keeps its popular keys fresh.
+
+    Every lookup of a route key the warmer can fetch is counted (hook it to
+    `ResponseCache.on_access`), and counts decay exponentially. On each pass,
+    keys scoring at least `hot_min` that would stop being fresh before the
+    next pass are refreshed at background priority, most popular first, as
+    long as the upstream budget allows. Cold keys are left to expire.
+    """
+
+    def __init__(
+        self,
+        vlr: Vlr,
+        cache: ResponseCache,
+        warm: Optional[List[str]] = None,
+        interval: Optional[float] = None,
+        budget: Optional[int] = None,
+        hot_min: Optional[float] = None,
+        half_life: Optional[float] = None,
+        concurrency: Optional[int] = None,
+    ):
+        """
+        Args:
+            vlr: Facade performing the scrapes
+            cache: Response cache shared with the routes
+            warm: Endpoints fetched at startup, for every region and timespan
+            interval: Seconds between two refresh passes (0 only warms up)
+            budget: Upstream requests per minute spent on refreshes
+            hot_min: Score from which a key is kept fresh
+            half_life: Seconds after which an access counts half
+            concurrency: Refreshes running at the same time
+        """
+        self.vlr = vlr
+        self.cache = cache
+        self.interval = config.WARM_INTERVAL if interval is None else interval
+        self.budget = config.WARM_BUDGET if budget is None else budget
+        self.hot_min = config.WARM_HOT_MIN if hot_min is None else hot_min
+        self.half_life = half_life or config.WARM_HALF_LIFE
+        self.concurrency = concurrency or config.WARM_CONCURRENCY
+
+        # Every key the warmer knows how to fetch, with its endpoint and parameters
+        self.targets: Dict[CacheKey, Tuple[BatchEndpoint, Dict[str, Any]]] = {}
+        enumerable = [name for name, target in ENDPOINTS.items() if "match" not in target.params]
+        for endpoint, params in expand_queries(enumerable):
+            target, params = validate(endpoint, params)
+            self.targets[(target.namespace, target.path.format(**params))] = (target, params)
+        self.warm_keys: List[CacheKey] = []
+        for endpoint, params in expand_queries(config.WARM_ENDPOINTS if warm is None else warm):
+            target, params = validate(endpoint, params)
+            self.warm_keys.append((target.namespace, target.path.format(**params)))
+
+        self.scores: Dict[CacheKey, float] = {}
+        self.tokens = float(self.budget)
+        self.warmed = 0
+        self.failed = 0
+        self.warmed_at: Optional[float] = None
+        self.refreshes = 0
+        self.over_budget = 0
+
+    def record_access(self, namespace: str, key: str) -> None:
+        """Count a lookup of a cache key (keys the warmer cannot fetch are ignored)."""
+        cache_key = (namespace, key)
+        if cache_key in self.targets:
+            self.scores[cache_key] = self.scores.get(cache_key, 0.0) + 1.0
+
+    @property
+    def ready(self) -> bool:
+        """Whether every warm-up key has been fetched (or has failed)."""
+        return self.warmed + self.failed >= len(self.warm_keys)
+
+    def progress(self) -> Dict[str, Any]:
+        """Report warm-up progress."""
+        return {
+            "ready": self.ready,
+            "total": len(self.warm_keys),
+            "warmed": self.warmed,
+            "failed": self.failed,
+            "warmed_at": self.warmed_at,
+        }
+
+    def hot_keys(self) -> List[CacheKey]:
+        """Keys scoring at least `hot_min`, most popular first."""
+        hot = [key for key, score in self.scores.items() if score >= self.hot_min]
+        hot.sort(key=lambda key: self.scores[key], reverse=True)
+        return hot
+
+    async def _refresh(self, key: CacheKey) -> bool:
+        """Fetch and store one key, logging instead of raising on failure."""
+        target, params = self.targets[key]
+        try:
+            await self.cache.refresh(key[0], key[1], lambda: target.call(self.vlr, **params))
+        except Exception as e:
+            logger.warning("Warming %s failed: %s", key[1], e)
+            return False
+        return True
+
+    async def _refresh_all(self, keys: List[CacheKey]) -> List[bool]:
+        """Refresh keys, at most `concurrency` at a time."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(key: CacheKey) -> bool:
+            async with semaphore:
+                return await self._refresh(key)
+
+        return await asyncio.gather(*(refresh(key) for key in keys))
+
+    async def warm_up(self) -> None:
+        """Fetch every warm-up key not already fresh, tracking progress for the readiness probe."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def warm(key: CacheKey) -> None:
+            # Already fresh, e.g. restored from a snapshot
+            entry = await self.cache.backend.get(self.cache.make_key(*key))
+            if entry is not None and entry.is_fresh(time.time()):
+                self.warmed += 1
+                return
+            async with semaphore:
+                ok = await self._refresh(key)
+            if ok:
+                self.warmed += 1
+            else:
+                self.failed += 1
+
+        await asyncio.gather(*(warm(key) for key in self.warm_keys))
+        self.warmed_at = time.time()
+
+    def _decay(self, elapsed: float) -> None:
+        """Age every score by `elapsed` seconds, forgetting keys no longer requested."""
+        factor = 0.5 ** (elapsed / self.half_life)
+        for key, score in list(self.scores.items()):
+            score *= factor
+            if score < MIN_SCORE:
+                del self.scores[key]
+            else:
+                self.scores[key] = score
+
+    async def tick(self, elapsed: Optional[float] = None) -> int:
+        """
+        Run one refresh pass.
+
+        Args:
+            elapsed: Seconds since the previous pass (defaults to `interval`)
+
+        Returns:
+            Number of keys refreshed
+        """
+        elapsed = self.interval if elapsed is None else elapsed
+        self._decay(elapsed)
+        self.tokens = min(float(self.budget), self.tokens + self.budget * elapsed / 60)
+
+        now = time.time()
+        due = []
+        for key in self.hot_keys():
+            entry = await self.cache.backend.get(self.cache.make_key(*key))
+            if entry is not None and entry.fresh_until - now > self.interval:
+                # Still fresh at the next pass
+                continue
+            if self.tokens < 1:
+                self.over_budget += 1
+                continue
+            self.tokens -= 1
+            due.append(key)
+
+        refreshed = sum(await self._refresh_all(due))
+        self.refreshes += refreshed
+        return refreshed
+
+    async def run(self) -> None:
+        """Warm up, then run a refresh pass every `interval` seconds until cancelled."""
+        mark_background()
+        await self.warm_up()
+        if self.interval <= 0:
+            return
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            try:
+                await self.tick(now - last)
+            except Exception:
+                logger.exception("Cache refresh pass failed")
+            last = now
+
+    def stats(self) -> Dict[str, Any]:
+        """Report warm-up progress, tracked and hot keys, refreshes and the remaining budget."""
+        return {
+            **self.progress(),
+            "tracked_keys": len(self.scores),
+            "hot_keys": len(self.hot_keys()),
+            "refreshes": self.refreshes,
+            "over_budget": self.over_budget,
+            "budget_left": round(self.tokens, 2),
+        }
@@ -0,0 +1,207 @@
+"""
+Offline throughput benchmarks for the scraper extraction functions.
+
+Every case parses saved vlr.gg pages from tests/fixtures (trimmed
+reproductions of the live markup, with the whitespace layout the scrapers
+depend on) and runs the scraper's extraction function over them, reporting pages/sec and the time
+spent per extracted item. Results are normalized by a small pure-Python
+calibration loop so baselines recorded on one machine stay comparable on
+another.
+
+Usage:
+    python -m benchmarks.bench_parsers             # compare against baseline.json
+    python -m benchmarks.bench_parsers --update    # record a new baseline
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from selectolax.parser import HTMLParser
+
+from api.scrape import MatchScraper, NewsScraper, RankingScraper, StatsScraper
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT, "tests", "fixtures")
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+# Allowed drop in normalized throughput before a case counts as a regression
+DEFAULT_THRESHOLD = 0.25
+
+
+class BenchCase(NamedTuple):
+    """A scraper extraction function and the fixture pages it runs over."""
+    name: str
+    extract: Callable[[HTMLParser], List[Any]]
+    fixtures: List[str]
+
+
+CASES = [
+    BenchCase("news", NewsScraper.extract_news, ["news.html"]),
+    BenchCase("upcoming", MatchScraper._get_match_info, ["matches_page1.html", "matches_page2.html", "matches_page3.html"]),
+    BenchCase("results", MatchScraper.extract_results, ["results.html"]),
+    BenchCase("stats", StatsScraper.extract_player_stats, ["stats.html"]),
+    BenchCase("rankings", RankingScraper.extract_rankings, ["rankings.html"]),
+    BenchCase("live_score", MatchScraper.extract_live_score, ["home.html"]),
+    BenchCase("streams", MatchScraper.extract_streams, ["match.html"]),
+    BenchCase("match", MatchScraper.extract_match_detail, ["match.html"]),
+    BenchCase("performance", MatchScraper.extract_match_performance, ["match_performance.html"]),
+]
+
+
+def load_fixture(name: str) -> str:
+    """Read a saved page from tests/fixtures."""
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def calibrate(min_time: float = 0.1) -> float:
+    """
+    Measure a fixed pure-Python workload.
+
+    Returns:
+        Calibration loops per second on this machine
+    """
+    loops = 0
+    started = time.perf_counter()
+    while True:
+        total = 0
+        for i in range(10000):
+            total += i % 7
+        loops += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return loops / elapsed
+
+
+def run_case(case: BenchCase, min_time: float = 0.3, rounds: int = 3) -> Dict[str, float]:
+    """
+    Benchmark one extraction function (parse + extract) over its fixtures.
+
+    The best of `rounds` measurements is kept to reduce scheduling noise.
+
+    Args:
+        case: The case to run
+        min_time: Minimum seconds per round
+        rounds: Number of rounds
+
+    Returns:
+        Dictionary with pages/sec, microseconds per item and items per run
+    """
+    pages = [load_fixture(name) for name in case.fixtures]
+    items = sum(len(case.extract(HTMLParser(page))) for page in pages)
+    if items == 0:
+        raise AssertionError(f"{case.name}: extraction returned no items")
+
+    best = 0.0
+    for _ in range(rounds):
+        runs = 0
+        started = time.perf_counter()
+        while True:
+            for page in pages:
+                case.extract(HTMLParser(page))
+            runs += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time:
+                break
+        best = max(best, runs * len(pages) / elapsed)
+
+    return {
+        "pages_per_sec": round(best, 2),
+        "us_per_item": round(1e6 * len(pages) / best / items, 3),
+        "items": items,
+    }
+
+
+def run_all(min_time: float = 0.3, rounds: int = 3) -> Dict[str, Any]:
+    """
+    Run every case.
+
+    Returns:
+        Dictionary with the calibration score and per-case results, each
+        with its throughput normalized by the calibration score
+    """
+    calibration = calibrate()
+    cases = {}
+    for case in CASES:
+        result = run_case(case, min_time, rounds)
+        result["normalized"] = round(result["pages_per_sec"] / calibration, 6)
+        cases[case.name] = result
+    return {
+        "python": platform.python_version(),
+        "calibration": round(calibration, 2),
+        "cases": cases,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Find cases whose normalized throughput dropped beyond the threshold.
+
+    Args:
+        results: Output of `run_all`
+        baseline: Previously recorded `run_all` output
+        threshold: Allowed relative drop (0.25 = 25% slower)
+
+    Returns:
+        Human readable regression messages (empty when everything passes)
+    """
+    regressions = []
+    for name, base in baseline["cases"].items():
+        current = results["cases"].get(name)
+        if current is None:
+            continue
+        ratio = current["normalized"] / base["normalized"]
+        if ratio < 1 - threshold:
+            regressions.append(f"{name}: {ratio:.0%} of baseline throughput "
+                               f"({current['pages_per_sec']} vs {base['pages_per_sec']} pages/sec)")
+    return regressions
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, Any]:
+    """Read the recorded baseline."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: List[str] = None) -> int:
+    """Run the benchmarks, print a report and compare with or update the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update", action="store_true", help="record the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed relative slowdown")
+    parser.add_argument("--min-time", type=float, default=0.3, help="minimum seconds per measurement round")
+    parser.add_argument("--rounds", type=int, default=3, help="measurement rounds per case")
+    args = parser.parse_args(argv)
+
+    results = run_all(args.min_time, args.rounds)
+    baseline = load_baseline() if os.path.exists(BASELINE_PATH) else None
+
+    print(f"{'case':<12}{'pages/sec':>12}{'us/item':>12}{'items':>8}{'vs base':>10}")
+    for name, result in results["cases"].items():
+        change = ""
+        if baseline and name in baseline["cases"]:
+            change = f"{result['normalized'] / baseline['cases'][name]['normalized']:.0%}"
+        print(f"{name:<12}{result['pages_per_sec']:>12}{result['us_per_item']:>12}{result['items']:>8}{change:>10}")
+
+    if args.update:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    if baseline is None:
+        print("No baseline recorded yet, run with --update")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
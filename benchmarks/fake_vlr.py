@@ -0,0 +1,155 @@
+"""
+Local stand-in for vlr.gg serving the saved pages from tests/fixtures.
+
+Every URL the scrapers build is answered with the matching fixture: the
+news, matches (?page=1..3), results, stats and rankings pages, the home page
+(live scores), match pages and their performance tab, and images. Latency and
+an error rate can be configured to simulate a slow or failing upstream, and
+every request is counted per URL pattern.
+
+The app is plain ASGI: the load test plugs it into the upstream client with
+`httpx.ASGITransport`, and it can be served on its own for inspection:
+
+    python -m benchmarks.fake_vlr --port 8081 --latency 0.1
+"""
+import argparse
+import asyncio
+import random
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from benchmarks.bench_parsers import load_fixture
+
+# A 1x1 transparent PNG served for every image
+PNG = (
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89"
+    b"\x00\x00\x00\rIDATx\x9cc\xf8\x0f\x00\x00\x01\x01\x00\x05\x18\xd8N\x00\x00\x00\x00IEND\xaeB`\x82"
+)
+
+MATCH_PAGES = 3
+
+
+def _matches_page(query: Dict[str, List[str]]) -> Optional[str]:
+    """Fixture of an upcoming matches page (None past the last page)."""
+    try:
+        page = int(query.get("page", ["1"])[0])
+    except ValueError:
+        return None
+    return f"matches_page{page}.html" if 1 <= page <= MATCH_PAGES else None
+
+
+# (pattern name, path regex, fixture picker) in match order
+ROUTES: List[Tuple[str, "re.Pattern[str]", Callable[[Dict[str, List[str]]], Optional[str]]]] = [
+    ("home", re.compile(r"^/?$"), lambda query: "home.html"),
+    ("news", re.compile(r"^/news/?$"), lambda query: "news.html"),
+    ("matches", re.compile(r"^/matches/?$"), _matches_page),
+    ("results", re.compile(r"^/matches/results/?$"), lambda query: "results.html"),
+    ("stats", re.compile(r"^/stats/?$"), lambda query: "stats.html"),
+    ("rankings", re.compile(r"^/rankings/[\w-]+/?$"), lambda query: "rankings.html"),
+    ("match", re.compile(r"^/\d+(/[\w-]*)?/?$"),
+     lambda query: "match_performance.html" if query.get("tab") == ["performance"] else "match.html"),
+]
+
+
+class FakeVlr:
+    """ASGI app answering scraper URLs with fixture pages."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            latency: Seconds added to every response
+            jitter: Extra random delay, up to this many seconds
+            error_rate: Fraction of requests answered with `error_status`
+            error_status: Status of injected errors (503, 429, ...)
+            seed: Seed of the delay and error randomness
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self._pages: Dict[str, bytes] = {}
+        self.requests: Counter = Counter()
+        self.errors = 0
+
+    def reset(self) -> None:
+        """Forget the request counts."""
+        self.requests.clear()
+        self.errors = 0
+
+    @property
+    def page_requests(self) -> int:
+        """Requests for pages (images excluded)."""
+        return sum(count for name, count in self.requests.items() if name != "image")
+
+    def _page(self, name: str) -> bytes:
+        """Fixture bytes, read once."""
+        if name not in self._pages:
+            self._pages[name] = load_fixture(name).encode("utf-8")
+        return self._pages[name]
+
+    def resolve(self, host: str, path: str, query: Dict[str, List[str]]) -> Tuple[str, int, str, bytes]:
+        """
+        Pick the answer to a request.
+
+        Returns:
+            (pattern name, status, content type, body)
+        """
+        if host.endswith("owcdn.net") or path.startswith("/img/"):
+            return "image", 200, "image/png", PNG
+        for name, pattern, pick in ROUTES:
+            if pattern.match(path):
+                fixture = pick(query)
+                if fixture is None:
+                    return name, 404, "text/html", b"Not found"
+                return name, 200, "text/html; charset=utf-8", self._page(fixture)
+        return "unknown", 404, "text/html", b"Not found"
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            return
+        headers = dict(scope["headers"])
+        host = headers.get(b"host", b"www.vlr.gg").decode("latin-1").split(":")[0]
+        query = parse_qs(scope["query_string"].decode("latin-1"))
+        name, status, content_type, body = self.resolve(host, scope["path"], query)
+        self.requests[name] += 1
+
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            status, content_type, body = self.error_status, "text/plain", b"Injected error"
+
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type.encode("latin-1")), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def main(argv: List[str] = None) -> None:
+    """Serve the fake vlr.gg with uvicorn."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing")
+    args = parser.parse_args(argv)
+    uvicorn.run(FakeVlr(args.latency, args.jitter, args.error_rate), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+End-to-end load test of main:app against a local vlr.gg stand-in.
+
+The API runs in process behind `httpx.ASGITransport`, and its upstream client
+is pointed at benchmarks.fake_vlr, so the whole stack (rate limiting aside)
+is exercised: cache, single-flight, outbound governor, parsing and encoding.
+Each scenario sends `--requests` requests from `--concurrency` clients using
+a weighted request mix and reports throughput, p50/p95/p99 latency, response
+statuses and the upstream amplification factor (vlr.gg page requests per API
+request).
+
+Scenarios:
+    cold      empty caches
+    warm      every path of the mix requested once beforehand
+    degraded  empty caches, slow upstream failing part of the time
+
+Usage:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --scenario warm --concurrency 50 --requests 5000
+    python -m benchmarks.load_test --mix "/news=1,/rankings/na=3" --latency 0.2 --json
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from benchmarks.fake_vlr import FakeVlr
+
+DEFAULT_MIX = (
+    "/news=2,/match/upcoming=3,/match/results=2,/match/live_score=3,/rankings/na=2,"
+    "/rankings/eu=1,/stats/na/30=1,/match/streams/500003=1,/match/500003=1"
+)
+
+
+class Scenario(NamedTuple):
+    """Cache state and upstream behaviour of one run."""
+    name: str
+    warm: bool
+    latency: float
+    error_rate: float
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    """
+    Parse a request mix written as "path=weight,path=weight".
+
+    Args:
+        spec: Mix specification (a path without weight counts 1)
+
+    Returns:
+        (path, weight) pairs
+    """
+    mix = []
+    for item in spec.split(","):
+        path, _, weight = item.strip().partition("=")
+        if path:
+            mix.append((path, float(weight) if weight else 1.0))
+    return mix
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values (0 if empty)."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(q / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+@asynccontextmanager
+async def fake_upstream(fake: FakeVlr, rate: Optional[float], burst: Optional[int]) -> AsyncIterator[Any]:
+    """
+    Point main:app at the fake vlr.gg with empty caches, restoring it afterwards.
+
+    The facade, its dependants and the upstream client are replaced by fresh
+    ones; the route cache is cleared before and after. Per-client rate
+    limiting and image prefetching are turned off.
+
+    Args:
+        fake: The vlr.gg stand-in
+        rate: Outbound requests per second (the configured rate if None)
+        burst: Outbound burst (the configured burst if None)
+
+    Yields:
+        The main module
+    """
+    import main
+    from api.aggregate import StatsAggregator
+    from api.batch import BatchRunner
+    from api.governor import OutboundGovernor
+    from api.scrape import Vlr
+    from api.stats_table import StatsAnalytics
+    from api.upstream import UpstreamClient
+
+    names = ("vlr", "stats_analytics", "stats_aggregator", "batch_runner")
+    saved = {name: getattr(main, name) for name in names}
+    limiter_enabled = main.limiter.enabled
+    upstream = UpstreamClient(transport=httpx.ASGITransport(app=fake), governor=OutboundGovernor(rate, burst))
+    main.vlr = Vlr(upstream, main.parse_executor)
+    main.stats_analytics = StatsAnalytics(main.vlr)
+    main.stats_aggregator = StatsAggregator(main.vlr, main.response_cache)
+    main.batch_runner = BatchRunner(main.vlr, main.response_cache)
+    main.limiter.enabled = False
+    await main.response_cache.backend.clear()
+    try:
+        yield main
+    finally:
+        await main.response_cache.aclose()
+        await main.response_cache.backend.clear()
+        await upstream.aclose()
+        main.limiter.enabled = limiter_enabled
+        for name, value in saved.items():
+            setattr(main, name, value)
+
+
+async def run_scenario(
+    scenario: Scenario,
+    mix: List[Tuple[str, float]],
+    requests: int,
+    concurrency: int,
+    rate: Optional[float] = None,
+    burst: Optional[int] = None,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Run one scenario.
+
+    Args:
+        scenario: Cache state and upstream behaviour
+        mix: Weighted request paths
+        requests: Requests sent in total
+        concurrency: Clients sending requests at the same time
+        rate: Outbound requests per second (the configured rate if None)
+        burst: Outbound burst (the configured burst if None)
+        seed: Seed of the request mix and of the fake upstream
+
+    Returns:
+        Dictionary with throughput, latency percentiles in milliseconds,
+        response statuses and upstream request counts
+    """
+    fake = FakeVlr(scenario.latency, scenario.latency / 2, scenario.error_rate, seed=seed)
+    chooser = random.Random(seed)
+    paths = [path for path, _ in mix]
+    weights = [weight for _, weight in mix]
+    plan = chooser.choices(paths, weights, k=requests)
+
+    async with fake_upstream(fake, rate, burst) as main:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=None) as client:
+            if scenario.warm:
+                for path in paths:
+                    await client.get(path)
+                fake.reset()
+
+            latencies: List[float] = []
+            statuses: Counter = Counter()
+            queue = iter(plan)
+
+            async def worker() -> None:
+                for path in queue:
+                    started = time.perf_counter()
+                    response = await client.get(path)
+                    latencies.append(time.perf_counter() - started)
+                    statuses[response.status_code] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "scenario": scenario.name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "throughput": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "upstream_requests": fake.page_requests,
+        "upstream_errors": fake.errors,
+        "upstream_by_pattern": dict(fake.requests),
+        "amplification": round(fake.page_requests / requests, 4),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    """Run the selected scenarios and print a report."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=["cold", "warm", "degraded", "all"], default="all")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20, help="clients sending at the same time")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help='weighted paths, "path=weight,..."')
+    parser.add_argument("--latency", type=float, default=0.05, help="upstream latency in seconds")
+    parser.add_argument("--degraded-latency", type=float, default=0.5, help="upstream latency when degraded")
+    parser.add_argument("--degraded-error-rate", type=float, default=0.3, help="failing upstream requests when degraded")
+    parser.add_argument("--upstream-rate", type=float, default=None, help="outbound requests per second")
+    parser.add_argument("--upstream-burst", type=int, default=None, help="outbound burst")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    scenarios = [
+        Scenario("cold", False, args.latency, 0.0),
+        Scenario("warm", True, args.latency, 0.0),
+        Scenario("degraded", False, args.degraded_latency, args.degraded_error_rate),
+    ]
+    if args.scenario != "all":
+        scenarios = [scenario for scenario in scenarios if scenario.name == args.scenario]
+
+    mix = parse_mix(args.mix)
+    results = [
+        asyncio.run(run_scenario(
+            scenario, mix, args.requests, args.concurrency, args.upstream_rate, args.upstream_burst, args.seed
+        ))
+        for scenario in scenarios
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'scenario':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'upstream':>10}{'amplif.':>10}  statuses")
+    for result in results:
+        statuses = " ".join(f"{status}:{count}" for status, count in result["statuses"].items())
+        print(f"{result['scenario']:<10}{result['throughput']:>10}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+              f"{result['p99_ms']:>10}{result['upstream_requests']:>10}{result['amplification']:>10}  {statuses}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
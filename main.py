@@ -1,15 +1,40 @@
+import asyncio
+import math
+import os
+import secrets
+import sqlite3
 import uvicorn
-import httpx
-from fastapi import FastAPI, Request, Depends, HTTPException
+from datetime import date
+from fastapi import FastAPI, Request, Depends, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_cache import FastAPICache
-from fastapi_cache.backends.inmemory import InMemoryBackend
-from fastapi_cache.decorator import cache
-from typing import Optional, List, AsyncGenerator
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from typing import Any, Callable, Dict, Optional, List, AsyncGenerator
 from contextlib import asynccontextmanager
 
+from api.aggregate import StatsAggregator
+from api.batch import BatchRunner
+from api.cache import CachePolicy, ResponseCache, get_policy
+from api.cache_backends import create_backend
+from api.encoding import etag_matches
+from api.errors import UpstreamError
+from api.images import ImageProxy
+from api.ingest import Ingestor
+from api.live import LiveScorePoller
+from api.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from api.parse_executor import ParseExecutor
+from api.profiler import ProfilerMiddleware, SampledProfiler
 from api.scrape import Vlr
-from models.responses import NewsResponse, UpcomingMatchItem, CompletedMatchItem, PlayerStats, TeamRanking, LiveScoreItem, StreamInfo
+from api.snapshot import CacheSnapshotter
+from api.stats_table import StatsAnalytics, parse_range
+from api.store import MatchStore
+from api.timing import ServerTimingMiddleware
+from api.streaming import NDJSON_MEDIA_TYPE, SSE_MEDIA_TYPE, ndjson_lines, wants_ndjson
+from api.upstream import UpstreamClient
+from api.warmer import CacheWarmer
+from utils import config
+from utils.constants import region_map, stats_regions
+from models.requests import BatchRequest
+from models.responses import NewsResponse, UpcomingMatchItem, CompletedMatchItem, PlayerStats, TeamRanking, LiveScoreItem, StreamInfo, MatchDetailResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
@@ -25,13 +50,45 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     Lifespan event handler for the application.
     This replaces the deprecated on_event("startup") handler.
     """
-    # Startup: Initialize cache and HTTP client
-    FastAPICache.init(InMemoryBackend(), prefix="fastapi-cache")
+    # Startup: expose the shared upstream client and response cache
+    app.state.http_client = upstream
+    app.state.cache = response_cache
     
-    # Create async HTTP client with timeout
-    async with httpx.AsyncClient(timeout=8.0) as client:
-        app.state.http_client = client
+    # Periodic ingestion into the local match archive, when enabled
+    ingest_task = None
+    if ingestor.interval > 0:
+        ingest_task = asyncio.create_task(ingestor.run_forever(ingestor.interval))
+    
+    # Restore the previous process's snapshot before warming up, so keys it
+    # holds are answered from the cache instead of being fetched again
+    snapshotter.restore()
+    snapshot_task = None
+    if snapshotter.enabled and snapshotter.interval > 0:
+        snapshot_task = asyncio.create_task(snapshotter.run_forever())
+    
+    # Warm the configured keys, then keep popular ones fresh (see /ready)
+    warm_task = asyncio.create_task(cache_warmer.run())
+    
+    try:
         yield  # This is where the application runs
+    finally:
+        warm_task.cancel()
+        await asyncio.gather(warm_task, return_exceptions=True)
+        if snapshot_task is not None:
+            snapshot_task.cancel()
+            await asyncio.gather(snapshot_task, return_exceptions=True)
+        await snapshotter.save()
+        if ingest_task is not None:
+            ingest_task.cancel()
+            await asyncio.gather(ingest_task, return_exceptions=True)
+        store.close()
+        # Shutdown: stop the live poller and background refreshes, close pooled
+        # upstream connections and stop the parse workers
+        await live_poller.aclose()
+        await image_proxy.aclose()
+        await response_cache.aclose()
+        await upstream.aclose()
+        parse_executor.shutdown()
 
 # Create FastAPI app with lifespan handler
 app = FastAPI(
@@ -44,13 +101,69 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# Initialize the VLR client
-vlr = Vlr()
+# Initialize the shared upstream client, parse pool and the VLR client using them
+upstream = UpstreamClient()
+parse_executor = ParseExecutor()
+# Logos and icons served from a disk cache under /img/..., prefetched as pages are scraped
+image_proxy = ImageProxy(upstream)
+vlr = Vlr(upstream, parse_executor, images=image_proxy if config.IMAGE_PREFETCH else None)
+
+# Stale-while-revalidate response cache, policies per namespace in utils/config.py
+# and storage selected with CACHE_BACKEND (memory or memcached)
+response_cache = ResponseCache(create_backend(), prefix=config.CACHE_PREFIX)
+
+# POST /batch runs sub-queries through the same facade and cache as the routes
+batch_runner = BatchRunner(vlr, response_cache)
+
+# Typed, array-backed stats tables for sorting, filtering and percentiles
+stats_analytics = StatsAnalytics(vlr)
+
+# Cross-region stats leaderboard built from the per-region cached stats pages
+stats_aggregator = StatsAggregator(vlr, response_cache)
+
+# Startup warm-up of WARM_ENDPOINTS and ahead-of-expiry refresh of popular keys
+cache_warmer = CacheWarmer(vlr, response_cache)
+response_cache.on_access = cache_warmer.record_access
+
+# On-disk snapshot of the in-memory cache (SNAPSHOT_PATH), saved periodically
+# and at shutdown, restored lazily at startup
+snapshotter = CacheSnapshotter(response_cache.backend, vlr)
+
+# One live score poller per process shared by every /match/live_score/stream client
+live_poller = LiveScorePoller(vlr.vlr_live_matches)
+
+# Local archive of scraped matches and rankings, filled by the ingestor
+store = MatchStore(config.STORE_PATH)
+ingestor = Ingestor(vlr, store)
 
 # Set up rate limiting
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+
+async def _upstream_error_handler(request: Request, exc: UpstreamError) -> JSONResponse:
+    """
+    Answer upstream failures with a matching status instead of a bare 500.
+    """
+    headers = {"Retry-After": str(math.ceil(exc.retry_after))} if exc.retry_after else None
+    return JSONResponse(
+        status_code=exc.response_status,
+        content={"detail": str(exc), "upstream_status": exc.status},
+        headers=headers,
+    )
+
+
+app.add_exception_handler(UpstreamError, _upstream_error_handler)
+
+# Request latency per route template, exposed on /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Server-Timing header per request, and cProfile captures of sampled requests
+# (switched on through /admin/profiler)
+profiler = SampledProfiler()
+app.add_middleware(ProfilerMiddleware, profiler=profiler, skip_paths=("/admin", "/metrics", "/match/live_score/stream"))
+app.add_middleware(ServerTimingMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -58,53 +171,121 @@ app.add_middleware(
     allow_credentials=True,
 )
 
-@app.get("/news", response_model=NewsResponse, tags=["News"])
-@cache(expire=300, namespace="vlrapi-news")
+@app.get("/news", response_model=NewsResponse, response_model_exclude_unset=True, tags=["News"])
 @limiter.limit("250/minute")
+@response_cache.cached("vlrapi-news")
 async def get_news(request: Request):
     """
     Get recent news articles from VLR.GG
     """
-    # Create a new client for this request to avoid timeout issues
-    async with httpx.AsyncClient(timeout=8.0) as client:
-        return await vlr.vlr_recent(client)
+    return await vlr.vlr_recent()
 
 
 @app.get("/match/results", response_model=dict, tags=["Matches"])
-@cache(expire=300, namespace="vlrapi-results")
 @limiter.limit("250/minute")
+@response_cache.cached("vlrapi-results")
 async def get_match_results(request: Request):
     """
     Get recent match results
     """
-    async with httpx.AsyncClient(timeout=8.0) as client:
-        return await vlr.vlr_results(client)
+    return await vlr.vlr_results()
+
+
+@app.get("/stats/all/{timespan}", tags=["Statistics"])
+@limiter.limit("250/minute")
+async def get_all_player_stats(
+    timespan: int,
+    request: Request,
+    sort: str = "average_combat_score",
+    order: str = "desc",
+    limit: Optional[int] = None,
+):
+    """
+    Player statistics merged over every region
+    
+    Each region is fetched concurrently and cached on its own, players found in
+    several regions are listed once (with all their `regions`).
+    
+    - **timespan**: Time period in days (30, 60, 90)
+    - **sort**: Stat column to sort on (e.g. average_combat_score, kill_deaths, headshot_percentage)
+    - **order**: "desc" (default) or "asc"
+    - **limit**: Only return the top players
+    """
+    if timespan not in [30, 60, 90]:
+        raise HTTPException(status_code=400, detail="Timespan must be 30, 60, or 90 days")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Order must be asc or desc")
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="Limit must be positive")
+    
+    try:
+        return await stats_aggregator.leaderboard(timespan, sort, order == "desc", limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/stats/{region}/{timespan}", tags=["Statistics"])
-@cache(expire=300, namespace="vlrapi-stats")
 @limiter.limit("250/minute")
+@response_cache.cached("vlrapi-stats")
 async def get_player_stats(
     region: str, 
     timespan: int, 
-    request: Request
+    request: Request,
+    sort: Optional[str] = None,
+    order: str = "desc",
+    limit: Optional[int] = None,
+    filter: Optional[List[str]] = Query(None),
+    percentiles: Optional[str] = None,
+    zscore: Optional[List[str]] = Query(None),
+    format: str = "rows",
 ):
     """
     Get player statistics by region and timespan
     
-    - **region**: Region shortcode (na, eu, ap, sa, oce, mn)
+    - **region**: Stats page region code (na, eu, ap, sa, jp, oce, mn, br, kr, ch, la-s, la-n, gc)
     - **timespan**: Time period in days (30, 60, 90)
+    
+    Any of the following runs the query over the typed stats table (percent
+    signs stripped, KAST included); without them the legacy rows are returned:
+    
+    - **sort** / **order**: Stat column to sort on, "desc" (default) or "asc"
+    - **limit**: Only return the first rows
+    - **filter**: Range filter `column:min:max`, repeatable (e.g. `average_combat_score:220:`)
+    - **percentiles**: Comma separated percentiles of every column (e.g. `50,90,99`)
+    - **zscore**: Column whose z-score is added to each row, repeatable
+    - **format**: "rows" (legacy rows) or "columns" (one array per column)
     """
+    if region not in stats_regions:
+        raise HTTPException(status_code=404, detail=f"Unknown region: {region}")
     if timespan not in [30, 60, 90]:
         raise HTTPException(status_code=400, detail="Timespan must be 30, 60, or 90 days")
     
-    async with httpx.AsyncClient(timeout=8.0) as client:
-        return await vlr.vlr_stats(region, timespan, client)
+    if sort is None and limit is None and not filter and not percentiles and not zscore and format == "rows":
+        return await vlr.vlr_stats(region, timespan)
+    
+    if order not in ("asc", "desc") or format not in ("rows", "columns"):
+        raise HTTPException(status_code=400, detail="Order must be asc or desc and format rows or columns")
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="Limit must be positive")
+    try:
+        return await stats_analytics.query(
+            region,
+            timespan,
+            filters=[parse_range(spec) for spec in filter or []],
+            sort=sort,
+            descending=order == "desc",
+            limit=limit,
+            percentiles=[float(q) for q in percentiles.split(",")] if percentiles else None,
+            zscores=zscore,
+            columnar=format == "columns",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/rankings/{region}", tags=["Rankings"])
-@cache(expire=300, namespace="vlrapi-rankings")
 @limiter.limit("250/minute")
+@response_cache.cached("vlrapi-rankings")
 async def get_team_rankings(
     region: str, 
     request: Request
@@ -126,42 +307,198 @@ async def get_team_rankings(
         - "br" -> "Brazil"
         - "cn" -> "china"
     """
-    async with httpx.AsyncClient(timeout=8.0) as client:
-        return await vlr.vlr_rankings(region, client)
+    if region not in region_map:
+        raise HTTPException(status_code=404, detail=f"Unknown region: {region}")
+    return await vlr.vlr_rankings(region)
 
 
 @app.get("/match/upcoming", tags=["Matches"])
-@cache(expire=300, namespace="vlrapi-upcoming")
 @limiter.limit("250/minute")
+@response_cache.cached("vlrapi-upcoming", bypass=wants_ndjson)
 async def get_upcoming_matches(request: Request):
     """
     Get upcoming matches
+
+    Send `?stream=1` or `Accept: application/x-ndjson` to receive one JSON line
+    per match as each page is parsed, followed by an `end` line with the page
+    statuses. Streamed responses are not cached.
     """
-    async with httpx.AsyncClient(timeout=8.0) as client:
-        return await vlr.vlr_upcoming(client)
+    if wants_ndjson(request):
+        # Awaited before responding, so a failing first page still gets an error status
+        records = await vlr.vlr_upcoming_stream()
+        return StreamingResponse(ndjson_lines(records), media_type=NDJSON_MEDIA_TYPE)
+    return await vlr.vlr_upcoming()
 
 
 @app.get("/match/live_score", tags=["Matches"])
-@cache(expire=300, namespace="vlrapi-live-score")
 @limiter.limit("250/minute")
+@response_cache.cached("vlrapi-live-score")
 async def get_live_scores(request: Request):
     """
     Get live match scores
     """
-    async with httpx.AsyncClient(timeout=8.0) as client:
-        return await vlr.vlr_live_score(client)
+    return await vlr.vlr_live_score()
+
+
+@app.get("/match/live_score/stream", tags=["Matches"])
+@limiter.limit("250/minute")
+async def stream_live_scores(request: Request):
+    """
+    Server-sent events feed of every live match
+
+    Sends a `snapshot` event on connect, then `update` events with matches whose
+    score or rounds changed and `remove` events with match pages no longer live.
+    """
+    return StreamingResponse(
+        live_poller.events(),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/match/streams/{match}", tags=["Streams"])
 @limiter.limit("250/minute")
-@cache(expire=300, namespace="vlrapi-streams")
+@response_cache.cached("vlrapi-streams")
 async def get_match_streams(match: str, request: Request):
     """
     Get streams for a specific match
     - **match**: Match ID from VLR.GG
     """
-    async with httpx.AsyncClient(timeout=8.0) as client:
-        return await vlr.vlr_streams(match, client)
+    return await vlr.vlr_streams(match)
+
+
+def match_cache_policy(result: Dict[str, Any]) -> CachePolicy:
+    """Cache a completed match for days, and a live or upcoming one briefly."""
+    state = result.get("data", {}).get("state")
+    if state == "completed":
+        return get_policy("vlrapi-match-completed")
+    if state == "live":
+        return get_policy("vlrapi-match-live")
+    return get_policy("vlrapi-match")
+
+
+@app.get("/match/{match}", response_model=MatchDetailResponse, tags=["Matches"])
+@limiter.limit("250/minute")
+@response_cache.cached("vlrapi-match", policy=match_cache_policy)
+async def get_match_detail(match: str, request: Request):
+    """
+    Get a match's maps, vetoes and per-player scoreboards
+    
+    The match page and its performance tab are fetched concurrently. Player
+    stats are numbers (rating, ACS, K/D/A, KAST, ADR, HS%, first kills, plus
+    multi-kills, clutches, plants and defuses). Completed matches are cached
+    for a week, live ones for a few seconds.
+    
+    - **match**: Match ID from VLR.GG
+    """
+    if not match.isdigit():
+        raise HTTPException(status_code=400, detail="Match must be a numeric VLR.GG match ID")
+    return await vlr.vlr_match(match)
+
+
+@app.get("/img/{path:path}", tags=["Images"])
+@limiter.limit("600/minute")
+async def get_image(path: str, request: Request):
+    """
+    Team logos and tournament icons linked from other responses
+    
+    Images are kept in a disk cache and revalidated with vlr.gg once a day.
+    
+    - **path**: Host and path of the image, e.g. `owcdn.net/img/61491.png`
+    """
+    try:
+        meta, content = await image_proxy.get(path)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Unknown image")
+    
+    headers = {"ETag": f'"{meta.digest}"', "Cache-Control": f"public, max-age={config.IMAGE_MAX_AGE}"}
+    if etag_matches(request.headers.get("if-none-match"), meta.digest):
+        return Response(status_code=304, headers=headers)
+    return Response(content, media_type=meta.content_type, headers=headers)
+
+
+@app.post("/batch", tags=["Batch"])
+@limiter.limit("60/minute")
+async def run_batch(batch: BatchRequest, request: Request):
+    """
+    Run many queries in one round trip
+    
+    Identical queries are run once and the rest run concurrently. Results are
+    keyed by query (e.g. `rankings?region=na`), each with its own `status` and
+    either `data` or `error`.
+    """
+    if not 1 <= len(batch.queries) <= config.BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"A batch holds 1 to {config.BATCH_MAX_QUERIES} queries")
+    
+    results = await batch_runner.run([(query.endpoint, query.params) for query in batch.queries])
+    return {"status": 200, "data": results}
+
+
+async def query_archive(query: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a match store query in a thread, answering 503 when the archive is unavailable.
+
+    Without periodic ingestion the store is only read if a database file
+    already exists (e.g. filled by `python -m api.ingest` from cron), so a
+    request never creates one.
+    """
+    if ingestor.interval <= 0 and not os.path.exists(store.path):
+        raise HTTPException(status_code=503, detail="Match archive is disabled")
+    try:
+        return await asyncio.to_thread(query, *args, **kwargs)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=503, detail=f"Match archive is unavailable: {e}")
+
+
+@app.get("/archive/matches", tags=["Archive"])
+@limiter.limit("250/minute")
+async def get_archived_matches(
+    request: Request,
+    team: Optional[str] = None,
+    tournament: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    state: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+):
+    """
+    Query matches stored by the ingestor (no scraping)
+    
+    - **team**: Team name, either side (case-insensitive)
+    - **tournament**: Part of the tournament name
+    - **start** / **end**: Inclusive date range (YYYY-MM-DD)
+    - **state**: "completed" or "upcoming"
+    """
+    if state not in (None, "completed", "upcoming"):
+        raise HTTPException(status_code=400, detail="State must be completed or upcoming")
+    if not 1 <= limit <= 1000:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and 1000")
+    
+    matches = await query_archive(
+        store.find_matches,
+        team=team,
+        tournament=tournament,
+        start=start.isoformat() if start else None,
+        end=end.isoformat() if end else None,
+        state=state,
+        limit=limit,
+        offset=offset,
+    )
+    return {"data": {"status": 200, "segments": matches}}
+
+
+@app.get("/archive/rankings/{region}", tags=["Archive"])
+@limiter.limit("250/minute")
+async def get_archived_rankings(region: str, request: Request):
+    """
+    Latest rankings snapshot stored by the ingestor (no scraping)
+    
+    - **region**: Region shortcode, as for /rankings/{region}
+    """
+    if region not in region_map:
+        raise HTTPException(status_code=404, detail=f"Unknown region: {region}")
+    return {"status": 200, "data": await query_archive(store.latest_rankings, region)}
 
 
 @app.get('/health', tags=["System"])
@@ -172,6 +509,92 @@ def health():
     return {"status": "healthy"}
 
 
+@app.get('/ready', tags=["System"])
+def ready():
+    """
+    Readiness probe: 503 until the startup cache warm-up (WARM_ENDPOINTS) is
+    done, so a load balancer only routes traffic to a warm instance
+    """
+    progress = cache_warmer.progress()
+    return JSONResponse(progress, status_code=200 if progress["ready"] else 503)
+
+
+@app.get('/health/stats', tags=["System"])
+def health_stats():
+    """
+    Internal statistics (cache hit/stale/miss and request coalescing counts)
+    """
+    return {
+        **vlr.stats(),
+        "cache": response_cache.stats(),
+        "live": live_poller.stats(),
+        "ingest": ingestor.stats(),
+        "stats_tables": stats_analytics.stats(),
+        "images": image_proxy.stats(),
+        "warmer": cache_warmer.stats(),
+        "snapshot": snapshotter.stats(),
+    }
+
+
+@app.get('/metrics', tags=["System"], response_class=PlainTextResponse)
+def metrics():
+    """
+    Prometheus metrics: request, upstream, parse/extract and facade latency
+    histograms, upstream status codes and in-flight requests, and cache
+    hit/stale/miss counts per namespace
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+def require_admin(request: Request) -> None:
+    """
+    Allow a request only if it carries the configured X-Admin-Token.
+    """
+    token = request.headers.get("x-admin-token", "")
+    if not config.ADMIN_TOKEN or not secrets.compare_digest(token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.post('/admin/profiler', tags=["Admin"], dependencies=[Depends(require_admin)])
+def start_profiler(rate: float = 0.01, reset: bool = False):
+    """
+    Profile a sample of requests with cProfile
+    
+    - **rate**: Fraction of requests profiled (0 < rate <= 1)
+    - **reset**: Drop the stats aggregated so far
+    """
+    if reset:
+        profiler.reset()
+    try:
+        profiler.enable(rate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return profiler.report(limit=0)
+
+
+@app.delete('/admin/profiler', tags=["Admin"], dependencies=[Depends(require_admin)])
+def stop_profiler():
+    """
+    Stop sampling requests (aggregated stats are kept)
+    """
+    profiler.disable()
+    return profiler.report(limit=0)
+
+
+@app.get('/admin/profiler', tags=["Admin"], dependencies=[Depends(require_admin)])
+def get_profile(sort: str = "cumulative", limit: Optional[int] = None):
+    """
+    Hottest functions over every profiled request
+    
+    - **sort**: "cumulative", "tottime" or "calls"
+    - **limit**: Number of functions (default PROFILE_TOP)
+    """
+    try:
+        return profiler.report(sort, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # Custom OpenAPI schema
 def custom_openapi():
     if app.openapi_schema:
@@ -0,0 +1,22 @@
+from typing import Any, Dict, List
+from pydantic import BaseModel, Field
+
+class BatchQuery(BaseModel):
+    """Model for one sub-query of a batch request."""
+    endpoint: str = Field(description="One of news, results, upcoming, live_score, stats, rankings, streams")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Endpoint parameters (region, timespan, match)")
+
+class BatchRequest(BaseModel):
+    """Request model for the batch endpoint."""
+    queries: List[BatchQuery] = Field(description="Sub-queries to run; identical ones are only run once")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "queries": [
+                    {"endpoint": "rankings", "params": {"region": "na"}},
+                    {"endpoint": "rankings", "params": {"region": "eu"}},
+                    {"endpoint": "streams", "params": {"match": "489995"}},
+                ]
+            }
+        }
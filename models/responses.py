@@ -12,6 +12,7 @@ class NewsItem(BaseModel):
 class NewsResponse(BaseModel):
     """Response model for news API endpoint."""
     data: dict = Field(description="Response data container")
+    stale: Optional[dict] = Field(None, description="Set (with the result's age in seconds) when vlr.gg is failing and the last good result is served")
     
     class Config:
         schema_extra = {
@@ -46,7 +47,7 @@ class MatchItem(BaseModel):
     score1: str = Field(description="Score for team 1")
     score2: str = Field(description="Score for team 2")
     tournament_name: Optional[str] = Field(None, description="Tournament name")
-    tournament_icon: str = Field(description="Tournament icon as a base64 data URI (e.g. data:image/png;base64,...) ")
+    tournament_icon: str = Field(description="Tournament icon URL, served by the /img proxy (e.g. /img/owcdn.net/img/61491.png)")
     round_info: str = Field(description="Match round information")
     match_page: str = Field(description="URL to the match page")
     match_stream: Optional[dict] = Field(None, description="Stream information if available")
@@ -96,7 +97,91 @@ class TeamRanking(BaseModel):
     country: str = Field(description="Team country")
     last_played: str = Field(description="Last played match info")
     last_played_team: str = Field(description="Team from last played match")
-    last_played_team_logo: str = Field(description="Logo (base64 data URI) of the team from last played match")
+    last_played_team_logo: str = Field(description="Logo URL (/img proxy) of the team from last played match")
     record: str = Field(description="Team record")
     earnings: str = Field(description="Team earnings")
-    logo: str = Field(description="Team logo as a base64 data URI")
\ No newline at end of file
+    logo: str = Field(description="Team logo URL, served by the /img proxy")
+
+class MatchPlayerPerformance(BaseModel):
+    """Model for a player's performance tab stats."""
+    multi_2k: int = Field(alias="2k", description="Rounds with two kills")
+    multi_3k: int = Field(alias="3k", description="Rounds with three kills")
+    multi_4k: int = Field(alias="4k", description="Rounds with four kills")
+    multi_5k: int = Field(alias="5k", description="Rounds with five kills")
+    clutch_1v1: int = Field(alias="1v1", description="1v1 clutches won")
+    clutch_1v2: int = Field(alias="1v2", description="1v2 clutches won")
+    clutch_1v3: int = Field(alias="1v3", description="1v3 clutches won")
+    clutch_1v4: int = Field(alias="1v4", description="1v4 clutches won")
+    clutch_1v5: int = Field(alias="1v5", description="1v5 clutches won")
+    econ: int = Field(description="Economy rating")
+    plants: int = Field(description="Spike plants")
+    defuses: int = Field(description="Spike defuses")
+
+class MatchPlayerStats(BaseModel):
+    """Model for a player's scoreboard line on one map or the whole series."""
+    player: str = Field(description="Player name")
+    team: str = Field(description="Team tag")
+    url_path: str = Field(description="URL path to the player page")
+    agents: List[str] = Field(description="Agents played")
+    rating: Optional[float] = Field(None, description="Rating")
+    average_combat_score: Optional[int] = Field(None, description="Average combat score")
+    kills: Optional[int] = Field(None, description="Kills")
+    deaths: Optional[int] = Field(None, description="Deaths")
+    assists: Optional[int] = Field(None, description="Assists")
+    kill_death_diff: Optional[int] = Field(None, description="Kills minus deaths")
+    kast: Optional[float] = Field(None, description="Percentage of rounds with a kill, assist, survival or trade")
+    average_damage_per_round: Optional[int] = Field(None, description="Average damage per round")
+    headshot_percentage: Optional[float] = Field(None, description="Headshot percentage")
+    first_kills: Optional[int] = Field(None, description="First kills")
+    first_deaths: Optional[int] = Field(None, description="First deaths")
+    first_kill_diff: Optional[int] = Field(None, description="First kills minus first deaths")
+    performance: Optional[MatchPlayerPerformance] = Field(None, description="Performance tab stats")
+
+class MatchMapTeam(BaseModel):
+    """Model for a team's rounds on one map."""
+    name: str = Field(description="Team name")
+    score: Optional[int] = Field(None, description="Rounds won")
+    ct: Optional[int] = Field(None, description="Rounds won on defense")
+    t: Optional[int] = Field(None, description="Rounds won on attack")
+    ot: Optional[int] = Field(None, description="Rounds won in overtime, if played")
+
+class MatchMap(BaseModel):
+    """Model for a played map."""
+    game_id: str = Field(description="VLR.GG game ID of the map")
+    map: str = Field(description="Map name")
+    picked_by: Optional[int] = Field(None, description="1 or 2 for the team that picked the map, None for the decider")
+    duration: str = Field(description="Map duration")
+    winner: Optional[int] = Field(None, description="1 or 2 for the team that won the map")
+    teams: List[MatchMapTeam] = Field(description="Both teams' rounds")
+    players: List[MatchPlayerStats] = Field(description="Scoreboard of the map")
+
+class MatchVeto(BaseModel):
+    """Model for a map veto step."""
+    team: Optional[str] = Field(None, description="Team tag (None for the remaining map)")
+    action: str = Field(description="ban, pick or remains")
+    map: str = Field(description="Map name")
+
+class MatchTeam(BaseModel):
+    """Model for a team of a match."""
+    name: str = Field(description="Team name")
+    url_path: str = Field(description="URL path to the team page")
+    logo: str = Field(description="Logo URL, served by the /img proxy")
+    score: Optional[int] = Field(None, description="Maps won")
+
+class MatchDetail(BaseModel):
+    """Model for the full detail of a match."""
+    match_id: str = Field(description="Match ID from VLR.GG")
+    state: str = Field(description="completed, live or upcoming")
+    event: dict = Field(description="Event name, series, url_path and tournament_icon")
+    date: Optional[str] = Field(None, description="Start time (UTC)")
+    format: Optional[str] = Field(None, description="Series format, e.g. Bo3")
+    teams: List[MatchTeam] = Field(description="Both teams")
+    vetoes: List[MatchVeto] = Field(description="Map vetoes in order")
+    maps: List[MatchMap] = Field(description="Played maps")
+    players: List[MatchPlayerStats] = Field(description="Scoreboard over the whole series")
+
+class MatchDetailResponse(BaseModel):
+    """Response model for the match detail endpoint."""
+    status: int = Field(description="Upstream status")
+    data: MatchDetail = Field(description="Match detail")
+    stale: Optional[dict] = Field(None, description="Set (with the result's age in seconds) when vlr.gg is failing and the last good result is served")
@@ -0,0 +1,69 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from api.aggregate import StatsAggregator, top_players
+from api.cache import ResponseCache
+from api.errors import UpstreamUnavailable
+
+
+def player(name, org, acs, hs=""):
+    """Build a scraped player row"""
+    return {"player": name, "org": org, "average_combat_score": acs, "headshot_percentage": hs}
+
+
+def stats_page(*players):
+    """Wrap player rows in the stats scraper's response shape"""
+    return {"data": {"status": 200, "segments": list(players)}}
+
+
+class TestStatsAggregator:
+    """Tests for the cross-region stats leaderboard"""
+
+    def test_merges_regions_and_sorts(self):
+        """Test that players are deduped across regions and sorted with top-k"""
+        pages = {
+            "na": stats_page(player("TenZ", "SEN", "250.1", "30%"), player("zekken", "SEN", "240.0", "")),
+            "eu": stats_page(player("Derke", "FNC", "260.5", "25%"), player("tenz", "sen", "199.0", "31%")),
+            "ap": None,
+        }
+
+        async def vlr_stats(region, timespan):
+            if pages[region] is None:
+                raise UpstreamUnavailable("API response: 503", status=503)
+            return pages[region]
+
+        vlr = AsyncMock()
+        vlr.vlr_stats.side_effect = vlr_stats
+        cache = ResponseCache()
+        aggregator = StatsAggregator(vlr, cache, regions=["na", "eu", "ap"])
+
+        async def run():
+            board = await aggregator.leaderboard(30, limit=2)
+            by_headshots = await aggregator.leaderboard(30, sort="headshot_percentage", descending=False)
+            return board, by_headshots
+
+        board, by_headshots = asyncio.run(run())
+
+        assert [row["player"] for row in board["data"]["segments"]] == ["Derke", "TenZ"]
+        assert board["data"]["segments"][1]["regions"] == ["na", "eu"]
+        assert board["data"]["regions"] == [
+            {"region": "na", "status": 200}, {"region": "eu", "status": 200}, {"region": "ap", "status": 503},
+        ]
+        # Players without a value come last whatever the order
+        assert [row["player"] for row in by_headshots["data"]["segments"]] == ["Derke", "TenZ", "zekken"]
+        # Region pages are cached individually and reused by the second leaderboard
+        assert vlr.vlr_stats.await_count == 4
+        assert cache.stats()["vlrapi-stats"]["hit"] == 2
+
+    def test_unknown_sort_column(self):
+        """Test that only stat columns can be sorted on"""
+        aggregator = StatsAggregator(AsyncMock(), ResponseCache(), regions=["na"])
+        with pytest.raises(ValueError):
+            asyncio.run(aggregator.leaderboard(30, sort="player"))
+
+    def test_top_players_keeps_ties_in_order(self):
+        """Test that equal values keep their original order"""
+        rows = [player("a", "x", "1.0"), player("b", "x", "2.0"), player("c", "x", "1.0")]
+        assert [row["player"] for row in top_players(rows, "average_combat_score")] == ["b", "a", "c"]
@@ -1,7 +1,17 @@
+import asyncio
+import json
+import time
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
+from api.cache import CacheEntry
+from api.errors import RateLimited
+from api.stats_table import StatsTable
+from api.store import MatchStore
+import main
 from main import app
 
 client = TestClient(app)
@@ -9,7 +19,7 @@ client = TestClient(app)
 @pytest.fixture
 def mock_vlr():
     """Mock the VLR client responses"""
-    with patch("main.vlr") as mock:
+    with patch("main.vlr", new_callable=AsyncMock) as mock:
         yield mock
 
 class TestHealthEndpoint:
@@ -21,6 +31,16 @@ class TestHealthEndpoint:
         assert response.status_code == 200
         assert "status" in response.json()
         assert response.json()["status"] == "healthy"
+    
+    def test_ready_until_warmed_up(self):
+        """Test that readiness is reported only once the cache warm-up is done"""
+        warmer = main.cache_warmer
+        response = client.get("/ready")
+        assert response.status_code == (200 if warmer.ready else 503)
+        assert response.json()["total"] == len(warmer.warm_keys)
+        
+        with patch.object(warmer, "warmed", len(warmer.warm_keys)):
+            assert client.get("/ready").status_code == 200
 
 class TestNewsEndpoint:
     """Tests for the news endpoint"""
@@ -52,4 +72,138 @@ class TestNewsEndpoint:
         assert response.json() == mock_data
         mock_vlr.vlr_recent.assert_called_once()
 
+    def test_news_etag_not_modified(self, mock_vlr):
+        """Test that cached bodies carry an ETag, honour If-None-Match and are gzipped"""
+        mock_vlr.vlr_recent.return_value = {
+            "data": {"status": 200, "segments": [{"title": "Article " * 20, "url_path": "/1"}] * 10}
+        }
+        
+        first = client.get("/news?etag=1", headers={"Accept-Encoding": "gzip"})
+        etag = first.headers["ETag"]
+        second = client.get("/news?etag=1", headers={"If-None-Match": etag})
+        
+        assert first.headers["Content-Encoding"] == "gzip"
+        assert first.json() == mock_vlr.vlr_recent.return_value
+        assert second.status_code == 304
+        assert second.content == b""
+        mock_vlr.vlr_recent.assert_called_once()
+
+    def test_news_upstream_throttled(self, mock_vlr):
+        """Test that upstream throttling is reported as a 503 with Retry-After"""
+        mock_vlr.vlr_recent.side_effect = RateLimited("API response: 429", status=429, retry_after=2.5)
+        
+        response = client.get("/news?throttled=1")
+        
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
+        assert response.json()["upstream_status"] == 429
+
+class TestRateLimiting:
+    """Tests for rate limiting of cached routes"""
+    
+    def test_background_refresh_is_not_rate_limited(self, mock_vlr):
+        """Test that refreshing a stale entry does not go through the client's rate limit"""
+        mock_vlr.vlr_rankings.return_value = {"status": 200, "data": ["fresh"]}
+        key = main.response_cache.make_key("vlrapi-rankings", "/rankings/br")
+        now = time.time()
+        
+        async def run():
+            await main.response_cache.backend.set(key, CacheEntry({"status": 200, "data": ["old"]}, now - 1, now + 60))
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://api") as http:
+                response = await http.get("/rankings/br")
+            # The limiter wraps every call of a limited endpoint
+            limited = limiter_calls.call_count
+            await asyncio.gather(*main.response_cache._tasks)
+            return response, limited
+        
+        with patch.object(main.limiter, "_inject_headers", wraps=main.limiter._inject_headers) as limiter_calls:
+            response, during_request = asyncio.run(run())
+        
+        assert response.json() == {"status": 200, "data": ["old"]}
+        mock_vlr.vlr_rankings.assert_awaited_once_with("br")
+        assert during_request == limiter_calls.call_count == 1
+
+class TestUpcomingEndpoint:
+    """Tests for the upcoming matches endpoint"""
+    
+    def test_upcoming_ndjson_stream(self, mock_vlr):
+        """Test that streaming clients get one JSON line per record and bypass the cache"""
+        records = [
+            {"type": "match", "page": 1, "data": {"team1": "A", "team2": "B"}},
+            {"type": "end", "status": 200, "pages": [{"page": 1, "status": 200}]},
+        ]
+        
+        async def stream():
+            for record in records:
+                yield record
+        
+        mock_vlr.vlr_upcoming_stream = AsyncMock(side_effect=stream)
+        
+        response = client.get("/match/upcoming?stream=1")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert [json.loads(line) for line in response.text.splitlines()] == records
+        mock_vlr.vlr_upcoming.assert_not_called()
+
+class TestMatchDetailEndpoint:
+    """Tests for the match detail endpoint"""
+    
+    @pytest.mark.parametrize("state,fresh", [("completed", 7 * 86400), ("live", 10)])
+    def test_cache_policy_follows_match_state(self, mock_vlr, state, fresh):
+        """Test that completed matches are cached for a week and live ones briefly"""
+        mock_vlr.vlr_match.return_value = {"status": 200, "data": {"match_id": "1", "state": state}}
+        match = "700001" if state == "completed" else "700002"
+        
+        first = client.get(f"/match/{match}")
+        second = client.get(f"/match/{match}")
+        entry = asyncio.run(main.response_cache.backend.get(main.response_cache.make_key("vlrapi-match", f"/match/{match}")))
+        
+        assert first.json() == second.json() == mock_vlr.vlr_match.return_value
+        mock_vlr.vlr_match.assert_called_once_with(match)
+        assert entry.fresh_until - time.time() == pytest.approx(fresh, abs=5)
+    
+    def test_rejects_non_numeric_id(self, mock_vlr):
+        """Test that a match ID must be numeric"""
+        assert client.get("/match/abc").status_code == 400
+        mock_vlr.vlr_match.assert_not_called()
+
+class TestArchiveEndpoints:
+    """Tests for the match archive routes"""
+    
+    def test_unavailable_archive_answers_503(self, tmp_path):
+        """Test that a disabled or unreadable archive answers 503 without creating a database"""
+        path = tmp_path / "archive.sqlite3"
+        with patch.object(main, "store", MatchStore(str(path))), patch.object(main.ingestor, "interval", 0):
+            assert client.get("/archive/matches").status_code == 503
+            assert client.get("/archive/rankings/na").status_code == 503
+        assert not path.exists()
+        
+        unwritable = MatchStore(str(tmp_path / "missing" / "archive.sqlite3"))
+        with patch.object(main, "store", unwritable), patch.object(main.ingestor, "interval", 60):
+            assert client.get("/archive/matches").status_code == 503
+    
+    def test_unknown_region_answers_404(self):
+        """Test that archived rankings reject regions /rankings does not know"""
+        assert client.get("/archive/rankings/zz").status_code == 404
+
+class TestStatsEndpoint:
+    """Tests for the stats table query parameters"""
+    
+    def test_unknown_region_answers_404(self, mock_vlr):
+        """Test that only stats page regions are accepted, as in batch queries"""
+        mock_vlr.vlr_stats.return_value = {"data": {"status": 200, "segments": []}}
+        assert client.get("/stats/cn/30").status_code == 404
+        assert client.get("/stats/sa/30").status_code == 200
+        mock_vlr.vlr_stats.assert_called_once_with("sa", 30)
+    
+    @pytest.mark.parametrize("params", ["percentiles=150", "percentiles=-50", "limit=-1", "limit=0"])
+    def test_rejects_invalid_queries(self, params):
+        """Test that out of range percentiles and non-positive limits answer 400"""
+        rows = [{"player": f"p{i}", "org": "x", "average_combat_score": str(200 + i)} for i in range(3)]
+        with patch.object(main.stats_analytics, "table", AsyncMock(return_value=StatsTable.from_rows(rows))):
+            response = client.get(f"/stats/na/30?{params}")
+        assert response.status_code == 400
+
 # Add more test classes for other endpoints as needed
\ No newline at end of file
@@ -0,0 +1,54 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from api.batch import BatchRunner, query_key, validate
+from api.cache import ResponseCache
+from api.errors import NotFound
+
+
+class TestBatchRunner:
+    """Tests for the batch endpoint runner"""
+
+    def test_dedupes_and_reports_errors_per_item(self):
+        """Test that identical queries run once and failures stay on their own item"""
+        vlr = AsyncMock()
+        vlr.vlr_rankings.side_effect = lambda region: {"status": 200, "data": [region]}
+        vlr.vlr_streams.side_effect = NotFound("API response: 404", status=404)
+        cache = ResponseCache()
+        runner = BatchRunner(vlr, cache, concurrency=2)
+
+        results = asyncio.run(runner.run([
+            ("rankings", {"region": "na"}),
+            ("rankings", {"region": "eu"}),
+            ("rankings", {"region": "na"}),
+            ("streams", {"match": 1}),
+            ("stats", {"region": "na", "timespan": 7}),
+            ("unknown", {}),
+        ]))
+
+        assert list(results) == [
+            "rankings?region=na", "rankings?region=eu", "streams?match=1",
+            "stats?region=na&timespan=7", "unknown",
+        ]
+        assert results["rankings?region=na"] == {"status": 200, "data": {"status": 200, "data": ["na"]}}
+        assert results["streams?match=1"]["status"] == 404
+        assert results["stats?region=na&timespan=7"]["status"] == 400
+        assert results["unknown"] == {"status": 400, "error": "Unknown endpoint: unknown"}
+        assert vlr.vlr_rankings.await_count == 2
+        # Results share the GET routes' cache entries
+        assert "vlrapi-rankings" in cache.stats()
+
+    def test_query_key_is_order_independent(self):
+        """Test that parameter order does not create distinct queries"""
+        assert query_key("stats", {"timespan": 30, "region": "na"}) == query_key("stats", {"region": "na", "timespan": 30})
+
+    def test_regions_match_the_get_routes(self):
+        """Test that stats and rankings queries accept the same regions as their GET routes"""
+        assert validate("stats", {"region": "sa", "timespan": 30})[1] == {"region": "sa", "timespan": 30}
+        with pytest.raises(ValueError):
+            validate("stats", {"region": "cn", "timespan": 30})
+        assert validate("rankings", {"region": "cn"})[1] == {"region": "cn"}
+        with pytest.raises(ValueError):
+            validate("rankings", {"region": "sa"})
@@ -0,0 +1,51 @@
+import asyncio
+import os
+
+import pytest
+
+from benchmarks import bench_parsers, load_test
+from benchmarks.fake_vlr import FakeVlr
+
+# Throughput is normalized by the calibration loop, so the baseline holds on
+# other machines; the threshold is looser than the CLI default to absorb noise
+# from a busy test runner (calibration and cases do not run at the same instant)
+THRESHOLD = float(os.getenv("BENCH_THRESHOLD", "0.6"))
+
+
+class TestParserBenchmarks:
+    """Offline parser throughput checks against benchmarks/baseline.json"""
+
+    @pytest.mark.parametrize("case", bench_parsers.CASES, ids=lambda case: case.name)
+    def test_fixture_yields_items(self, case):
+        """Test that every saved page still produces items, so timings measure real work"""
+        assert bench_parsers.run_case(case, min_time=0.0, rounds=1)["items"] > 0
+
+    def test_no_throughput_regression(self):
+        """Test that no scraper got slower than the recorded baseline allows"""
+        baseline = bench_parsers.load_baseline()
+        results = bench_parsers.run_all(min_time=0.1, rounds=3)
+        assert bench_parsers.compare(results, baseline, THRESHOLD) == []
+
+
+class TestLoadTest:
+    """Smoke tests for the end-to-end load test against the fake vlr.gg"""
+
+    def test_fake_vlr_routes_scraper_urls(self):
+        """Test that scraper URLs map to fixtures and unknown pages are 404s"""
+        fake = FakeVlr()
+        assert fake.resolve("www.vlr.gg", "/matches", {"page": ["2"]})[:2] == ("matches", 200)
+        assert fake.resolve("www.vlr.gg", "/matches", {"page": ["9"]})[:2] == ("matches", 404)
+        assert fake.resolve("www.vlr.gg", "/rankings/north-america", {})[:2] == ("rankings", 200)
+        assert fake.resolve("owcdn.net", "/img/1.png", {})[:2] == ("image", 200)
+        assert fake.resolve("www.vlr.gg", "/nope/nope", {})[:2] == ("unknown", 404)
+
+    def test_warm_cache_does_not_reach_upstream(self):
+        """Test that a cold run fetches each page once and a warm run not at all"""
+        mix = load_test.parse_mix("/news=1,/rankings/na=1")
+        cold = asyncio.run(load_test.run_scenario(load_test.Scenario("cold", False, 0.0, 0.0), mix, 20, 5))
+        warm = asyncio.run(load_test.run_scenario(load_test.Scenario("warm", True, 0.0, 0.0), mix, 20, 5))
+
+        assert cold["statuses"] == {"200": 20}
+        assert cold["upstream_by_pattern"] == {"news": 1, "rankings": 1}
+        assert warm["statuses"] == {"200": 20}
+        assert warm["amplification"] == 0
@@ -0,0 +1,103 @@
+import asyncio
+
+import httpx
+import pytest
+
+from api.breaker import CircuitBreaker
+from api.errors import CircuitOpen, NotFound
+from api.governor import OutboundGovernor
+from api.scrape import Vlr
+from api.upstream import UpstreamClient
+
+NEWS = (
+    '<a class="wf-module-item" href="/1/a"><div>Title</div><div><div></div><div>Text</div></div>'
+    '<div class="ge-text-light">• May 5, 2025 • by Author</div></a>'
+)
+
+
+def make_vlr(handler):
+    """Build a Vlr facade answering through `handler`, without retries"""
+    governor = OutboundGovernor(retries=0)
+    return Vlr(UpstreamClient(transport=httpx.MockTransport(handler), http2=False, governor=governor))
+
+
+class TestCircuitBreaker:
+    """Tests for the per-route circuit breaker"""
+
+    def test_opens_after_threshold_and_probes(self):
+        """Test the closed, open and half open transitions"""
+        breaker = CircuitBreaker("news", failure_threshold=2, reset_timeout=0)
+        breaker.record_failure()
+        assert breaker.state == "closed"
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        breaker.before_call()
+        assert breaker.state == "half_open"
+        with pytest.raises(CircuitOpen):
+            breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+    def test_serves_last_good_result_while_open(self):
+        """Test that failures fall back to the last good result and stop hitting upstream"""
+        calls = 0
+        healthy = True
+
+        def handler(request):
+            nonlocal calls
+            calls += 1
+            return httpx.Response(200, text=NEWS) if healthy else httpx.Response(503)
+
+        vlr = make_vlr(handler)
+
+        async def run():
+            nonlocal healthy
+            fresh = await vlr.vlr_recent()
+            healthy = False
+            fallbacks = [await vlr.vlr_recent() for _ in range(8)]
+            return fresh, fallbacks
+
+        fresh, fallbacks = asyncio.run(run())
+
+        assert "stale" not in fresh
+        for fallback in fallbacks:
+            assert fallback["data"] == fresh["data"]
+            assert fallback["stale"]["age"] >= 0
+        # The breaker opened after the configured threshold of failed calls
+        assert calls == 1 + vlr.breakers["vlr_recent"].failure_threshold
+        assert vlr.breakers["vlr_recent"].state == "open"
+
+    def test_not_found_does_not_trip(self):
+        """Test that a 404 is raised as is and leaves the circuit closed"""
+        vlr = make_vlr(lambda request: httpx.Response(404))
+
+        async def run():
+            for _ in range(10):
+                with pytest.raises(NotFound):
+                    await vlr.vlr_streams("123")
+
+        asyncio.run(run())
+
+        assert vlr.breakers["vlr_streams"].state == "closed"
+
+    def test_unknown_region_does_not_trip(self):
+        """Test that unknown regions are rejected without opening the route's circuit for other regions"""
+        calls = 0
+
+        def handler(request):
+            nonlocal calls
+            calls += 1
+            return httpx.Response(200, text="<div></div>")
+
+        vlr = make_vlr(handler)
+
+        async def run():
+            for index in range(10):
+                with pytest.raises(NotFound):
+                    await vlr.vlr_rankings(f"zz{index}")
+            return await vlr.vlr_rankings("na")
+
+        assert asyncio.run(run())["status"] == 200
+        assert calls == 1
+        assert vlr.breakers["vlr_rankings"].state == "closed"
@@ -0,0 +1,191 @@
+import asyncio
+import gzip
+import time
+
+from api.cache import CacheEntry, CachePolicy, InMemoryCacheBackend, ResponseCache
+from api.cache_backends import FailoverCacheBackend, MemcachedCacheBackend, memcached_key
+from api.encoding import EncodedBody, accepted_encodings, etag_matches
+
+
+class TestResponseCache:
+    """Tests for the stale-while-revalidate response cache"""
+
+    def test_fresh_entry_is_served_from_cache(self):
+        """Test that a fresh entry does not trigger another fetch"""
+        cache = ResponseCache()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return {"calls": calls}
+
+        async def run():
+            policy = CachePolicy(fresh=60, stale=60)
+            first = await cache.get_or_fetch("vlrapi-test", "/x", fetch, policy)
+            second = await cache.get_or_fetch("vlrapi-test", "/x", fetch, policy)
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert first == second == {"calls": 1}
+        assert cache.stats()["vlrapi-test"] == {"hit": 1, "stale": 0, "miss": 1}
+
+    def test_stale_entry_served_while_refreshing(self):
+        """Test that a stale entry is returned immediately and refreshed in the background"""
+        cache = ResponseCache()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        async def run():
+            policy = CachePolicy(fresh=0, stale=60)
+            assert await cache.get_or_fetch("vlrapi-test", "/y", fetch, policy) == 1
+            # Entry is already stale: the old value comes back, one refresh runs
+            assert await cache.get_or_fetch("vlrapi-test", "/y", fetch, policy) == 1
+            assert await cache.get_or_fetch("vlrapi-test", "/y", fetch, policy) == 1
+            await asyncio.sleep(0.01)
+            assert await cache.get_or_fetch("vlrapi-test", "/y", fetch, policy) == 2
+
+        asyncio.run(run())
+        assert calls == 2
+        assert cache.stats()["vlrapi-test"]["stale"] == 3
+
+    def test_memory_backend_is_bounded(self):
+        """Test that the in-memory backend evicts the least recently used entries when full"""
+        backend = InMemoryCacheBackend(max_entries=2)
+        now = time.time()
+
+        async def run():
+            await backend.set("a", CacheEntry(1, now + 60, now + 60))
+            await backend.set("b", CacheEntry(2, now + 60, now + 60))
+            await backend.get("a")
+            await backend.set("c", CacheEntry(3, now + 60, now + 60))
+            return [await backend.get(key) is not None for key in ("a", "b", "c")]
+
+        assert asyncio.run(run()) == [True, False, True]
+
+
+class TestEncodedBody:
+    """Tests for pre-encoded, pre-compressed response bodies"""
+
+    def test_variants_and_negotiation(self):
+        """Test that large bodies get a gzip variant picked by Accept-Encoding"""
+        value = {"data": {"status": 200, "segments": [{"title": "x" * 40}] * 30}}
+        body = EncodedBody.encode(value)
+
+        assert body.data() == value
+        assert gzip.decompress(body.gzip) == body.body
+        assert body.negotiate("gzip, deflate") == "gzip"
+        assert body.negotiate("gzip;q=0, identity") is None
+        assert body.negotiate(None) is None
+        assert EncodedBody.encode({"status": 200}).gzip is None
+        assert accepted_encodings("br;q=0.5, GZIP") == {"br": 0.5, "gzip": 1.0}
+
+    def test_etag_matching(self):
+        """Test that a tag sent for any encoding of the body matches"""
+        body = EncodedBody.encode({"status": 200})
+        assert etag_matches(body.etag(), body.digest)
+        assert etag_matches(f'"other", W/{body.etag("gzip")}', body.digest)
+        assert etag_matches("*", body.digest)
+        assert not etag_matches('"other"', body.digest)
+        assert not etag_matches(None, body.digest)
+
+    def test_get_or_fetch_decodes_route_bodies(self):
+        """Test that plain callers sharing a route key get the decoded result"""
+        cache = ResponseCache()
+
+        async def fetch_body():
+            return EncodedBody.encode({"data": {"status": 200}})
+
+        async def run():
+            await cache.get_or_fetch("vlrapi-test", "/z", fetch_body)
+            return await cache.get_or_fetch("vlrapi-test", "/z", fetch_body)
+
+        assert asyncio.run(run()) == {"data": {"status": 200}}
+
+    def test_stale_fallback_body_is_not_stored(self):
+        """Test that an encoded last-known-good fallback is served but not cached"""
+        cache = ResponseCache()
+        calls = 0
+
+        async def fetch_body():
+            nonlocal calls
+            calls += 1
+            return EncodedBody.encode({"data": {}, "stale": {"age": 1, "reason": "down"}})
+
+        async def run():
+            await cache.get_or_fetch("vlrapi-test", "/s", fetch_body)
+            await cache.get_or_fetch("vlrapi-test", "/s", fetch_body)
+
+        asyncio.run(run())
+        assert calls == 2
+
+
+class TestMemcachedBackend:
+    """Tests for the memcached-backed cache storage"""
+
+    def test_round_trip_with_compression(self):
+        """Test that entries survive memcached storage, compressed or not"""
+        from pymemcache.test.utils import MockMemcacheClient
+
+        client = MockMemcacheClient()
+        backend = MemcachedCacheBackend(client, compress_min_bytes=256)
+        small = CacheEntry({"status": 200}, time.time() + 60, time.time() + 120)
+        large = CacheEntry({"segments": ["x" * 40] * 20}, time.time() + 60, time.time() + 120)
+
+        async def run():
+            await backend.set("vlrggapi:vlrapi-news:/news", small)
+            await backend.set("vlrggapi:vlrapi-upcoming:/match/upcoming", large)
+            return (
+                await backend.get("vlrggapi:vlrapi-news:/news"),
+                await backend.get("vlrggapi:vlrapi-upcoming:/match/upcoming"),
+            )
+
+        assert asyncio.run(run()) == (small, large)
+        assert client.get("vlrggapi:vlrapi-news:/news")[:1] == b"j"
+        assert client.get("vlrggapi:vlrapi-upcoming:/match/upcoming")[:1] == b"z"
+
+    def test_encoded_body_round_trip(self):
+        """Test that encoded bodies and their variants are stored as raw bytes"""
+        from pymemcache.test.utils import MockMemcacheClient
+
+        client = MockMemcacheClient()
+        backend = MemcachedCacheBackend(client)
+        body = EncodedBody.encode({"segments": ["x" * 40] * 20})
+        entry = CacheEntry(body, time.time() + 60, time.time() + 120)
+
+        async def run():
+            await backend.set("vlrggapi:vlrapi-news:/news", entry)
+            return await backend.get("vlrggapi:vlrapi-news:/news")
+
+        assert asyncio.run(run()) == entry
+        assert client.get("vlrggapi:vlrapi-news:/news")[:1] == b"b"
+
+    def test_long_keys_are_hashed_within_namespace(self):
+        """Test that invalid memcached keys keep their namespace prefix"""
+        key = memcached_key("vlrggapi:vlrapi-stats:/stats?q=" + "a b" * 200)
+        assert key.startswith("vlrggapi:vlrapi-stats")
+        assert len(key) <= 250 and " " not in key
+
+    def test_failover_to_memory(self):
+        """Test that an unreachable memcached falls back to in-process memory"""
+
+        class Unreachable:
+            async def get(self, key):
+                raise ConnectionRefusedError()
+
+            async def set(self, key, entry):
+                raise ConnectionRefusedError()
+
+        backend = FailoverCacheBackend(Unreachable(), retry_after=60)
+        entry = CacheEntry("value", time.time() + 60, time.time() + 120)
+
+        async def run():
+            await backend.set("key", entry)
+            return await backend.get("key")
+
+        assert asyncio.run(run()) == entry
+        assert not backend.primary_available
@@ -0,0 +1,148 @@
+import asyncio
+
+import httpx
+import pytest
+
+from api.base_scraper import BaseScraper
+from api.errors import NotFound, RateLimited, UpstreamTimeout, UpstreamUnavailable
+from api.governor import BACKGROUND, INTERACTIVE, OutboundGovernor, fetch_priority, mark_background, parse_retry_after
+from api.upstream import UpstreamClient
+
+URL = "https://www.vlr.gg/news"
+
+
+def make_upstream(handler, **governor):
+    """Build an upstream client answering through `handler` with a fast governor"""
+    governor.setdefault("backoff_base", 0.001)
+    return UpstreamClient(transport=httpx.MockTransport(handler), http2=False, governor=OutboundGovernor(**governor))
+
+
+class TestOutboundGovernor:
+    """Tests for the outbound rate governor"""
+
+    def test_interactive_requests_overtake_background(self):
+        """Test that queued interactive requests get tokens before background ones"""
+        governor = OutboundGovernor(rate=100, burst=1)
+        order = []
+
+        async def request(name, priority):
+            await governor.acquire("www.vlr.gg", priority)
+            order.append(name)
+
+        async def run():
+            await governor.acquire("www.vlr.gg")
+            await asyncio.gather(
+                request("background-1", BACKGROUND),
+                request("background-2", BACKGROUND),
+                request("interactive", INTERACTIVE),
+            )
+
+        asyncio.run(run())
+
+        assert order == ["interactive", "background-1", "background-2"]
+
+    def test_retry_after_is_honoured(self):
+        """Test that a 429 blocks the host for its Retry-After and is retried"""
+        answers = [httpx.Response(429, headers={"Retry-After": "0.05"}), httpx.Response(200, text="ok")]
+        upstream = make_upstream(lambda request: answers.pop(0))
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            response = await upstream.get(URL)
+            return response, loop.time() - started
+
+        response, elapsed = asyncio.run(run())
+
+        assert response.status_code == 200
+        assert elapsed >= 0.04
+        assert upstream.governor.throttled == 1
+
+    def test_server_errors_retried_until_exhausted(self):
+        """Test that 5xx answers are retried and the last one is returned"""
+        calls = 0
+
+        def handler(request):
+            nonlocal calls
+            calls += 1
+            return httpx.Response(503)
+
+        upstream = make_upstream(handler, retries=2)
+        response = asyncio.run(upstream.get(URL))
+
+        assert response.status_code == 503
+        assert calls == 3
+
+    def test_not_found_is_not_retried(self):
+        """Test that non-retryable answers are returned straight away"""
+        calls = 0
+
+        def handler(request):
+            nonlocal calls
+            calls += 1
+            return httpx.Response(404)
+
+        response = asyncio.run(make_upstream(handler).get(URL))
+
+        assert response.status_code == 404
+        assert calls == 1
+
+    def test_timeouts_raise_typed_error(self):
+        """Test that repeated timeouts surface as UpstreamTimeout"""
+        def handler(request):
+            raise httpx.ReadTimeout("slow", request=request)
+
+        with pytest.raises(UpstreamTimeout):
+            asyncio.run(make_upstream(handler, retries=1).get(URL))
+
+    def test_blocked_host_fails_fast(self):
+        """Test that a long Retry-After fails fast instead of queueing requests"""
+        upstream = make_upstream(lambda request: httpx.Response(429, headers={"Retry-After": "120"}), max_wait=1)
+
+        async def run():
+            first = await upstream.get(URL)
+            with pytest.raises(RateLimited):
+                await upstream.get(URL)
+            return first
+
+        assert asyncio.run(run()).status_code == 429
+        assert upstream.governor.failed_fast == 1
+
+    def test_background_priority_is_inherited(self):
+        """Test that tasks started from a background job keep its priority"""
+        governor = OutboundGovernor(rate=100, burst=1)
+        order = []
+
+        async def request(name):
+            await governor.acquire("www.vlr.gg", fetch_priority.get())
+            order.append(name)
+
+        async def background_job():
+            mark_background()
+            await asyncio.ensure_future(request("background"))
+
+        async def run():
+            await governor.acquire("www.vlr.gg")
+            await asyncio.gather(background_job(), request("interactive"))
+
+        asyncio.run(run())
+
+        assert order == ["interactive", "background"]
+
+    def test_parse_retry_after(self):
+        """Test that both Retry-After forms are understood"""
+        assert parse_retry_after("3") == 3.0
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert parse_retry_after("soon") is None
+
+
+class TestTypedErrors:
+    """Tests for the upstream error taxonomy"""
+
+    @pytest.mark.parametrize("status, error", [(404, NotFound), (429, RateLimited), (502, UpstreamUnavailable)])
+    def test_check_status_raises_typed_errors(self, status, error):
+        """Test that check_status raises the error matching the status"""
+        with pytest.raises(error) as raised:
+            BaseScraper(make_upstream(lambda request: httpx.Response(200))).check_status(status)
+        assert raised.value.status == status
+        assert str(raised.value) == f"API response: {status}"
@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from api.governor import OutboundGovernor
+from api.images import DiskImageCache, ImageMeta, ImageProxy, image_paths, image_source, proxy_image_url
+from api.upstream import UpstreamClient
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+def make_proxy(handler, directory, **kwargs):
+    """Build an image proxy whose upstream answers through `handler`"""
+    upstream = UpstreamClient(
+        transport=httpx.MockTransport(handler), http2=False, governor=OutboundGovernor(retries=0)
+    )
+    return ImageProxy(upstream, DiskImageCache(str(directory), max_bytes=kwargs.pop("max_bytes", 1024)), **kwargs)
+
+
+def meta(url, size):
+    """Metadata of a stored test image"""
+    return ImageMeta(url, "image/png", "d", size, None, None, time.time())
+
+
+class TestImageUrls:
+    """Tests for image link rewriting"""
+
+    def test_sources_become_proxy_paths(self):
+        """Test that page sources map to proxy paths and back"""
+        assert proxy_image_url("//owcdn.net/img/61491.png") == "/img/owcdn.net/img/61491.png"
+        assert proxy_image_url("/img/vlr/tmp/vlr.png") == "/img/www.vlr.gg/img/vlr/tmp/vlr.png"
+        assert proxy_image_url("https://example.com/a.png") == "https://example.com/a.png"
+        assert proxy_image_url(None) == ""
+        assert image_source("owcdn.net/img/61491.png") == "https://owcdn.net/img/61491.png"
+        for path in ("example.com/a.png", "owcdn.net/", "owcdn.net/img/../secret"):
+            with pytest.raises(ValueError):
+                image_source(path)
+
+    def test_image_paths_found_in_results(self):
+        """Test that every proxied image field of a result is found"""
+        result = {"data": [{"logo": "/img/owcdn.net/1.png", "last_played_team_logo": ""},
+                           {"logo": "https://example.com/2.png", "tournament_icon": "/img/owcdn.net/3.png"}]}
+        assert list(image_paths(result)) == ["owcdn.net/1.png", "owcdn.net/3.png"]
+
+
+class TestDiskImageCache:
+    """Tests for the on-disk image store"""
+
+    def test_least_recently_used_is_evicted(self, tmp_path):
+        """Test that going over the byte budget evicts the least recently used image"""
+        cache = DiskImageCache(str(tmp_path), max_bytes=100)
+        cache.put(meta("a", 40), b"a" * 40)
+        cache.put(meta("b", 40), b"b" * 40)
+        assert cache.get("a")[1] == b"a" * 40
+        cache.put(meta("c", 40), b"c" * 40)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.stats()["bytes"] == 80
+        # A new instance rebuilds its index from the directory
+        assert DiskImageCache(str(tmp_path)).get("c")[1] == b"c" * 40
+
+
+class TestImageProxy:
+    """Tests for the image proxy"""
+
+    def test_revalidates_and_serves_stored_copy(self, tmp_path):
+        """Test that stale images are revalidated and kept while upstream fails"""
+        answers = [
+            httpx.Response(200, content=PNG, headers={"Content-Type": "image/png", "ETag": '"v1"'}),
+            httpx.Response(304),
+            httpx.Response(404),
+        ]
+        seen = []
+
+        def handler(request):
+            seen.append(request.headers.get("If-None-Match"))
+            return answers.pop(0)
+
+        proxy = make_proxy(handler, tmp_path, revalidate_after=0)
+
+        async def run():
+            return [await proxy.get("owcdn.net/img/1.png") for _ in range(3)]
+
+        results = asyncio.run(run())
+        assert [content for _, content in results] == [PNG] * 3
+        assert seen == [None, '"v1"', '"v1"']
+        assert (proxy.downloads, proxy.revalidated, proxy.served_stale) == (1, 1, 1)
+
+    def test_prefetch_fetches_each_image_once(self, tmp_path):
+        """Test that prefetching skips duplicates and images already stored"""
+        requested = []
+
+        def handler(request):
+            requested.append(request.url.path)
+            return httpx.Response(200, content=PNG, headers={"Content-Type": "image/png"})
+
+        proxy = make_proxy(handler, tmp_path, max_bytes=10000)
+
+        async def run():
+            proxy.prefetch(["owcdn.net/1.png", "owcdn.net/2.png", "owcdn.net/1.png"])
+            await asyncio.gather(*proxy._tasks)
+            proxy.prefetch(["owcdn.net/1.png"])
+            await asyncio.gather(*proxy._tasks)
+            return await proxy.get("owcdn.net/2.png")
+
+        assert asyncio.run(run())[1] == PNG
+        assert sorted(requested) == ["/1.png", "/2.png"]
+        assert proxy.hits == 1
+
+    def test_unwritable_directory_passes_images_through(self, tmp_path):
+        """Test that a cache directory that cannot be created disables the store instead of failing"""
+        blocker = tmp_path / "file"
+        blocker.write_bytes(b"")
+        requested = []
+
+        def handler(request):
+            requested.append(request.url.path)
+            return httpx.Response(200, content=PNG, headers={"Content-Type": "image/png"})
+
+        proxy = make_proxy(handler, blocker / "images")
+
+        async def run():
+            proxy.prefetch(["owcdn.net/1.png"])
+            await asyncio.gather(*proxy._tasks)
+            return [await proxy.get("owcdn.net/1.png") for _ in range(2)]
+
+        assert [content for _, content in asyncio.run(run())] == [PNG] * 2
+        assert requested == ["/1.png"] * 3
+        assert proxy.prefetched == 1
+        assert proxy.stats()["disk"]["disabled"] is True
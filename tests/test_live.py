@@ -0,0 +1,130 @@
+import asyncio
+import json
+from pathlib import Path
+
+from selectolax.parser import HTMLParser
+
+from api.live import LiveScorePoller
+from api.scrape import MatchScraper
+
+
+def live(*matches):
+    """Wrap matches in the scraper's response shape"""
+    return {"data": {"status": 200, "segments": [dict(match) for match in matches]}}
+
+
+def decode(event):
+    """Split an encoded server-sent event into its name and payload"""
+    name, data = event.decode("utf-8").strip().split("\n")
+    return name[len("event: "):], json.loads(data[len("data: "):])
+
+
+A = {"match_page": "a", "score1": "1", "score2": "0"}
+B = {"match_page": "b", "score1": "0", "score2": "0"}
+
+
+class TestLiveScorePoller:
+    """Tests for the shared live score poller"""
+
+    def test_subscribers_share_polls_and_receive_diffs(self):
+        """Test that one poll feeds every subscriber and only changes are pushed"""
+        states = [live(A, B), live(A, B), live(dict(A, score1="2"), B), live(B)]
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return states[min(calls, len(states)) - 1]
+
+        async def run():
+            poller = LiveScorePoller(fetch, min_interval=0, max_interval=0)
+            first, second = poller.subscribe(), poller.subscribe()
+            received = []
+            for _ in range(4):
+                received.append(decode(await first.get()))
+            for _ in range(4):
+                await second.get()
+            stats = poller.stats()
+            await poller.aclose()
+            return received, stats
+
+        received, stats = asyncio.run(run())
+
+        assert received == [
+            ("snapshot", []),
+            ("update", [A, B]),
+            ("update", [dict(A, score1="2")]),
+            ("remove", ["a"]),
+        ]
+        assert stats["subscribers"] == 2
+        assert stats["published"] == 3
+        assert calls >= 4
+
+    def test_slow_subscriber_is_resynced(self):
+        """Test that a full subscriber queue is replaced by a fresh snapshot"""
+        async def run():
+            poller = LiveScorePoller(lambda: None, queue_size=1)
+            queue = asyncio.Queue(maxsize=1)
+            poller._subscribers.add(queue)
+            poller.matches = {"a": A}
+            poller._publish(b"first")
+            poller._publish(b"second")
+            return queue, poller.resyncs
+
+        queue, resyncs = asyncio.run(run())
+
+        assert resyncs == 1
+        assert decode(queue.get_nowait()) == ("snapshot", [A])
+
+    def test_poller_stops_without_subscribers(self):
+        """Test that polling stops once the last subscriber leaves"""
+        async def fetch():
+            return live(A)
+
+        async def run():
+            poller = LiveScorePoller(fetch, min_interval=0, max_interval=0)
+            stream = poller.events()
+            await stream.__anext__()
+            await stream.aclose()
+            await asyncio.sleep(0.01)
+            return poller.stats()
+
+        stats = asyncio.run(run())
+
+        assert stats["subscribers"] == 0
+        assert not stats["running"]
+        assert stats["live_matches"] == 0
+
+    def test_stale_fallback_is_not_published(self):
+        """Test that a circuit breaker fallback neither updates nor removes live matches"""
+        results = [live(A), dict(live(), stale=True)]
+
+        async def fetch():
+            return results.pop(0)
+
+        async def run():
+            poller = LiveScorePoller(fetch, min_interval=0, max_interval=0)
+            poller._subscribers.add(asyncio.Queue())
+            await poller.poll()
+            changed = await poller.poll()
+            return changed, poller
+
+        changed, poller = asyncio.run(run())
+
+        assert changed is False
+        assert poller.matches == {"a": A}
+        assert poller.published == 1
+        assert poller.stats()["stale"] == 1
+
+
+class TestLiveMatches:
+    """Tests for extracting every live match"""
+
+    def test_extract_live_matches(self):
+        """Test that only the live matches of the home page are returned"""
+        html = HTMLParser((Path(__file__).parent / "fixtures" / "home.html").read_text(encoding="utf-8"))
+        matches = MatchScraper.extract_live_matches(html)
+
+        assert len(matches) == 3
+        assert all(match["time_until_match"] == "LIVE" for match in matches)
+        assert matches[0] == MatchScraper.extract_live_score(html)[0]
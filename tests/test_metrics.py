@@ -0,0 +1,63 @@
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+
+from api.base_scraper import BaseScraper
+from api.metrics import EXTRACT_SECONDS, PARSE_SECONDS, UPSTREAM_RESPONSES, Registry
+from api.upstream import UpstreamClient
+from main import app
+
+
+class TestRegistry:
+    """Tests for the Prometheus text exposition"""
+
+    def test_render_counters_and_histograms(self):
+        """Test that histograms render cumulative buckets and labels are escaped"""
+        registry = Registry()
+        counter = registry.counter("test_total", "A counter", ["path"])
+        histogram = registry.histogram("test_seconds", "A histogram", buckets=[0.1, 1])
+        counter.labels(path='say "hi"').inc(2)
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value)
+
+        lines = registry.render().splitlines()
+        assert "# TYPE test_total counter" in lines
+        assert 'test_total{path="say \\"hi\\""} 2' in lines
+        assert 'test_seconds_bucket{le="0.1"} 1' in lines
+        assert 'test_seconds_bucket{le="1"} 2' in lines
+        assert 'test_seconds_bucket{le="+Inf"} 3' in lines
+        assert "test_seconds_count 3" in lines
+
+
+class TestInstrumentation:
+    """Tests for the series recorded by the API"""
+
+    def test_scrape_records_upstream_parse_and_extract(self):
+        """Test that scraping records upstream status and per-method timings without scraper code"""
+        upstream = UpstreamClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, text="<p>x</p>")), http2=False)
+        scraper = BaseScraper(upstream)
+
+        def extract_paragraphs(html):
+            return [node.text() for node in html.css("p")]
+
+        responses = UPSTREAM_RESPONSES.labels(endpoint="metrics-test", status="200")
+        before = responses.value
+        result, status = asyncio.run(scraper.scrape("https://www.vlr.gg/m", extract_paragraphs, endpoint="metrics-test"))
+
+        assert (result, status) == (["x"], 200)
+        assert responses.value == before + 1
+        method = extract_paragraphs.__qualname__
+        assert PARSE_SECONDS.labels(method=method).count == 1
+        assert EXTRACT_SECONDS.labels(method=method).count == 1
+
+    def test_metrics_endpoint_reports_route_templates(self):
+        """Test that request latency is labelled by route template, not by raw path"""
+        client = TestClient(app)
+        client.get("/health")
+        client.get("/does-not-exist")
+        body = client.get("/metrics").text
+
+        assert 'vlrggapi_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+        assert 'route="unmatched",status="404"' in body
+        assert "# TYPE vlrggapi_cache_requests_total counter" in body
@@ -0,0 +1,104 @@
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+
+from api.base_scraper import BaseScraper
+from api.errors import UpstreamTimeout
+from api.governor import OutboundGovernor
+from api.pagination import Paginator, merge_status
+from api.scrape import Vlr
+from api.upstream import UpstreamClient
+
+PAGE_BAR = '<div class="action-container-pages">' + "".join(
+    f'<a class="mod-page" href="/matches?page={n}">{n}</a>' for n in range(1, 6)
+) + "</div>"
+
+
+class TestPaginator:
+    """Tests for the concurrent pagination engine"""
+
+    def test_pages_fetched_concurrently_in_order(self):
+        """Test that pages come back in order with their own status and bounded concurrency"""
+        in_flight = 0
+        peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            page = int(request.url.params.get("page", 1))
+            in_flight += 1
+            peak = max(peak, in_flight)
+            # Later pages answer first to prove ordering is restored
+            await asyncio.sleep(0.01 * (6 - page))
+            in_flight -= 1
+            status = 500 if page == 3 else 200
+            return httpx.Response(status, text=f"{PAGE_BAR}<p>{page}</p>")
+
+        scraper = BaseScraper(UpstreamClient(transport=httpx.MockTransport(handler), http2=False))
+        paginator = Paginator(
+            scraper,
+            lambda n: f"https://www.vlr.gg/matches?page={n}",
+            lambda html: html.css_first("p").text(),
+            concurrency=2,
+        )
+
+        pages = asyncio.run(paginator.fetch_all())
+
+        assert [page.number for page in pages] == [1, 2, 3, 4, 5]
+        assert [page.items for page in pages] == ["1", "2", "3", "4", "5"]
+        assert [page.status for page in pages] == [200, 200, 500, 200, 200]
+        assert merge_status(pages) == 500
+        assert peak <= 2
+
+
+class TestUpcomingStream:
+    """Tests for streaming the upcoming matches listing"""
+
+    def test_stream_matches_full_listing(self):
+        """Test that streamed matches equal the buffered listing and end with the page statuses"""
+        fixtures = Path(__file__).parent / "fixtures"
+
+        def handler(request):
+            page = request.url.params.get("page", "1")
+            return httpx.Response(200, text=(fixtures / f"matches_page{page}.html").read_text(encoding="utf-8"))
+
+        vlr = Vlr(UpstreamClient(transport=httpx.MockTransport(handler), http2=False))
+
+        async def run():
+            records = [record async for record in await vlr.vlr_upcoming_stream()]
+            return records, await vlr.vlr_upcoming()
+
+        records, buffered = asyncio.run(run())
+
+        assert [record["data"] for record in records[:-1]] == buffered["data"]["segments"]
+        assert records[-1] == {"type": "end", "status": 200, "pages": buffered["data"]["pages"]}
+
+    def test_stream_reports_failing_pages(self):
+        """Test that a failing first page raises before streaming and a later one is reported in the end record"""
+        fixtures = Path(__file__).parent / "fixtures"
+        failing = {"2"}
+
+        def handler(request):
+            page = request.url.params.get("page", "1")
+            if page in failing:
+                raise httpx.ReadTimeout("timed out", request=request)
+            return httpx.Response(200, text=(fixtures / f"matches_page{page}.html").read_text(encoding="utf-8"))
+
+        governor = OutboundGovernor(retries=0)
+        vlr = Vlr(UpstreamClient(transport=httpx.MockTransport(handler), http2=False, governor=governor))
+
+        async def run():
+            records = [record async for record in await vlr.vlr_upcoming_stream()]
+            failing.add("1")
+            with pytest.raises(UpstreamTimeout):
+                await vlr.vlr_upcoming_stream()
+            return records
+
+        records = asyncio.run(run())
+
+        end = records[-1]
+        assert end["type"] == "end"
+        assert end["status"] == 504
+        assert {"page": 2, "status": 504} in end["pages"]
+        assert all(record["page"] != 2 for record in records[:-1])
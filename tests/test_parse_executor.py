@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from api.parse_executor import ParseExecutor
+from api.scrape import MatchScraper, NewsScraper
+
+HTML = '<a class="wf-module-item" href="/1/x"><div><div>Title</div><div>Desc</div></div></a>'
+
+
+class TestParseExecutor:
+    """Tests for the parse executor"""
+
+    @pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+    def test_modes_return_same_result(self, mode):
+        """Test that every mode runs the extractor and tracks the job"""
+        executor = ParseExecutor(mode, workers=1)
+
+        async def run():
+            return await executor.run(MatchScraper.extract_streams, HTML)
+
+        try:
+            assert asyncio.run(run()) == []
+        finally:
+            executor.shutdown()
+        stats = executor.stats()
+        assert stats["completed"] == 1
+        assert stats["queue_depth"] == 0
+
+    def test_failures_are_counted(self):
+        """Test that extraction errors propagate and leave the queue empty"""
+        executor = ParseExecutor("thread", workers=1)
+
+        async def run():
+            return await executor.run(NewsScraper.extract_news, HTML)
+
+        with pytest.raises(Exception):
+            asyncio.run(run())
+        executor.shutdown()
+        assert executor.stats()["failed"] == 1
+        assert executor.queue_depth == 0
+
+    def test_unknown_mode(self):
+        """Test that a bad mode is rejected"""
+        with pytest.raises(ValueError):
+            ParseExecutor("gpu")
@@ -0,0 +1,68 @@
+import asyncio
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+from selectolax.parser import HTMLParser
+
+from api.extraction import Field, Schema
+from api.scrape import Vlr
+from api.upstream import UpstreamClient
+from benchmarks.bench_parsers import CASES, load_fixture
+from benchmarks.fake_vlr import FakeVlr
+
+EXPECTED_DIR = Path(__file__).parent / "fixtures" / "expected"
+
+
+class TestExtraction:
+    """Tests for the declarative extraction engine"""
+
+    def test_fields_assigned_to_owning_item(self):
+        """Test that matches land on their own item and missing fields use the default"""
+        html = HTMLParser(
+            '<ul><li class="item"><b>a</b><i>1</i><i>2</i></li>'
+            '<li class="item"><i>3</i></li></ul>'
+        )
+        schema = Schema(
+            "li.item",
+            {
+                "name": Field("b", default="none"),
+                "numbers": Field("i", many=True, transform=int),
+                "cls": Field(attr="class"),
+            },
+        )
+
+        assert schema.extract(html) == [
+            {"name": "a", "numbers": [1, 2], "cls": "item"},
+            {"name": "none", "numbers": [3], "cls": "item"},
+        ]
+        assert schema.extract(html, limit=1) == schema.extract(html)[:1]
+
+    @pytest.mark.parametrize("case", CASES, ids=[case.name for case in CASES])
+    def test_extractors_match_golden_output(self, case):
+        """Test that every extractor reproduces the saved output for its fixtures"""
+        expected = json.loads((EXPECTED_DIR / f"{case.name}.json").read_text(encoding="utf-8"))
+        assert [case.extract(HTMLParser(load_fixture(name))) for name in case.fixtures] == expected
+
+
+class TestMatchDetail:
+    """Tests for the match detail scrape"""
+
+    def test_performance_tab_merged_into_scoreboards(self):
+        """Test that both tabs are fetched and every scoreboard line gets its performance stats"""
+        fake = FakeVlr()
+        vlr = Vlr(UpstreamClient(transport=httpx.ASGITransport(app=fake), http2=False))
+
+        result = asyncio.run(vlr.vlr_match("500003"))
+        detail = result["data"]
+
+        assert fake.requests["match"] == 2
+        assert detail["match_id"] == "500003"
+        assert detail["state"] == "completed"
+        assert [team["score"] for team in detail["teams"]] == [2, 0]
+        assert [played["map"] for played in detail["maps"]] == ["Bind", "Split"]
+        for players in [detail["players"]] + [played["players"] for played in detail["maps"]]:
+            assert len(players) == 10
+            assert all(isinstance(player["performance"]["econ"], int) for player in players)
+        assert isinstance(detail["players"][0]["rating"], float)
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests for in-flight request coalescing"""
+
+    def test_concurrent_callers_share_one_execution(self):
+        """Test that N concurrent callers for one key run the work once"""
+        flight = SingleFlight("test")
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return {"value": runs}
+
+        async def run():
+            return await asyncio.gather(*(flight.do("key", work) for _ in range(10)))
+
+        results = asyncio.run(run())
+
+        assert runs == 1
+        assert all(result is results[0] for result in results)
+        assert flight.stats()["executions"] == 1
+        assert flight.stats()["coalesced"] == 9
+        assert flight.in_flight == 0
+
+    def test_exception_is_shared_and_key_released(self):
+        """Test that failures reach every caller and do not stick"""
+        flight = SingleFlight("test")
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise ValueError("upstream down")
+
+        async def run():
+            results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+            assert all(isinstance(result, ValueError) for result in results)
+            with pytest.raises(ValueError):
+                await flight.do("key", fail)
+
+        asyncio.run(run())
+        assert flight.stats()["executions"] == 2
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+from api.cache import CacheEntry, InMemoryCacheBackend, ResponseCache
+from api.encoding import EncodedBody
+from api.snapshot import CacheSnapshotter, Snapshot
+from api.warmer import CacheWarmer
+from utils.lru import LRUCache
+
+
+def make_facade():
+    """Stand-in facade holding last good results, as `Vlr` does."""
+    vlr = MagicMock()
+    vlr.last_good = LRUCache(16)
+    vlr.snapshot = None
+    return vlr
+
+
+class TestCacheSnapshot:
+    """Tests for saving the in-memory cache to disk and restoring it lazily"""
+
+    def test_round_trip_keeps_expiry(self, tmp_path):
+        """Test that entries are restored on first lookup with their deadlines, and expired ones are dropped"""
+        path = str(tmp_path / "snapshots" / "cache")
+        now = time.time()
+        backend, vlr = InMemoryCacheBackend(), make_facade()
+        body = EncodedBody.encode({"data": {"status": 200, "segments": [{"title": "VCT"}]}})
+
+        async def save():
+            await backend.set("k:body", CacheEntry(body, now + 60, now + 600))
+            await backend.set("k:plain", CacheEntry({"n": 1}, now - 10, now + 30))
+            await backend.set("k:expired", CacheEntry({"n": 2}, now - 20, now - 10))
+            await backend.set("k:object", CacheEntry(object(), now + 60, now + 600))
+            return await CacheSnapshotter(backend, vlr, path=path).save()
+
+        assert asyncio.run(save()) > 0
+
+        restored = InMemoryCacheBackend()
+        snapshotter = CacheSnapshotter(restored, make_facade(), path=path)
+        assert snapshotter.restore() is True
+        assert sorted(snapshotter.snapshot.entries) == ["k:body", "k:plain"]
+        assert snapshotter.stats()["restored"] == 0
+
+        entry = asyncio.run(restored.get("k:body"))
+        assert isinstance(entry.value, EncodedBody)
+        assert entry.value.data() == body.data()
+        assert (entry.fresh_until, entry.stale_until) == (now + 60, now + 600)
+        assert asyncio.run(restored.get("k:plain")).is_fresh(time.time()) is False
+        assert asyncio.run(restored.get("k:expired")) is None
+        assert snapshotter.stats()["restored"] == 2
+
+    def test_last_good_restored_on_failure(self, tmp_path):
+        """Test that last good facade results are saved and restored when a call needs them"""
+        path = str(tmp_path / "cache")
+        vlr = make_facade()
+        vlr.last_good.set(("vlr_rankings", "na"), ({"status": 200, "data": []}, 1000.0))
+        vlr.last_good.set(("vlr_stats_table", "na", 30), (object(), 1000.0))
+        asyncio.run(CacheSnapshotter(InMemoryCacheBackend(), vlr, path=path).save())
+
+        snapshot = Snapshot.open(path)
+        assert list(snapshot.last_good) == [("vlr_rankings", "na")]
+        assert snapshot.take_last_good(("vlr_rankings", "na")) == ({"status": 200, "data": []}, 1000.0)
+        assert snapshot.take_last_good(("vlr_rankings", "na")) is None
+        snapshot.close()
+
+    def test_pending_entries_survive_resave(self, tmp_path):
+        """Test that entries not looked up since the restore are written to the next snapshot, deleted ones are not"""
+        path = str(tmp_path / "cache")
+        now = time.time()
+        backend = InMemoryCacheBackend()
+        for key in ("a", "b", "c"):
+            asyncio.run(backend.set(key, CacheEntry({"key": key}, now + 60, now + 600)))
+        asyncio.run(CacheSnapshotter(backend, make_facade(), path=path).save())
+
+        restored = InMemoryCacheBackend()
+        snapshotter = CacheSnapshotter(restored, make_facade(), path=path)
+        snapshotter.restore()
+        asyncio.run(restored.get("a"))
+        asyncio.run(restored.delete("b"))
+        asyncio.run(snapshotter.save())
+
+        snapshot = Snapshot.open(path)
+        assert sorted(snapshot.entries) == ["a", "c"]
+        assert snapshot.take("c").value == {"key": "c"}
+        snapshot.close()
+
+    def test_missing_or_invalid_file(self, tmp_path):
+        """Test that a missing or foreign file is ignored, and an empty path disables snapshots"""
+        assert Snapshot.open(str(tmp_path / "missing")) is None
+        (tmp_path / "foreign").write_bytes(b"not a snapshot")
+        assert Snapshot.open(str(tmp_path / "foreign")) is None
+
+        disabled = CacheSnapshotter(InMemoryCacheBackend(), make_facade(), path="")
+        assert disabled.restore() is False
+        assert asyncio.run(disabled.save()) is None
+
+    def test_warm_up_skips_restored_keys(self, tmp_path):
+        """Test that warm-up does not fetch keys already fresh in the restored snapshot"""
+        path = str(tmp_path / "cache")
+        vlr = make_facade()
+        vlr.vlr_rankings = AsyncMock(side_effect=lambda region: {"status": 200, "data": [{"region": region}]})
+
+        first = ResponseCache()
+        asyncio.run(CacheWarmer(vlr, first, warm=["rankings"]).warm_up())
+        asyncio.run(CacheSnapshotter(first.backend, vlr, path=path).save())
+        assert vlr.vlr_rankings.await_count == 12
+
+        second = ResponseCache()
+        CacheSnapshotter(second.backend, make_facade(), path=path).restore()
+        warmer = CacheWarmer(vlr, second, warm=["rankings"])
+        asyncio.run(warmer.warm_up())
+
+        assert vlr.vlr_rankings.await_count == 12
+        assert warmer.progress()["ready"] is True
+        entry = asyncio.run(second.backend.get(second.make_key("vlrapi-rankings", "/rankings/kr")))
+        assert entry.value.data() == {"status": 200, "data": [{"region": "kr"}]}
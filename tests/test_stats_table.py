@@ -0,0 +1,84 @@
+import math
+from pathlib import Path
+
+import pytest
+from selectolax.parser import HTMLParser
+
+import api.stats_table as stats_table
+from api.scrape import StatsScraper
+from api.stats_table import StatsTable, parse_range
+
+HTML = HTMLParser((Path(__file__).parent / "fixtures" / "stats.html").read_text(encoding="utf-8"))
+
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request, monkeypatch):
+    """Run a test with NumPy columns (when installed) and with stdlib arrays"""
+    if request.param == "numpy" and stats_table.np is None:
+        pytest.skip("NumPy is not installed")
+    if request.param == "array":
+        monkeypatch.setattr(stats_table, "np", None)
+    return request.param
+
+
+def table_of(*acs):
+    """Build a table with the given ACS strings"""
+    rows = [{"player": f"p{i}", "org": "x", "average_combat_score": value} for i, value in enumerate(acs)]
+    return StatsTable.from_rows(rows)
+
+
+class TestStatsTable:
+    """Tests for the typed, array-backed stats table"""
+
+    def test_columns_match_legacy_rows(self, backend):
+        """Test that every column holds the parsed legacy strings, KAST included"""
+        table = StatsScraper.extract_stats_table(HTML)
+
+        assert table.rows == StatsScraper.extract_player_stats(HTML)
+        first = table.rows[0]
+        assert table.columns["average_combat_score"][0] == float(first["average_combat_score"])
+        assert table.columns["headshot_percentage"][0] == float(first["headshot_percentage"].rstrip("%"))
+        assert not math.isnan(table.columns["kast"][0])
+
+    def test_filter_sort_limit(self, backend):
+        """Test that range filters, sorting and limits apply, with missing values last"""
+        table = table_of("200", "", "250.5", "180", "250.5")
+
+        result = table.query(filters=[parse_range("average_combat_score:190:")], sort="average_combat_score")
+        assert [row["player"] for row in result["segments"]] == ["p2", "p4", "p0"]
+
+        result = table.query(sort="average_combat_score", descending=False, limit=4)
+        assert [row["player"] for row in result["segments"]] == ["p3", "p0", "p2", "p4"]
+
+        result = table.query(sort="average_combat_score")
+        assert result["segments"][-1]["player"] == "p1"
+
+    def test_percentiles_and_zscores(self, backend):
+        """Test percentiles with interpolation and population z-scores"""
+        table = table_of("10", "20", "30", "40", "")
+
+        result = table.query(percentiles=[0, 50, 75], zscores=["average_combat_score"], columnar=True)
+
+        assert result["percentiles"]["average_combat_score"] == {"p0": 10.0, "p50": 25.0, "p75": 32.5}
+        assert result["percentiles"]["kast"] == {"p0": None, "p50": None, "p75": None}
+        assert result["columns"]["average_combat_score_z"] == [-1.3416, -0.4472, 0.4472, 1.3416, None]
+        assert result["columns"]["average_combat_score"][-1] is None
+
+    def test_invalid_queries(self):
+        """Test that unknown columns and malformed filters are rejected"""
+        with pytest.raises(ValueError):
+            parse_range("player:1:2")
+        with pytest.raises(ValueError):
+            table_of("1").query(sort="player")
+
+    def test_out_of_range_percentiles_and_limits(self, backend):
+        """Test that percentiles outside 0..100 and non-positive limits are rejected"""
+        table = table_of("10", "20", "30")
+
+        for q in (150, -50):
+            with pytest.raises(ValueError):
+                table.query(percentiles=[50, q])
+        assert table.query(percentiles=[0, 100])["percentiles"]["average_combat_score"] == {"p0": 10.0, "p100": 30.0}
+        for limit in (0, -1):
+            with pytest.raises(ValueError):
+                table.query(limit=limit)
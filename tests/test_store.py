@@ -0,0 +1,105 @@
+import asyncio
+from pathlib import Path
+
+import httpx
+
+from api.ingest import Ingestor, parse_date_label
+from api.scrape import Vlr
+from api.store import MatchStore
+from api.upstream import UpstreamClient
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def fixture_upstream(pages):
+    """Serve fixtures by URL path and page number, counting requests per URL"""
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        name = pages(request.url.path.rstrip("/"), int(request.url.params.get("page", 1)))
+        if name is None:
+            return httpx.Response(404, text="")
+        return httpx.Response(200, text=(FIXTURES / name).read_text(encoding="utf-8"))
+
+    return UpstreamClient(transport=httpx.MockTransport(handler), http2=False), requested
+
+
+def vlr_pages(path, page):
+    """Map vlr.gg paths to the saved pages"""
+    if path == "/matches/results":
+        return "results.html"
+    if path == "/matches":
+        return f"matches_page{page}.html"
+    if path.startswith("/rankings"):
+        return "rankings.html"
+    return None
+
+
+class TestIngestor:
+    """Tests for incremental ingestion into the match store"""
+
+    def test_results_walk_stops_at_known_match(self):
+        """Test that a second run stops at the first page holding a stored match"""
+        upstream, requested = fixture_upstream(vlr_pages)
+        store = MatchStore()
+        ingestor = Ingestor(Vlr(upstream), store, max_pages=3)
+
+        async def run():
+            first = await ingestor.ingest_results()
+            requested.clear()
+            second = await ingestor.ingest_results()
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        # Every page serves the same fixture, so the first run stops on page 2
+        assert first == 48
+        assert second == 0
+        assert len(requested) == 1
+
+    def test_full_run_and_queries(self):
+        """Test that results, upcoming matches and rankings are queryable from the store"""
+        upstream, _ = fixture_upstream(vlr_pages)
+        store = MatchStore()
+        ingestor = Ingestor(Vlr(upstream), store, max_pages=1)
+
+        counts = asyncio.run(ingestor.run())
+
+        assert counts == {"results": 48, "upcoming": 90, "rankings": 12}
+        completed = store.find_matches(state="completed", limit=1000)
+        assert len(completed) == 48
+        assert all(match["match_date"] for match in completed)
+
+        team = completed[0]["team1"]
+        by_team = store.find_matches(team=team.upper(), limit=1000)
+        assert by_team and all(team in (match["team1"], match["team2"]) for match in by_team)
+
+        in_range = store.find_matches(start="2025-05-10", end="2025-05-10", limit=1000)
+        assert in_range and all(match["match_date"] == "2025-05-10" for match in in_range)
+
+        tournament = completed[0]["tournament_name"]
+        assert all(
+            match["tournament_name"] == tournament
+            for match in store.find_matches(tournament=tournament, limit=1000)
+        )
+        assert len(store.latest_rankings("na")) == 100
+
+    def test_parse_date_label(self):
+        """Test that day labels with a trailing tag are parsed"""
+        assert parse_date_label("\n\tFri, May 9, 2025\n\t\tToday\n") == "2025-05-09"
+        assert parse_date_label("Wed, September 3, 2025") == "2025-09-03"
+        assert parse_date_label("soon") is None
+
+    def test_stats_never_fail_on_the_store(self, tmp_path):
+        """Test that stats leave the store closed when ingestion is disabled and report store errors"""
+        path = tmp_path / "archive.sqlite3"
+        disabled = Ingestor(Vlr(UpstreamClient()), MatchStore(str(path)), interval=0)
+        assert disabled.stats()["store"] == "disabled"
+        assert not path.exists()
+
+        missing = MatchStore(str(tmp_path / "missing" / "archive.sqlite3"))
+        unreadable = Ingestor(Vlr(UpstreamClient()), missing, interval=60)
+        stats = unreadable.stats()
+        assert stats["enabled"] is True
+        assert stats["store"].startswith("error:")
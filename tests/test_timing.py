@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.profiler import ProfilerMiddleware, SampledProfiler
+from api.timing import ServerTimingMiddleware, phase, record, server_timing_header
+from utils.singleflight import SingleFlight
+
+
+class TestServerTiming:
+    """Tests for the per-request Server-Timing breakdown"""
+
+    def test_header_format(self):
+        """Test that known phases come first, in milliseconds, followed by the total"""
+        header = server_timing_header({"custom": 0.001, "fetch": 0.1234, "cache": 0.0002}, 0.2)
+        assert header == "cache;dur=0.2, fetch;dur=123.4, custom;dur=1.0, total;dur=200.0"
+
+    def test_phases_recorded_from_spawned_tasks(self):
+        """Test that work done in single-flight tasks is attributed to the request"""
+        app = FastAPI()
+        flight = SingleFlight("test")
+
+        async def scrape():
+            record("fetch", 0.05)
+            with phase("parse"):
+                await asyncio.sleep(0)
+            return {"ok": True}
+
+        @app.get("/work")
+        async def work():
+            return await flight.do("key", scrape)
+
+        client = TestClient(ServerTimingMiddleware(app, enabled=True))
+        header = client.get("/work").headers["server-timing"]
+
+        assert header.startswith("fetch;dur=50.0, parse;dur=")
+        assert "total;dur=" in header
+        # Outside a request nothing is recorded
+        record("fetch", 1.0)
+
+
+class TestSampledProfiler:
+    """Tests for the on-demand request profiler"""
+
+    def test_captures_sampled_requests(self):
+        """Test that sampled requests are profiled and aggregated, skipped paths are not"""
+        app = FastAPI()
+
+        @app.get("/hot")
+        def hot():
+            return {"total": sum(i * i for i in range(1000))}
+
+        @app.get("/stream")
+        def stream():
+            return {}
+
+        profiler = SampledProfiler()
+        client = TestClient(ProfilerMiddleware(app, profiler, skip_paths=("/stream",)))
+        client.get("/hot")
+        assert profiler.report()["captures"] == 0
+
+        profiler.enable(1.0)
+        client.get("/hot")
+        client.get("/hot")
+        client.get("/stream")
+        report = profiler.report(sort="calls", limit=5)
+
+        assert report["captures"] == 2
+        assert len(report["functions"]) == 5
+        assert report["functions"][0]["calls"] >= report["functions"][-1]["calls"]
+        with pytest.raises(ValueError):
+            profiler.enable(0)
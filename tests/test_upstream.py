@@ -0,0 +1,77 @@
+import asyncio
+
+import httpx
+
+from api.base_scraper import BaseScraper
+from api.scrape import Vlr
+from api.upstream import UpstreamClient
+
+
+def make_upstream(handler):
+    """Build an upstream client that answers through `handler` instead of the network"""
+    return UpstreamClient(transport=httpx.MockTransport(handler), http2=False)
+
+
+class TestUpstreamClient:
+    """Tests for the shared upstream client"""
+
+    def test_client_is_reused(self):
+        """Test that every request goes through one pooled client"""
+        upstream = make_upstream(lambda request: httpx.Response(200, text="<html></html>"))
+
+        async def run():
+            first = upstream.client
+            await upstream.get("https://www.vlr.gg/news", endpoint="news")
+            await upstream.get("https://www.vlr.gg/matches", endpoint="upcoming")
+            assert upstream.client is first
+            await upstream.aclose()
+
+        asyncio.run(run())
+
+    def test_per_endpoint_timeout(self):
+        """Test that endpoint timeouts fall back to the default"""
+        upstream = UpstreamClient(timeouts={"default": 8.0, "stats": 12.0}, http2=False)
+        assert upstream.timeout_for("stats").read == 12.0
+        assert upstream.timeout_for("unknown").read == 8.0
+
+    def test_scrapers_share_injected_client(self):
+        """Test that the Vlr facade hands its upstream client to every scraper"""
+        upstream = make_upstream(lambda request: httpx.Response(200, text=""))
+        vlr = Vlr(upstream)
+        for scraper in (vlr.news_scraper, vlr.match_scraper, vlr.stats_scraper, vlr.ranking_scraper):
+            assert scraper.upstream is upstream
+
+
+class TestConditionalRequests:
+    """Tests for conditional upstream requests and parse memoization"""
+
+    def test_not_modified_reuses_body_and_extraction(self):
+        """Test that a 304 or an unchanged body skips re-parsing"""
+        seen_headers = []
+
+        def handler(request):
+            seen_headers.append(request.headers.get("If-None-Match"))
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, text="<p>hello</p>", headers={"ETag": '"v1"'})
+
+        scraper = BaseScraper(make_upstream(handler))
+        extractions = 0
+
+        def extract(html):
+            nonlocal extractions
+            extractions += 1
+            return html.css_first("p").text()
+
+        async def run():
+            first = await scraper.scrape("https://www.vlr.gg/news", extract)
+            second = await scraper.scrape("https://www.vlr.gg/news", extract)
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        assert first == second == ("hello", 200)
+        assert seen_headers == [None, '"v1"']
+        assert extractions == 1
+        assert scraper.upstream.not_modified == 1
+        assert scraper.memo_hits == 1
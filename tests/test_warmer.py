@@ -0,0 +1,92 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from api.cache import CacheEntry, ResponseCache
+from api.encoding import EncodedBody
+from api.warmer import CacheWarmer, expand_queries
+
+
+def make_warmer(**kwargs):
+    """Build a warmer over an in-memory cache and a facade answering every region."""
+    vlr = MagicMock()
+    vlr.vlr_rankings = AsyncMock(side_effect=lambda region: {"status": 200, "data": [{"region": region}]})
+    vlr.vlr_stats = AsyncMock(side_effect=lambda region, timespan: {"data": {"status": 200, "segments": []}})
+    cache = ResponseCache()
+    warmer = CacheWarmer(vlr, cache, **kwargs)
+    cache.on_access = warmer.record_access
+    return warmer, vlr, cache
+
+
+class TestCacheWarmer:
+    """Tests for the startup warm-up and popularity-driven refresh"""
+
+    def test_expand_queries(self):
+        """Test that endpoints expand to every region and timespan, and match IDs are rejected"""
+        queries = expand_queries(["rankings", "stats"])
+        assert ("rankings", {"region": "na"}) in queries
+        assert ("stats", {"region": "eu", "timespan": 90}) in queries
+        assert ("stats", {"region": "sa", "timespan": 30}) in queries
+        assert len(queries) == 12 + 13 * 3
+        with pytest.raises(ValueError):
+            expand_queries(["streams"])
+
+    def test_warm_up_stores_route_bodies(self):
+        """Test that warm-up fills the cache with encoded bodies and reports readiness"""
+        warmer, vlr, cache = make_warmer(warm=["rankings"])
+        assert warmer.progress()["ready"] is False
+
+        asyncio.run(warmer.warm_up())
+        entry = asyncio.run(cache.backend.get(cache.make_key("vlrapi-rankings", "/rankings/kr")))
+
+        assert warmer.progress()["ready"] is True
+        assert warmer.progress()["warmed"] == 12
+        assert vlr.vlr_rankings.await_count == 12
+        assert isinstance(entry.value, EncodedBody)
+        assert entry.value.data() == {"status": 200, "data": [{"region": "kr"}]}
+
+    def test_only_hot_keys_refreshed_within_budget(self):
+        """Test that hot keys about to expire are refreshed, most popular first, until the budget runs out"""
+        warmer, vlr, cache = make_warmer(warm=[], interval=30, budget=2, hot_min=3)
+
+        async def run():
+            fetch = AsyncMock(return_value={"status": 200, "data": []})
+            for region, hits in (("na", 9), ("eu", 6), ("ap", 4), ("kr", 1)):
+                for _ in range(hits):
+                    await cache.get_or_fetch("vlrapi-rankings", f"/rankings/{region}", fetch)
+            # "eu" stays fresh past the next pass, the others are about to expire
+            now = time.time()
+            for region in ("na", "ap", "kr"):
+                key = cache.make_key("vlrapi-rankings", f"/rankings/{region}")
+                await cache.backend.set(key, CacheEntry({}, now + 5, now + 60))
+            return await warmer.tick(elapsed=0)
+
+        assert asyncio.run(run()) == 2
+        assert warmer.hot_keys()[:3] == [
+            ("vlrapi-rankings", "/rankings/na"),
+            ("vlrapi-rankings", "/rankings/eu"),
+            ("vlrapi-rankings", "/rankings/ap"),
+        ]
+        assert [call.args for call in vlr.vlr_rankings.await_args_list] == [("na",), ("ap",)]
+        assert warmer.over_budget == 0
+
+        # Out of budget: a due key waits for the next pass
+        now = time.time()
+        asyncio.run(cache.backend.set(cache.make_key("vlrapi-rankings", "/rankings/na"), CacheEntry({}, now, now + 60)))
+        warmer.tokens = 0
+        assert asyncio.run(warmer.tick(elapsed=0)) == 0
+        assert warmer.over_budget == 1
+
+    def test_scores_decay(self):
+        """Test that access counts halve every half-life and are eventually forgotten"""
+        warmer, _, _ = make_warmer(warm=[], half_life=60)
+        for _ in range(4):
+            warmer.record_access("vlrapi-rankings", "/rankings/na")
+        warmer.record_access("vlrapi-unknown", "/nope")
+
+        warmer._decay(60)
+        assert warmer.scores == {("vlrapi-rankings", "/rankings/na"): 2.0}
+        warmer._decay(600)
+        assert warmer.scores == {}
@@ -0,0 +1,203 @@
+import os
+import tempfile
+from typing import Dict, List, Tuple
+
+
+def _env_str(name: str, default: str) -> str:
+    """Read a string setting from the environment."""
+    return os.getenv(name, default)
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment."""
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment."""
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting (1/true/yes/on) from the environment."""
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Upstream (vlr.gg) HTTP client
+UPSTREAM_HTTP2 = _env_bool("UPSTREAM_HTTP2", True)
+UPSTREAM_MAX_CONNECTIONS = _env_int("UPSTREAM_MAX_CONNECTIONS", 20)
+UPSTREAM_MAX_KEEPALIVE = _env_int("UPSTREAM_MAX_KEEPALIVE", 10)
+UPSTREAM_KEEPALIVE_EXPIRY = _env_float("UPSTREAM_KEEPALIVE_EXPIRY", 30.0)
+UPSTREAM_CONNECT_TIMEOUT = _env_float("UPSTREAM_CONNECT_TIMEOUT", 3.0)
+
+# Read timeouts per scraper endpoint, in seconds. Any endpoint can be
+# overridden with UPSTREAM_TIMEOUT_<NAME>, e.g. UPSTREAM_TIMEOUT_STATS=12
+UPSTREAM_TIMEOUTS: Dict[str, float] = {
+    name: _env_float(f"UPSTREAM_TIMEOUT_{name.upper()}", default)
+    for name, default in {
+        "default": 8.0,
+        "news": 8.0,
+        "results": 8.0,
+        "upcoming": 8.0,
+        "live_score": 4.0,
+        "streams": 5.0,
+        "match": 8.0,
+        "stats": 10.0,
+        "rankings": 8.0,
+        "images": 5.0,
+    }.items()
+}
+
+# Maximum number of listing pages fetched concurrently
+PAGINATION_CONCURRENCY = _env_int("PAGINATION_CONCURRENCY", 4)
+
+
+def _env_policy(name: str, fresh: float, stale: float) -> Tuple[float, float]:
+    """Read a "fresh,stale" pair of seconds from the environment."""
+    value = os.getenv(name)
+    if value in (None, ""):
+        return fresh, stale
+    fresh_value, stale_value = value.split(",")
+    return float(fresh_value), float(stale_value)
+
+
+# Cache policy per namespace: (fresh TTL, stale TTL) in seconds. Stale entries
+# are served immediately while being refreshed in the background. Override
+# with CACHE_POLICY_<NAMESPACE>, e.g. CACHE_POLICY_VLRAPI_NEWS="300,1800".
+# Match details pick their policy by match state: a completed match never
+# changes, so it stays fresh for a week (still finite, so that walking match
+# IDs cannot fill the cache for good)
+CACHE_POLICIES: Dict[str, Tuple[float, float]] = {
+    namespace: _env_policy(f"CACHE_POLICY_{namespace.upper().replace('-', '_')}", fresh, stale)
+    for namespace, (fresh, stale) in {
+        "default": (300, 900),
+        "vlrapi-news": (300, 1800),
+        "vlrapi-results": (120, 900),
+        "vlrapi-upcoming": (120, 900),
+        "vlrapi-live-score": (10, 20),
+        "vlrapi-streams": (300, 1800),
+        "vlrapi-match": (60, 600),
+        "vlrapi-match-live": (10, 20),
+        "vlrapi-match-completed": (7 * 86400, 0),
+        "vlrapi-stats": (1800, 7200),
+        "vlrapi-rankings": (1800, 7200),
+    }.items()
+}
+
+# Cache storage: "memory" (per process) or "memcached" (shared by all workers)
+CACHE_BACKEND = _env_str("CACHE_BACKEND", "memory")
+CACHE_PREFIX = _env_str("CACHE_PREFIX", "vlrggapi")
+CACHE_COMPRESS_MIN_BYTES = _env_int("CACHE_COMPRESS_MIN_BYTES", 1024)
+# Entries kept by the in-memory backend before the least recently used are evicted
+CACHE_MAX_ENTRIES = _env_int("CACHE_MAX_ENTRIES", 10000)
+# Seconds to stay on the in-process fallback after the shared backend fails
+CACHE_FAILOVER_RETRY = _env_float("CACHE_FAILOVER_RETRY", 30.0)
+MEMCACHED_SERVER = _env_str("MEMCACHED_SERVER", "127.0.0.1:11211")
+MEMCACHED_TIMEOUT = _env_float("MEMCACHED_TIMEOUT", 0.5)
+MEMCACHED_POOL_SIZE = _env_int("MEMCACHED_POOL_SIZE", 8)
+
+# Upstream bodies kept (per process) for conditional requests, and parse
+# results kept for content-hash memoization
+UPSTREAM_RESPONSE_CACHE_SIZE = _env_int("UPSTREAM_RESPONSE_CACHE_SIZE", 256)
+PARSE_MEMO_SIZE = _env_int("PARSE_MEMO_SIZE", 256)
+
+# Where HTML parsing and extraction runs: "inline", "thread" or "process"
+PARSE_EXECUTOR = _env_str("PARSE_EXECUTOR", "thread")
+PARSE_WORKERS = _env_int("PARSE_WORKERS", 2)
+
+# Live score feed: one shared poller per process, polling every
+# LIVE_POLL_MIN_INTERVAL seconds while scores change and backing off up to
+# LIVE_POLL_MAX_INTERVAL when nothing changes or nothing is live
+LIVE_POLL_MIN_INTERVAL = _env_float("LIVE_POLL_MIN_INTERVAL", 5.0)
+LIVE_POLL_MAX_INTERVAL = _env_float("LIVE_POLL_MAX_INTERVAL", 60.0)
+LIVE_POLL_BACKOFF = _env_float("LIVE_POLL_BACKOFF", 1.5)
+# Events buffered per subscriber before a slow client is resynced with a snapshot
+LIVE_SUBSCRIBER_QUEUE = _env_int("LIVE_SUBSCRIBER_QUEUE", 32)
+# Seconds between keep-alive comments on an idle event stream
+LIVE_KEEPALIVE = _env_float("LIVE_KEEPALIVE", 15.0)
+
+# Local SQLite archive of scraped matches and rankings snapshots. Ingestion
+# runs every INGEST_INTERVAL seconds from the app (0 disables it, e.g. when
+# `python -m api.ingest` is run from cron instead)
+STORE_PATH = _env_str("STORE_PATH", "vlrggapi.sqlite3")
+INGEST_INTERVAL = _env_float("INGEST_INTERVAL", 0.0)
+# Hard cap on results pages walked in one run (bounds the very first run)
+INGEST_MAX_PAGES = _env_int("INGEST_MAX_PAGES", 20)
+
+# Outbound governor towards vlr.gg: token bucket per host (requests per second
+# and burst), retries with jittered exponential backoff on 429/5xx/timeouts,
+# and the longest a request waits on a Retry-After before failing fast
+UPSTREAM_RATE = _env_float("UPSTREAM_RATE", 5.0)
+UPSTREAM_BURST = _env_int("UPSTREAM_BURST", 10)
+UPSTREAM_RETRIES = _env_int("UPSTREAM_RETRIES", 2)
+UPSTREAM_BACKOFF_BASE = _env_float("UPSTREAM_BACKOFF_BASE", 0.25)
+UPSTREAM_BACKOFF_MAX = _env_float("UPSTREAM_BACKOFF_MAX", 5.0)
+UPSTREAM_MAX_WAIT = _env_float("UPSTREAM_MAX_WAIT", 10.0)
+
+# Circuit breaker per upstream route: open after BREAKER_FAILURE_THRESHOLD
+# consecutive failures, probe again after BREAKER_RESET_TIMEOUT seconds. While
+# open, the last successful result (LAST_GOOD_SIZE kept) is served marked stale
+BREAKER_FAILURE_THRESHOLD = _env_int("BREAKER_FAILURE_THRESHOLD", 5)
+BREAKER_RESET_TIMEOUT = _env_float("BREAKER_RESET_TIMEOUT", 30.0)
+LAST_GOOD_SIZE = _env_int("LAST_GOOD_SIZE", 256)
+
+# POST /batch: sub-queries allowed per request and run at the same time
+BATCH_MAX_QUERIES = _env_int("BATCH_MAX_QUERIES", 50)
+BATCH_CONCURRENCY = _env_int("BATCH_CONCURRENCY", 8)
+
+# Cached route bodies are stored JSON-encoded with a strong ETag, plus gzip
+# (and brotli, when installed) variants for bodies of at least
+# RESPONSE_COMPRESS_MIN_BYTES. Variants are built once per refresh, so the
+# levels favour size over speed
+RESPONSE_COMPRESS_MIN_BYTES = _env_int("RESPONSE_COMPRESS_MIN_BYTES", 512)
+RESPONSE_GZIP_LEVEL = _env_int("RESPONSE_GZIP_LEVEL", 9)
+RESPONSE_BROTLI_QUALITY = _env_int("RESPONSE_BROTLI_QUALITY", 9)
+
+# Image proxy (/img/...): team logos and tournament icons are fetched from
+# IMAGE_HOSTS only, kept on disk up to IMAGE_CACHE_MAX_BYTES (least recently
+# used first out) and revalidated upstream after IMAGE_REVALIDATE_AFTER seconds.
+# Response fields link to the proxy, prefixed with IMAGE_URL_PREFIX (e.g. the
+# public base URL of the API), and images of a scraped page are prefetched
+IMAGE_HOSTS: List[str] = _env_str("IMAGE_HOSTS", "owcdn.net,www.vlr.gg").split(",")
+IMAGE_URL_PREFIX = _env_str("IMAGE_URL_PREFIX", "")
+IMAGE_CACHE_DIR = _env_str("IMAGE_CACHE_DIR", ".image_cache")
+IMAGE_CACHE_MAX_BYTES = _env_int("IMAGE_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+IMAGE_REVALIDATE_AFTER = _env_float("IMAGE_REVALIDATE_AFTER", 86400.0)
+# Cache-Control max-age sent to clients for proxied images
+IMAGE_MAX_AGE = _env_int("IMAGE_MAX_AGE", 86400)
+IMAGE_PREFETCH = _env_bool("IMAGE_PREFETCH", True)
+IMAGE_PREFETCH_CONCURRENCY = _env_int("IMAGE_PREFETCH_CONCURRENCY", 4)
+
+# Per-request Server-Timing header (cache, fetch, parse, extract, serialize)
+SERVER_TIMING = _env_bool("SERVER_TIMING", True)
+# Admin endpoints (/admin/...) require this token in X-Admin-Token; unset disables them
+ADMIN_TOKEN = _env_str("ADMIN_TOKEN", "")
+# Functions kept in the aggregated profile report
+PROFILE_TOP = _env_int("PROFILE_TOP", 30)
+
+# Cache warmer: every query of the WARM_ENDPOINTS (all regions and timespans of
+# e.g. rankings and stats) is fetched at startup, and /ready answers 503 until
+# that is done. Every WARM_INTERVAL seconds (0 turns it off), keys requested
+# at least WARM_HOT_MIN times, with counts halving every WARM_HALF_LIFE seconds,
+# are refreshed before they expire, spending at most WARM_BUDGET upstream
+# requests per minute. Other keys are left to expire
+WARM_ENDPOINTS: List[str] = [name for name in _env_str("WARM_ENDPOINTS", "rankings,stats").split(",") if name]
+WARM_INTERVAL = _env_float("WARM_INTERVAL", 30.0)
+WARM_HOT_MIN = _env_float("WARM_HOT_MIN", 5.0)
+WARM_HALF_LIFE = _env_float("WARM_HALF_LIFE", 600.0)
+WARM_BUDGET = _env_int("WARM_BUDGET", 30)
+WARM_CONCURRENCY = _env_int("WARM_CONCURRENCY", 4)
+
+# Cache snapshots: the in-memory response cache and the last good facade
+# results are written to SNAPSHOT_PATH every SNAPSHOT_INTERVAL seconds (0 only
+# at shutdown) and restored lazily, with their original expiry times, by the
+# next process. The default lives in the system temporary directory, which is
+# writable on serverless hosts but may be wiped between deploys; point it at
+# persistent storage to keep the cache across them. An empty path disables them
+SNAPSHOT_PATH = _env_str("SNAPSHOT_PATH", os.path.join(tempfile.gettempdir(), "vlrggapi-cache-snapshot"))
+SNAPSHOT_INTERVAL = _env_float("SNAPSHOT_INTERVAL", 300.0)
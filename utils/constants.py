@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, List
 
 # HTTP headers to use for requests
 headers = {
@@ -21,6 +21,25 @@ region_map: Dict[str, str] = {
     "cn": "china",
 }
 
+# Region codes of the stats page's `?region=` filter, which differ from the
+# rankings page codes above. Also the regions of the cross-region leaderboard
+stats_regions: List[str] = [
+    "na", "eu", "ap", "sa", "jp", "oce", "mn", "br", "kr", "ch", "la-s", "la-n", "gc",
+]
+
+# Player stats columns that can be sorted on, in scraper output order
+stat_columns: List[str] = [
+    "average_combat_score",
+    "kill_deaths",
+    "average_damage_per_round",
+    "kills_per_round",
+    "assists_per_round",
+    "first_kills_per_round",
+    "first_deaths_per_round",
+    "headshot_percentage",
+    "clutch_success_percentage",
+]
+
 # URL constants
 BASE_URL = "https://www.vlr.gg"
 NEWS_URL = f"{BASE_URL}/news"
@@ -46,46 +46,3 @@ def extract_flags(items: List[Any]) -> List[str]:
         List of flag class strings
     """
     return [item.attributes["class"].replace(" mod-", "_") for item in items]
-
-
-def fetch_image_as_base64(src: str, default_host: str = "https://www.vlr.gg") -> str:
-    """Fetch an image from `src`, return a data URI with base64-encoded bytes.
-
-    Normalizes common src forms: absolute (http/https), protocol-relative (//...),
-    and site-relative (/...). On failure returns an empty string.
-
-    Args:
-        src: The image `src` attribute value from the page
-        default_host: Host to prefix when src is site-relative
-
-    Returns:
-        A string like "data:image/png;base64,<...>" or empty string on error
-    """
-    import base64
-    import requests
-    from utils.constants import headers
-
-    if not src:
-        return ""
-
-    # Normalize src to a full URL
-    src = src.strip()
-    if src.startswith("//"):
-        url = f"https:{src}"
-    elif src.startswith("/"):
-        url = f"{default_host}{src}"
-    elif src.startswith("http://") or src.startswith("https://"):
-        url = src
-    else:
-        # Treat as relative
-        url = f"{default_host}/{src.lstrip('/') }"
-
-    try:
-        resp = requests.get(url, headers=headers, timeout=5)
-        resp.raise_for_status()
-        content_type = resp.headers.get("Content-Type", "image/png")
-        b64 = base64.b64encode(resp.content).decode('ascii')
-        return f"data:{content_type};base64,{b64}"
-    except Exception:
-        # On any failure return empty string so callers can decide fallback
-        return ""
\ No newline at end of file
@@ -0,0 +1,49 @@
+from collections import OrderedDict
+from typing import Generic, Hashable, List, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """Small bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, max_size: int):
+        """
+        Args:
+            max_size: Maximum number of entries kept
+        """
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, V]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Return the value for a key and mark it as recently used."""
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return None
+        return self._data[key]
+
+    def set(self, key: Hashable, value: V) -> None:
+        """Store a value, evicting the oldest entry when full."""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        """Remove a key and return its value."""
+        return self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self._data.clear()
+
+    def items(self) -> List[Tuple[Hashable, V]]:
+        """Every key and value, least recently used first."""
+        return list(self._data.items())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
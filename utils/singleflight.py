@@ -0,0 +1,75 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    In-flight request coalescing.
+
+    Concurrent calls sharing the same key are collapsed into one execution;
+    every caller receives the same result (or the same exception). Once the
+    call finishes the key is released, so nothing is cached beyond the flight.
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Name used when reporting statistics
+        """
+        self.name = name
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `fn` once per key among concurrent callers.
+
+        Args:
+            key: Identifies identical work (e.g. a URL or method + parameters)
+            fn: Zero-argument coroutine factory performing the work
+
+        Returns:
+            The result of the shared execution
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._release(key, done))
+        # Shield so one caller being cancelled does not cancel the others
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        """Forget a finished flight and mark its exception as retrieved."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of keys currently being executed."""
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report coalescing statistics.
+
+        Returns:
+            Dictionary with total requests, actual executions, coalesced
+            callers (requests answered by another caller's flight) and
+            in-flight keys
+        """
+        return {
+            "name": self.name,
+            "requests": self.executions + self.coalesced,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+        }